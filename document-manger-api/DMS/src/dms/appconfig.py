@@ -2,8 +2,6 @@ import os
 import json
 import base64
 # from .auth.auth import get_current_user
-import requests
-import datetime
 from os.path import join, dirname, exists
 from dotenv import load_dotenv
 
@@ -11,6 +9,9 @@ from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from .helper.token_cache import ExpiringTokenCache
+from .helper.http_pools import sync_session, SYNC_TIMEOUT
+
 
 config_instance = None
 
@@ -34,8 +35,8 @@ class AppConfig:
             self.oauth2_scheme = None
             self.auth_handler = None
         
-        self.destination_token_cache = {"token": None, "expires_at": None}
-        self.connectivity_token_cache = {"token": None, "expires_at": None}
+        self.destination_token_cache = ExpiringTokenCache(self._refresh_destination_token)
+        self.connectivity_token_cache = ExpiringTokenCache(self._refresh_connectivity_token)
 
         if self.LOCAL_ENV:
             self._load_local_env()
@@ -144,7 +145,7 @@ class AppConfig:
             
             headers = {'Authorization': f'Bearer {token}', 'Accept': 'application/json'}
             destination_url = f"{self.destination_service.credentials['uri']}/destination-configuration/v1/destinations/{self.destination_name}"
-            destination_details = requests.get(destination_url, headers=headers)
+            destination_details = sync_session.get(destination_url, headers=headers, timeout=SYNC_TIMEOUT)
 
             if destination_details.status_code != 200:
                 raise ValueError(f"Failed to retrieve destination: Status {destination_details.status_code} - {destination_details.text}")
@@ -172,39 +173,32 @@ class AppConfig:
             }
 
     def get_destination_token(self):
-        if not self.destination_token_cache["token"] or self._is_token_expired(self.destination_token_cache):
-            self._refresh_destination_token()
-        return self.destination_token_cache["token"]
+        return self.destination_token_cache.get()
 
     def get_connectivity_token(self):
-        if not self.connectivity_token_cache["token"] or self._is_token_expired(self.connectivity_token_cache):
-            self._refresh_connectivity_token()
-        return self.connectivity_token_cache["token"]
-
-    def _is_token_expired(self, token_cache):
-        return token_cache["expires_at"] is None or datetime.datetime.now().timestamp() >= token_cache["expires_at"]
+        return self.connectivity_token_cache.get()
 
     def _refresh_destination_token(self):
         auth_header = self._get_basic_auth_header(self.destination_service.credentials)
         form_data = self._get_token_form_data(self.destination_service.credentials)
-        response = requests.post(f"{self.destination_service.credentials['url']}/oauth/token", data=form_data, headers=auth_header)
+        response = sync_session.post(f"{self.destination_service.credentials['url']}/oauth/token", data=form_data, headers=auth_header, timeout=SYNC_TIMEOUT)
 
         if response.status_code != 200:
             raise ValueError(f"Failed to retrieve destination token: Status {response.status_code} - {response.text}")
 
-        self.destination_token_cache["token"] = response.json().get('access_token')
-        self.destination_token_cache["expires_at"] = datetime.datetime.now().timestamp() + 2 * 3600  # 2 hours
+        response_data = response.json()
+        return response_data.get('access_token'), response_data.get('expires_in')
 
     def _refresh_connectivity_token(self):
         auth_header = self._get_basic_auth_header(self.connectivity_service.credentials)
         form_data = self._get_token_form_data(self.connectivity_service.credentials)
-        response = requests.post(f"{self.connectivity_service.credentials['url']}/oauth/token", data=form_data, headers=auth_header)
+        response = sync_session.post(f"{self.connectivity_service.credentials['url']}/oauth/token", data=form_data, headers=auth_header, timeout=SYNC_TIMEOUT)
 
         if response.status_code != 200:
             raise ValueError(f"Failed to retrieve connectivity token: Status {response.status_code} - {response.text}")
 
-        self.connectivity_token_cache["token"] = response.json().get('access_token')
-        self.connectivity_token_cache["expires_at"] = datetime.datetime.now().timestamp() + 2 * 3600  # 2 hours
+        response_data = response.json()
+        return response_data.get('access_token'), response_data.get('expires_in')
 
     def _get_basic_auth_header(self, credentials):
         auth = f"{credentials['clientid']}:{credentials['clientsecret']}"
@@ -1,4 +1,8 @@
 import os
+import time
+import base64
+import hashlib
+from collections import OrderedDict
 from fastapi import HTTPException, Security, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
@@ -12,6 +16,71 @@ LOCAL_ENV = os.getenv("ENV", "PROD").upper() == "LOCAL"
 if not LOCAL_ENV:
         from sap import xssec
         from cfenv import AppEnv
+
+# Verified security contexts keyed by token hash, shared by every XSUAAMiddleware instance
+CONTEXT_CACHE_SIZE = int(os.getenv("XSUAA_CONTEXT_CACHE_SIZE", "1024"))
+# Used when a token carries no readable exp claim
+CONTEXT_CACHE_DEFAULT_TTL = 60
+
+
+class CachedSecurityContext:
+    __slots__ = ("security_context", "expires_at", "scope_checks")
+
+    def __init__(self, security_context, expires_at: float):
+        self.security_context = security_context
+        self.expires_at = expires_at
+        self.scope_checks = {}
+
+    def has_scope(self, scope: str) -> bool:
+        """check_scope result, memoized for the lifetime of the cached context"""
+        result = self.scope_checks.get(scope)
+        if result is None:
+            try:
+                result = bool(self.security_context.check_scope(scope))
+            except AttributeError:
+                # Older xssec contexts expose the scopes directly
+                user_scopes = getattr(self.security_context, 'scope', None)
+                if user_scopes is None:
+                    user_scopes = getattr(self.security_context, 'token_info', {}).get('scope', [])
+                if isinstance(user_scopes, str):
+                    user_scopes = user_scopes.split()
+                result = scope in user_scopes
+            self.scope_checks[scope] = result
+        return result
+
+
+_context_cache: "OrderedDict[str, CachedSecurityContext]" = OrderedDict()
+
+
+def _token_expiry(token: str) -> float:
+    """exp claim of an already verified JWT, read without re-verifying the signature"""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return time.time() + CONTEXT_CACHE_DEFAULT_TTL
+
+
+def get_security_context(token: str, credentials) -> CachedSecurityContext:
+    """Verify a token with XSUAA once and serve repeats from the cache until exp or LRU eviction"""
+    key = hashlib.sha256(token.encode()).hexdigest()
+    entry = _context_cache.get(key)
+    if entry is not None:
+        if entry.expires_at > time.time():
+            _context_cache.move_to_end(key)
+            return entry
+        del _context_cache[key]
+
+    entry = CachedSecurityContext(
+        xssec.create_security_context(token, credentials),
+        _token_expiry(token)
+    )
+    _context_cache[key] = entry
+    while len(_context_cache) > CONTEXT_CACHE_SIZE:
+        _context_cache.popitem(last=False)
+    return entry
+
            
 class XSUAAMiddleware(HTTPBearer):
     def __init__(self, auto_error: bool = True, required_scopes: list = None):
@@ -27,50 +96,19 @@ class XSUAAMiddleware(HTTPBearer):
             raise HTTPException(status_code=403, detail="Invalid authorization code.")
         
         try:
-            logger.debug("XSUAA Service credentials: %s", self.xsuaa_service.credentials)
-            logger.debug("Request credentials: %s", credentials.credentials)
-            
-            # Verify JWT token with XSUAA
-            security_context = xssec.create_security_context(
+            # Verify JWT token with XSUAA, or reuse the cached verification
+            cached_context = get_security_context(
                 credentials.credentials,
                 self.xsuaa_service.credentials
-            )           
+            )
+            security_context = cached_context.security_context
            
             # Check required scopes
             if self.required_scopes:
                 try:
-                    # Try different methods to get scopes
-                    try:
-                        # Try to get scopes using has_scope method
-                        user_scopes = []
-                        for scope in self.required_scopes:
-                            if security_context.check_scope(scope):
-                                user_scopes.append(scope)
-                        print("user_scopes",user_scopes)        
-                    except AttributeError:
-                        try:
-                            # Try to get scopes from attributes
-                            user_scopes = getattr(security_context, 'scope', [])
-                            if isinstance(user_scopes, str):
-                                user_scopes = user_scopes.split()
-                        except AttributeError:
-                            # Last resort: try to get from JWT claims
-                            token_info = getattr(security_context, 'token_info', {})
-                            user_scopes = token_info.get('scope', [])
-                    
-                    print("User scopes (raw):", user_scopes)
-                    
-                    # Convert scopes to list if it's not already
-                    if isinstance(user_scopes, str):
-                        user_scopes = user_scopes.split()
-                    elif not isinstance(user_scopes, (list, tuple)):
-                        user_scopes = list(user_scopes)
-                    
-                    print("User scopes (processed):", user_scopes)
-                    
                     # Check if any required scope matches
                     has_required_scope = any(
-                        required in user_scopes 
+                        cached_context.has_scope(required)
                         for required in self.required_scopes
                     )
                     
@@ -78,15 +116,16 @@ class XSUAAMiddleware(HTTPBearer):
                         logger.warning(
                             "Insufficient permissions. Required: %s, Found: %s",
                             self.required_scopes,
-                            user_scopes
+                            [scope for scope, granted in cached_context.scope_checks.items() if granted]
                         )
                         raise HTTPException(
                             status_code=403,
                             detail="Insufficient permissions"
                         )
+                except HTTPException:
+                    raise
                 except Exception as scope_error:
                     logger.error("Error checking scopes: %s", str(scope_error), exc_info=True)
-                    print("Error checking scopes:", str(scope_error))
                     raise HTTPException(
                         status_code=500,
                         detail="Error checking permissions: " + str(scope_error)
@@ -96,6 +135,8 @@ class XSUAAMiddleware(HTTPBearer):
             request.state.security_context = security_context
             return credentials.credentials            
        
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error("Authentication error: %s", str(e), exc_info=True)
             raise HTTPException(
@@ -20,4 +20,12 @@ class InvalidQueryError(DataStoryException):
 
 class ODataServiceError(DataStoryException):
     """Raised when OData service encounters an error"""
-    pass 
\ No newline at end of file
+    pass
+
+class ConnectionPoolError(DataStoryException):
+    """Raised when no pooled database connection can be checked out"""
+    pass
+
+class JobCancelledError(DataStoryException):
+    """Raised inside a sync job once cancellation has been requested"""
+    pass
@@ -0,0 +1,282 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple, Callable
+
+import pyhdb
+
+from ..exceptions import ConnectionPoolError
+
+logger = logging.getLogger(__name__)
+
+
+def hana_connection() -> Dict[str, Any]:
+    """Database configuration, read when a pool or integration is created so values
+    loaded from .env after this module is imported are picked up"""
+    return {
+        "host": os.getenv("HANA_HOST"),
+        "port": int(os.getenv("HANA_PORT", "30015")),
+        "user": os.getenv("HANA_USER"),
+        "password": os.getenv("HANA_PASSWORD")
+    }
+
+
+class HANAConnectionPool:
+    """Thread-safe pool of pyhdb connections shared by all endpoints and integrations"""
+
+    def __init__(self, connection_config: Dict[str, Any], min_size: int = 1, max_size: int = 10,
+                 timeout: float = 30.0, validate_after: float = 30.0):
+        self.connection_config = connection_config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        # Idle connections older than this are pinged before being handed out
+        self.validate_after = validate_after
+
+        self._cond = threading.Condition()
+        self._idle: List[Tuple[Any, float]] = []
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "validation_failures": 0
+        }
+
+    def open(self) -> None:
+        """Pre-create min_size connections"""
+        with self._cond:
+            missing = self.min_size - self._size
+            self._size += max(missing, 0)
+        for _ in range(max(missing, 0)):
+            try:
+                connection = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append((connection, time.monotonic()))
+                self._cond.notify()
+
+    def _connect(self):
+        connection = pyhdb.connect(**self.connection_config)
+        with self._cond:
+            self._stats["created"] += 1
+        return connection
+
+    def _is_alive(self, connection) -> bool:
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1 FROM DUMMY")
+            cursor.fetchone()
+            return True
+        except Exception:
+            return False
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+    def _close_quietly(self, connection) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def acquire(self, timeout: Optional[float] = None):
+        """Check out a connection, blocking up to timeout seconds for one to become free"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        connection = None
+        idle_since = None
+
+        with self._cond:
+            waited = False
+            while True:
+                if self._closed:
+                    raise ConnectionPoolError("Connection pool is closed")
+                if self._idle:
+                    connection, idle_since = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot now, connect outside the lock
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise ConnectionPoolError(
+                        f"Timed out after {timeout}s waiting for a database connection"
+                    )
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                self._cond.wait(remaining)
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+
+        try:
+            if connection is not None and time.monotonic() - idle_since >= self.validate_after:
+                if not self._is_alive(connection):
+                    logger.warning("Discarding dead pooled HANA connection")
+                    with self._cond:
+                        self._stats["validation_failures"] += 1
+                    self._close_quietly(connection)
+                    connection = None
+            if connection is None:
+                connection = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return connection
+
+    def release(self, connection, discard: bool = False) -> None:
+        """Return a connection to the pool, or close it when discard is set or the pool is closed"""
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._size -= 1
+                self._stats["discarded"] += 1
+            else:
+                self._idle.append((connection, time.monotonic()))
+                connection = None
+            self._cond.notify()
+        if connection is not None:
+            self._close_quietly(connection)
+
+    async def acquire_async(self, timeout: Optional[float] = None):
+        """Check out a connection without blocking the event loop while waiting"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_db_executor(), self.acquire, timeout)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        except Exception:
+            try:
+                connection.rollback()
+            except Exception:
+                self.release(connection, discard=True)
+                raise
+            self.release(connection)
+            raise
+        else:
+            self.release(connection)
+
+    @asynccontextmanager
+    async def async_connection(self, timeout: Optional[float] = None):
+        connection = await self.acquire_async(timeout)
+        try:
+            yield connection
+        except Exception:
+            try:
+                connection.rollback()
+            except Exception:
+                self.release(connection, discard=True)
+                raise
+            self.release(connection)
+            raise
+        else:
+            self.release(connection)
+
+    def close(self) -> None:
+        """Close idle connections; connections still checked out are closed when released"""
+        with self._cond:
+            self._closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._size -= len(idle)
+            self._idle = []
+            self._cond.notify_all()
+        for connection in idle:
+            self._close_quietly(connection)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "closed": self._closed,
+                **self._stats
+            }
+
+
+_pool: Optional[HANAConnectionPool] = None
+_pool_lock = threading.Lock()
+_db_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Threads reserved for blocking pyhdb calls, sized to the pool so no worker waits on a connection"""
+    global _db_executor
+    with _pool_lock:
+        if _db_executor is None:
+            workers = int(os.getenv("HANA_DB_WORKERS", os.getenv("HANA_POOL_MAX_SIZE", "10")))
+            _db_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hana-db")
+        return _db_executor
+
+
+async def run_db(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run fn(connection, *args) on the DB executor with a pooled connection.
+
+    The connection is rolled back on error; fn commits itself when it writes.
+    """
+    def call():
+        with get_pool().connection() as connection:
+            return fn(connection, *args)
+    return await asyncio.get_running_loop().run_in_executor(get_db_executor(), call)
+
+
+def init_pool(connection_config: Optional[Dict[str, Any]] = None) -> HANAConnectionPool:
+    """Create the process-wide pool from HANA_POOL_* env vars and open its minimum connections"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.stats()["closed"]:
+            _pool = HANAConnectionPool(
+                connection_config or hana_connection(),
+                min_size=int(os.getenv("HANA_POOL_MIN_SIZE", "1")),
+                max_size=int(os.getenv("HANA_POOL_MAX_SIZE", "10")),
+                timeout=float(os.getenv("HANA_POOL_TIMEOUT", "30")),
+                validate_after=float(os.getenv("HANA_POOL_VALIDATE_AFTER", "30"))
+            )
+        pool = _pool
+    pool.open()
+    return pool
+
+
+def get_pool(connection_config: Optional[Dict[str, Any]] = None) -> HANAConnectionPool:
+    """Return the process-wide pool, creating it lazily outside of the app lifespan"""
+    if _pool is None or _pool.stats()["closed"]:
+        return init_pool(connection_config)
+    return _pool
+
+
+def close_pool() -> None:
+    global _pool, _db_executor
+    with _pool_lock:
+        pool, _pool = _pool, None
+        executor, _db_executor = _db_executor, None
+    if pool:
+        pool.close()
+    if executor:
+        executor.shutdown(wait=False)
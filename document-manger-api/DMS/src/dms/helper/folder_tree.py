@@ -0,0 +1,309 @@
+from collections import defaultdict
+from typing import Dict, Any, Optional, List, Tuple
+
+from .pagination import fetch_page
+
+# Materialized path keys: "/" for the container root, then each folder's ID chain,
+# e.g. "/12/45/" for folder 45 inside folder 12. A file carries its folder's key.
+# Everything below a folder has a key in [key, key with its trailing "/" replaced by "0"),
+# since "0" is the character after "/", so subtree reads are one range scan on PathKey.
+ROOT_KEY = "/"
+# Levels one /tree request may expand
+MAX_TREE_DEPTH = 5
+
+
+def child_key(parent_key: str, folder_id: int) -> str:
+    return f"{parent_key}{folder_id}/"
+
+
+def subtree_bounds(path_key: str) -> Tuple[str, str]:
+    return path_key, path_key[:-1] + "0"
+
+
+def backfill_path_keys(cursor, container_id: int) -> int:
+    """Compute PathKey/Depth for rows written before the columns existed, one level per query"""
+    cursor.execute(
+        "UPDATE DMS_Folders SET PathKey = '/' || TO_VARCHAR(FolderId) || '/', Depth = 1"
+        " WHERE ContainerId = ? AND ParentFolderId IS NULL AND PathKey IS NULL",
+        (container_id,)
+    )
+    updated = cursor.rowcount
+    depth = 1
+    while True:
+        cursor.execute(
+            "UPDATE DMS_Folders SET"
+            " PathKey = (SELECT p.PathKey FROM DMS_Folders p WHERE p.FolderId = DMS_Folders.ParentFolderId)"
+            " || TO_VARCHAR(FolderId) || '/', Depth = ?"
+            " WHERE ContainerId = ? AND PathKey IS NULL AND ParentFolderId IN"
+            " (SELECT FolderId FROM DMS_Folders WHERE ContainerId = ? AND Depth = ?)",
+            (depth + 1, container_id, container_id, depth)
+        )
+        if cursor.rowcount <= 0:
+            break
+        updated += cursor.rowcount
+        depth += 1
+    cursor.execute(
+        "UPDATE DMS_Files SET"
+        " PathKey = COALESCE((SELECT fo.PathKey FROM DMS_Folders fo WHERE fo.FolderId = DMS_Files.FolderId), '/'),"
+        " Depth = COALESCE((SELECT fo.Depth FROM DMS_Folders fo WHERE fo.FolderId = DMS_Files.FolderId), 0) + 1"
+        " WHERE ContainerId = ? AND PathKey IS NULL",
+        (container_id,)
+    )
+    return updated + max(cursor.rowcount, 0)
+
+
+# Containers known to have PathKey on every row. Writers key each row they add, so a
+# container found complete stays complete and is not checked again.
+_keyed_containers: set = set()
+
+
+def path_keys_checked(container_id: int) -> bool:
+    return container_id in _keyed_containers
+
+
+def ensure_path_keys(connection, container_id: int) -> int:
+    """Backfill a container written before PathKey existed, in a transaction of its own.
+
+    The range reads below only see keyed rows, so a legacy container would look empty,
+    root included. Run this before reading; it checks each container once per process.
+    """
+    if container_id in _keyed_containers:
+        return 0
+    cursor = connection.cursor()
+    try:
+        updated = 0
+        for table in ("DMS_Folders", "DMS_Files"):
+            cursor.execute(f"SELECT 1 FROM {table} WHERE ContainerId = ? AND PathKey IS NULL LIMIT 1", (container_id,))
+            if cursor.fetchone() is not None:
+                updated = backfill_path_keys(cursor, container_id)
+                connection.commit()
+                break
+        _keyed_containers.add(container_id)
+        return updated
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def folder_key(cursor, container_id: int, folder_id: Optional[int]) -> Optional[Tuple[str, int, str]]:
+    """(PathKey, Depth, FolderPath) of a folder, ("/", 0, "") for the container root, None if missing"""
+    if folder_id is None:
+        return ROOT_KEY, 0, ""
+    cursor.execute(
+        "SELECT PathKey, Depth, FolderPath FROM DMS_Folders WHERE ContainerId = ? AND FolderId = ?",
+        (container_id, folder_id)
+    )
+    row = cursor.fetchone()
+    return tuple(row) if row else None
+
+
+def list_subtree(cursor, container_id: int, folder_id: Optional[int], max_depth: Optional[int],
+                 kind: str, after: Optional[int], limit: int) -> Optional[Tuple[List[Dict[str, Any]], Optional[int]]]:
+    """One keyset page of the folders or files below a folder, at most max_depth levels down"""
+    key = folder_key(cursor, container_id, folder_id)
+    if key is None:
+        return None
+    path_key, depth, _ = key
+    low, high = subtree_bounds(path_key)
+    if kind == "folders":
+        key_column = "FolderId"
+        columns = ["FolderId", "FolderName", "ParentFolderId", "FolderPath", "Depth"]
+        # Strictly above the folder's own key, so the folder itself isn't listed
+        select_from = "FROM DMS_Folders WHERE ContainerId = ? AND PathKey > ? AND PathKey < ?"
+    else:
+        key_column = "FileId"
+        columns = ["FileId", "FileName", "FolderId", "FilePath", "FileSize", "FileType", "Depth"]
+        select_from = "FROM DMS_Files WHERE ContainerId = ? AND PathKey >= ? AND PathKey < ?"
+    params: tuple = (container_id, low, high)
+    if max_depth is not None:
+        select_from += " AND Depth <= ?"
+        params += (depth + max_depth,)
+    return fetch_page(cursor, select_from, columns, key_column, after, limit, params)
+
+
+def subtree_size(cursor, container_id: int, folder_id: Optional[int]) -> Optional[Dict[str, Any]]:
+    key = folder_key(cursor, container_id, folder_id)
+    if key is None:
+        return None
+    low, high = subtree_bounds(key[0])
+    cursor.execute(
+        "SELECT COUNT(*), COALESCE(SUM(FileSize), 0) FROM DMS_Files"
+        " WHERE ContainerId = ? AND PathKey >= ? AND PathKey < ?",
+        (container_id, low, high)
+    )
+    files, size = cursor.fetchone()
+    cursor.execute(
+        "SELECT COUNT(*), COALESCE(MAX(Depth), ?) FROM DMS_Folders"
+        " WHERE ContainerId = ? AND PathKey > ? AND PathKey < ?",
+        (key[1], container_id, low, high)
+    )
+    folders, deepest = cursor.fetchone()
+    return {
+        "folder_id": folder_id,
+        "path": key[2],
+        "folders": folders,
+        "files": files,
+        "total_size": int(size),
+        "levels": deepest - key[1]
+    }
+
+
+def move_folder(cursor, container_id: int, folder_id: int, new_parent_id: Optional[int]) -> Dict[str, Any]:
+    """Re-parent a folder: one range UPDATE rewrites the keys, paths and depths of its whole subtree
+    in each table. Raises ValueError for a missing folder, a move into its own subtree or a name clash."""
+    moved = folder_key(cursor, container_id, folder_id)
+    parent = folder_key(cursor, container_id, new_parent_id)
+    if moved is None or parent is None:
+        raise ValueError("Folder not found in this container")
+    old_key, old_depth, old_path = moved
+    parent_key, parent_depth, parent_path = parent
+    if parent_key.startswith(old_key):
+        raise ValueError("A folder can't be moved into its own subtree")
+
+    name = old_path.rpartition("/")[2]
+    new_key = child_key(parent_key, folder_id)
+    new_path = f"{parent_path}/{name}" if parent_path else name
+    cursor.execute(
+        "SELECT COUNT(*) FROM DMS_Folders WHERE ContainerId = ? AND FolderPath = ?", (container_id, new_path)
+    )
+    if new_key != old_key and cursor.fetchone()[0]:
+        raise ValueError(f"A folder named {name} already exists there")
+
+    low, high = subtree_bounds(old_key)
+    rewrite = (new_key, len(old_key) + 1, new_path, len(old_path) + 1, parent_depth + 1 - old_depth)
+    cursor.execute(
+        "UPDATE DMS_Folders SET PathKey = ? || SUBSTRING(PathKey, ?), FolderPath = ? || SUBSTRING(FolderPath, ?),"
+        " Depth = Depth + ? WHERE ContainerId = ? AND PathKey >= ? AND PathKey < ?",
+        rewrite + (container_id, low, high)
+    )
+    folders = cursor.rowcount
+    cursor.execute(
+        "UPDATE DMS_Files SET PathKey = ? || SUBSTRING(PathKey, ?), FilePath = ? || SUBSTRING(FilePath, ?),"
+        " Depth = Depth + ? WHERE ContainerId = ? AND PathKey >= ? AND PathKey < ?",
+        rewrite + (container_id, low, high)
+    )
+    files = cursor.rowcount
+    cursor.execute("UPDATE DMS_Folders SET ParentFolderId = ? WHERE FolderId = ?", (new_parent_id, folder_id))
+    return {"folder_id": folder_id, "path": new_path, "folders_moved": folders, "files_moved": files}
+
+
+def _folder_node(folder_id: int, name: str, path: str) -> Dict[str, Any]:
+    return {"type": "folder", "id": folder_id, "name": name, "path": path, "folder_count": 0, "file_count": 0}
+
+
+def _file_node(file_id: int, name: str, path: str, size: int, file_type: str) -> Dict[str, Any]:
+    return {"type": "file", "id": file_id, "name": name, "path": path, "size": size, "file_type": file_type}
+
+
+def _level_counts(cursor, container_id: int, low: str, high: str, depth: int) -> Tuple[Dict, Dict]:
+    """Subfolder and file counts by parent folder ID for every folder at depth - 1 in the range"""
+    counts = []
+    for query in (
+        "SELECT ParentFolderId, COUNT(*) FROM DMS_Folders WHERE ContainerId = ?"
+        " AND PathKey >= ? AND PathKey < ? AND Depth = ? GROUP BY ParentFolderId",
+        "SELECT FolderId, COUNT(*) FROM DMS_Files WHERE ContainerId = ?"
+        " AND PathKey >= ? AND PathKey < ? AND Depth = ? GROUP BY FolderId"
+    ):
+        cursor.execute(query, (container_id, low, high, depth))
+        counts.append(dict(cursor.fetchall()))
+    return counts[0], counts[1]
+
+
+def _first_level(cursor, container_id: int, path_key: str, depth: int,
+                 after: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of a folder's children: subfolders by name, then files by name.
+    The cursor is "folder:<name>" or "file:<name>" of the last entry returned."""
+    after_kind, _, after_name = after.partition(":") if after else (None, "", "")
+    low, high = subtree_bounds(path_key)
+    nodes = []
+    if after_kind != "file":
+        query = ("SELECT FolderId, FolderName, FolderPath FROM DMS_Folders WHERE ContainerId = ?"
+                 " AND PathKey > ? AND PathKey < ? AND Depth = ?")
+        params: tuple = (container_id, low, high, depth + 1)
+        if after_kind == "folder":
+            query += " AND FolderName > ?"
+            params += (after_name,)
+        cursor.execute(f"{query} ORDER BY FolderName LIMIT {int(limit) + 1}", params)
+        nodes.extend(_folder_node(*row) for row in cursor.fetchall())
+    if len(nodes) <= limit:
+        query = ("SELECT FileId, FileName, FilePath, FileSize, FileType FROM DMS_Files WHERE ContainerId = ?"
+                 " AND PathKey = ?")
+        params = (container_id, path_key)
+        if after_kind == "file":
+            query += " AND FileName > ?"
+            params += (after_name,)
+        cursor.execute(f"{query} ORDER BY FileName LIMIT {int(limit) + 1 - len(nodes)}", params)
+        nodes.extend(_file_node(*row) for row in cursor.fetchall())
+
+    next_cursor = None
+    if len(nodes) > limit:
+        nodes = nodes[:limit]
+        next_cursor = f"{nodes[-1]['type']}:{nodes[-1]['name']}"
+    return nodes, next_cursor
+
+
+def browse_tree(cursor, container_id: int, folder_path: str, depth: int,
+                after: Optional[str], limit: int) -> Optional[Dict[str, Any]]:
+    """A folder and its contents depth levels down, read from the DMS tables.
+
+    The folder's own children are paged with after/limit. Each deeper level is one
+    ordered scan of the subtree's rows at that depth, keeping up to limit children per
+    folder; every folder reports its subfolder and file counts so a client can expand
+    it, or page through it with its path as folder, later.
+    """
+    folder_path = folder_path.strip("/")
+    if folder_path:
+        cursor.execute(
+            "SELECT FolderId FROM DMS_Folders WHERE ContainerId = ? AND FolderPath = ?", (container_id, folder_path)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        folder_id = row[0]
+    else:
+        folder_id = None
+    path_key, base, _ = folder_key(cursor, container_id, folder_id)
+    low, high = subtree_bounds(path_key)
+
+    root = _folder_node(folder_id, folder_path.rpartition("/")[2], folder_path)
+    folders, files = _level_counts(cursor, container_id, low, high, base + 1)
+    root["folder_count"], root["file_count"] = folders.get(folder_id, 0), files.get(folder_id, 0)
+    root["children"], root["next_cursor"] = _first_level(cursor, container_id, path_key, base, after, limit)
+
+    level = {node["id"]: node for node in root["children"] if node["type"] == "folder"}
+    level_depth = base + 1
+    for offset in range(2, depth + 1):
+        if not level:
+            break
+        level_depth = base + offset
+        children = defaultdict(list)
+        counts = defaultdict(lambda: [0, 0])
+        for query, make_node, kind in (
+            ("SELECT ParentFolderId, FolderId, FolderName, FolderPath FROM DMS_Folders WHERE ContainerId = ?"
+             " AND PathKey >= ? AND PathKey < ? AND Depth = ? ORDER BY ParentFolderId, FolderName", _folder_node, 0),
+            ("SELECT FolderId, FileId, FileName, FilePath, FileSize, FileType FROM DMS_Files WHERE ContainerId = ?"
+             " AND PathKey >= ? AND PathKey < ? AND Depth = ? ORDER BY FolderId, FileName", _file_node, 1)
+        ):
+            cursor.execute(query, (container_id, low, high, level_depth))
+            while True:
+                rows = cursor.fetchmany(10000)
+                if not rows:
+                    break
+                for parent_id, *row in rows:
+                    # Rows under folders cut off by an earlier level's limit are only counted
+                    counts[parent_id][kind] += 1
+                    if parent_id in level and len(children[parent_id]) < limit:
+                        children[parent_id].append(make_node(*row))
+        for folder_id, node in level.items():
+            node["folder_count"], node["file_count"] = counts[folder_id]
+            node["children"] = children[folder_id]
+        level = {node["id"]: node for nodes in children.values() for node in nodes if node["type"] == "folder"}
+
+    # The deepest folders returned aren't expanded, only counted
+    if level:
+        folders, files = _level_counts(cursor, container_id, low, high, level_depth + 1)
+        for folder_id, node in level.items():
+            node["folder_count"], node["file_count"] = folders.get(folder_id, 0), files.get(folder_id, 0)
+    return root
@@ -0,0 +1,104 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+# Timeouts and per-host limits for every outbound HTTP call
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+GITHUB_MAX_PER_HOST = int(os.getenv("GITHUB_HTTP_MAX_PER_HOST", "20"))
+MAAS_MAX_PER_HOST = int(os.getenv("MAAS_HTTP_MAX_PER_HOST", "10"))
+SYNC_POOL_SIZE = int(os.getenv("HTTP_SYNC_POOL_SIZE", "20"))
+
+# (connect, read) timeout for calls made through sync_session
+SYNC_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+# Keep-alive session for blocking callers (token endpoints, destination service, sync GitHub listings)
+sync_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=SYNC_POOL_SIZE, pool_maxsize=SYNC_POOL_SIZE)
+sync_session.mount("https://", _adapter)
+sync_session.mount("http://", _adapter)
+
+_app_loop: Optional[asyncio.AbstractEventLoop] = None
+_github: Optional[aiohttp.ClientSession] = None
+_maas: Optional[aiohttp.ClientSession] = None
+
+
+def _timeout() -> aiohttp.ClientTimeout:
+    return aiohttp.ClientTimeout(sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT)
+
+
+def _new_github_session() -> aiohttp.ClientSession:
+    return aiohttp.ClientSession(
+        timeout=_timeout(),
+        connector=aiohttp.TCPConnector(
+            limit_per_host=GITHUB_MAX_PER_HOST, keepalive_timeout=KEEPALIVE_TIMEOUT, ttl_dns_cache=300
+        )
+    )
+
+
+def _new_maas_session() -> aiohttp.ClientSession:
+    return aiohttp.ClientSession(
+        timeout=_timeout(),
+        # MAAS calls have always skipped certificate verification (verify=False)
+        connector=aiohttp.TCPConnector(
+            limit_per_host=MAAS_MAX_PER_HOST, keepalive_timeout=KEEPALIVE_TIMEOUT, ttl_dns_cache=300, ssl=False
+        )
+    )
+
+
+async def open_http_pools() -> None:
+    """Create the long-lived GitHub and MAAS sessions on the app's event loop"""
+    global _app_loop, _github, _maas
+    _app_loop = asyncio.get_running_loop()
+    _github = _new_github_session()
+    _maas = _new_maas_session()
+
+
+async def close_http_pools() -> None:
+    global _app_loop, _github, _maas
+    for session in (_github, _maas):
+        if session is not None and not session.closed:
+            await session.close()
+    _app_loop = _github = _maas = None
+    sync_session.close()
+
+
+def _on_app_loop(session: Optional[aiohttp.ClientSession]) -> bool:
+    if session is None or session.closed:
+        return False
+    try:
+        return asyncio.get_running_loop() is _app_loop
+    except RuntimeError:
+        return False
+
+
+@asynccontextmanager
+async def github_session():
+    """The shared GitHub session on the app loop; a short-lived one elsewhere (scripts, other loops)"""
+    if _on_app_loop(_github):
+        yield _github
+    else:
+        async with _new_github_session() as session:
+            yield session
+
+
+@asynccontextmanager
+async def maas_session():
+    if _on_app_loop(_maas):
+        yield _maas
+    else:
+        async with _new_maas_session() as session:
+            yield session
+
+
+def run_async(coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+    """Run a coroutine from a worker thread on the app loop, so it can use the shared sessions"""
+    if _app_loop is not None and _app_loop.is_running():
+        return asyncio.run_coroutine_threadsafe(coro_factory(), _app_loop).result()
+    return asyncio.run(coro_factory())
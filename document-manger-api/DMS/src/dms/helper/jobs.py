@@ -0,0 +1,157 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Callable, List
+
+from ..exceptions import JobCancelledError
+
+logger = logging.getLogger(__name__)
+
+
+class SyncJob:
+    """State and progress counters of one background sync"""
+
+    def __init__(self, kind: str, description: str = ""):
+        self.job_id = str(uuid.uuid4())
+        self.kind = kind
+        self.description = description
+        self.state = "queued"
+        self.items_fetched = 0
+        self.rows_written = 0
+        self.errors: List[str] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.created_at = datetime.now(timezone.utc)
+        self._started = None
+        self._finished = None
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+
+    def add_fetched(self, count: int = 1) -> None:
+        with self._lock:
+            self.items_fetched += count
+
+    def add_written(self, count: int = 1) -> None:
+        with self._lock:
+            self.rows_written += count
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        """Called by integrations between units of work so a cancel takes effect promptly"""
+        if self._cancel_event.is_set():
+            raise JobCancelledError(f"Job {self.job_id} was cancelled")
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("succeeded", "failed", "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self._started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished or time.monotonic()) - self._started
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "kind": self.kind,
+                "description": self.description,
+                "state": self.state,
+                "items_fetched": self.items_fetched,
+                "rows_written": self.rows_written,
+                "elapsed_seconds": round(elapsed, 3),
+                "errors": list(self.errors),
+                "result": self.result,
+                "created_at": self.created_at.isoformat()
+            }
+
+
+class JobManager:
+    """Runs sync jobs on a bounded worker pool and keeps the most recent ones for status queries"""
+
+    def __init__(self, max_workers: int = 4, max_queued: int = 100, max_kept: int = 500):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_kept = max_kept
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dms-sync")
+        self._jobs: "OrderedDict[str, SyncJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, description: str = "") -> Optional[SyncJob]:
+        """Queue fn(job, *args); returns None when max_queued jobs are already waiting"""
+        job = SyncJob(kind, description)
+        with self._lock:
+            queued = sum(1 for j in self._jobs.values() if j.state == "queued")
+            if queued >= self.max_queued:
+                return None
+            self._jobs[job.job_id] = job
+            self._evict()
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def _evict(self) -> None:
+        # Only finished jobs are dropped, oldest first
+        excess = len(self._jobs) - self.max_kept
+        for job_id in [j.job_id for j in self._jobs.values() if j.finished][:max(excess, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: SyncJob, fn: Callable[..., Any], args) -> None:
+        if job.cancel_requested:
+            job.state = "cancelled"
+            return
+        job.state = "running"
+        job._started = time.monotonic()
+        try:
+            result = fn(job, *args)
+            job.result = result
+            # Integrations report failures as {"status": "error"} rather than raising
+            if isinstance(result, dict) and result.get("status") == "error":
+                job.errors.append(result.get("message", "unknown error"))
+                job.state = "cancelled" if job.cancel_requested else "failed"
+            else:
+                job.state = "succeeded"
+        except JobCancelledError:
+            job.state = "cancelled"
+        except Exception as e:
+            logger.error("Sync job %s failed: %s", job.job_id, str(e), exc_info=True)
+            job.errors.append(str(e))
+            job.state = "cancelled" if job.cancel_requested else "failed"
+        finally:
+            job._finished = time.monotonic()
+
+    def get(self, job_id: str) -> Optional[SyncJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[SyncJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[SyncJob]:
+        job = self.get(job_id)
+        if job and not job.finished:
+            job.cancel()
+            if job.state == "queued":
+                job.state = "cancelled"
+        return job
+
+    def shutdown(self) -> None:
+        for job in self.list():
+            if not job.finished:
+                job.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+job_manager = JobManager(
+    max_workers=int(os.getenv("DMS_SYNC_WORKERS", "4")),
+    max_queued=int(os.getenv("DMS_SYNC_MAX_QUEUED", "100"))
+)
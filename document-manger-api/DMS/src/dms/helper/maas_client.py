@@ -0,0 +1,21 @@
+import os
+from typing import Dict, Any, Optional, Tuple
+
+from .http_pools import maas_session
+
+MAAS_BASE_URL = os.getenv("MAAS_BASE_URL", "https://maas.cfapps.eu10-004.hana.ondemand.com")
+
+
+async def post_model(model: str, payload: Dict[str, Any], access_token: str) -> Tuple[int, Optional[str], Any]:
+    """POST a record to a MAAS model; returns (status, content type, parsed JSON or text body)"""
+    headers = {
+        "Content-Type": "application/json",
+        "accept": "application/json",
+        "Authorization": f"Bearer {access_token}"
+    }
+    async with maas_session() as session:
+        async with session.post(f"{MAAS_BASE_URL}/models/{model}", headers=headers, json=payload) as response:
+            content_type = response.headers.get("Content-Type")
+            if content_type == "application/json":
+                return response.status, content_type, await response.json()
+            return response.status, content_type, await response.text()
@@ -0,0 +1,60 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Any, Optional, List, Tuple
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def parse_fields(fields: Optional[str], allowed: Dict[str, str]) -> List[str]:
+    """Map a comma separated fields= value onto SQL column expressions, in the order allowed lists them"""
+    if not fields:
+        return list(allowed.values())
+    requested = {name.strip().lower() for name in fields.split(",") if name.strip()}
+    unknown = requested - {name.lower() for name in allowed}
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}")
+    return [expr for name, expr in allowed.items() if name.lower() in requested]
+
+
+def keyset_query(select_from: str, columns: List[str], key_column: str,
+                 after: Optional[int], limit: int, params: tuple = ()) -> Tuple[str, tuple, bool]:
+    """SELECT ordered by key_column starting after the cursor; reads one extra row to detect a next page.
+
+    params binds any placeholders in select_from. Returns (query, params, key_added); key_added means key_column was appended to the
+    projection only to compute the next cursor and should be dropped from the output.
+    """
+    key_added = key_column not in columns
+    select_columns = columns + [key_column] if key_added else columns
+    query = f"SELECT {', '.join(select_columns)} {select_from}"
+    if after is not None:
+        query += f" {'AND' if ' WHERE ' in select_from.upper() else 'WHERE'} {key_column} > ?"
+        params += (after,)
+    query += f" ORDER BY {key_column} LIMIT {int(limit) + 1}"
+    return query, params, key_added
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def fetch_page(cursor, select_from: str, columns: List[str], key_column: str,
+               after: Optional[int], limit: int, params: tuple = ()) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """One page of rows as JSON-ready dicts, plus the cursor for the next page (None on the last one)"""
+    query, params, key_added = keyset_query(select_from, columns, key_column, after, limit, params)
+    cursor.execute(query, params)
+    names = [desc[0] for desc in cursor.description]
+    rows = cursor.fetchmany(limit + 1)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1][-1] if key_added else rows[-1][columns.index(key_column)]
+    if key_added:
+        names = names[:-1]
+    width = len(names)
+    return [{name: _json_value(value) for name, value in zip(names, row[:width])} for row in rows], next_cursor
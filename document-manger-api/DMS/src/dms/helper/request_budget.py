@@ -0,0 +1,235 @@
+import os
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+# Defaults for every access token; GitHub allows 5000 authenticated requests per hour
+TOKEN_MAX_CONCURRENCY = int(os.getenv("GITHUB_TOKEN_MAX_CONCURRENCY", "4"))
+TOKEN_REQUEST_BUDGET = int(os.getenv("GITHUB_TOKEN_REQUEST_BUDGET", "5000"))
+TOKEN_BUDGET_WINDOW = float(os.getenv("GITHUB_TOKEN_BUDGET_WINDOW", "3600"))
+
+# Once GitHub reports less than this share of the limit left, requests are spread evenly until the reset
+PACE_BELOW_FRACTION = float(os.getenv("GITHUB_RATE_LIMIT_PACE_BELOW", "0.25"))
+MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "5"))
+BACKOFF_BASE = float(os.getenv("GITHUB_BACKOFF_BASE", "1"))
+BACKOFF_MAX = float(os.getenv("GITHUB_BACKOFF_MAX", "60"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# GitHub asks clients to wait at least a minute after a secondary rate limit without Retry-After
+SECONDARY_LIMIT_WAIT = 60.0
+
+
+class RequestBudget:
+    """Concurrency slots and a request token bucket shared by everything using one access token.
+
+    The bucket holds up to requests_per_window requests and refills evenly over the window,
+    so a burst can use the saved-up budget and a long run is paced to the sustained rate.
+
+    GitHub's own view overrides the estimate: observe() reads X-RateLimit-Remaining/Reset and
+    Retry-After from every response. When little of the limit is left, the remaining requests
+    are spread evenly until the reset; an exhausted limit or Retry-After holds every request
+    using the token until then.
+    """
+
+    def __init__(self, max_concurrency: int = TOKEN_MAX_CONCURRENCY,
+                 requests_per_window: int = TOKEN_REQUEST_BUDGET,
+                 window_seconds: float = TOKEN_BUDGET_WINDOW):
+        if max_concurrency < 1 or requests_per_window < 1 or window_seconds <= 0:
+            raise ValueError("A request budget needs at least one concurrency slot and one request per window")
+        self.max_concurrency = max_concurrency
+        self.capacity = requests_per_window
+        self.window_seconds = window_seconds
+        self._tokens = float(requests_per_window)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.running = 0
+        self.requests = 0
+        self.waited_seconds = 0.0
+        self.retries = 0
+        # Server-reported state; wall-clock times, since X-RateLimit-Reset is an epoch timestamp
+        self._limit: Optional[int] = None
+        self._remaining: Optional[int] = None
+        self._reset_at = 0.0
+        self._blocked_until = 0.0
+        self._next_paced = 0.0
+
+    def has_slot(self) -> bool:
+        return self.running < self.max_concurrency
+
+    def try_start(self) -> bool:
+        """Take a concurrency slot for one sync, if one is free"""
+        with self._lock:
+            if self.running >= self.max_concurrency:
+                return False
+            self.running += 1
+            return True
+
+    def finish(self) -> None:
+        with self._lock:
+            self.running -= 1
+
+    def reserve(self) -> float:
+        """Take one request from the bucket; returns how long the caller must wait before sending it"""
+        with self._lock:
+            now = time.monotonic()
+            rate = self.capacity / self.window_seconds
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            self._tokens -= 1
+            self.requests += 1
+            delay = -self._tokens / rate if self._tokens < 0 else 0.0
+
+            wall = time.time()
+            if self._blocked_until > wall:
+                delay = max(delay, self._blocked_until - wall)
+            elif self._paced(wall):
+                interval = (self._reset_at - wall) / max(self._remaining, 1)
+                self._next_paced = max(self._next_paced, wall) + interval
+                delay = max(delay, self._next_paced - interval - wall)
+            if self._remaining is not None:
+                # Count requests in flight until their responses report the real figure
+                self._remaining -= 1
+            self.waited_seconds += delay
+            return delay
+
+    def _paced(self, wall: float) -> bool:
+        if self._remaining is None or not self._limit or self._reset_at <= wall:
+            return False
+        return self._remaining < self._limit * PACE_BELOW_FRACTION
+
+    def observe(self, status: int, headers) -> None:
+        """Update the server-reported budget from a GitHub response's headers"""
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        limit = headers.get("X-RateLimit-Limit")
+        retry_after = headers.get("Retry-After")
+        with self._lock:
+            if remaining is not None and reset is not None:
+                self._remaining = int(remaining)
+                self._reset_at = float(reset)
+                self._limit = int(limit) if limit is not None else self._limit
+            if retry_after is not None and status in (403, 429):
+                self._blocked_until = max(self._blocked_until, time.time() + float(retry_after))
+            elif remaining == "0" and reset is not None:
+                self._blocked_until = max(self._blocked_until, float(reset))
+
+    def retry_delay(self, attempt: int, status: Optional[int] = None, headers=None,
+                    text: str = "") -> Optional[float]:
+        """Backoff before retrying a failed request, or None when it should fail as is.
+
+        status None means the request never got a response (connection error, timeout).
+        403 is only retried when it is a rate limit; other 403s won't succeed on retry.
+        """
+        if attempt >= MAX_RETRIES:
+            return None
+        if status is not None and status not in RETRY_STATUSES:
+            headers = headers or {}
+            rate_limited = status == 403 and (
+                "Retry-After" in headers or headers.get("X-RateLimit-Remaining") == "0"
+                or "rate limit" in text.lower()
+            )
+            if not rate_limited:
+                return None
+            if "Retry-After" not in headers and headers.get("X-RateLimit-Remaining") != "0":
+                with self._lock:
+                    self._blocked_until = max(self._blocked_until, time.time() + SECONDARY_LIMIT_WAIT)
+        with self._lock:
+            self.retries += 1
+        # Full jitter, so retries from concurrent walkers don't arrive together;
+        # reserve() adds any server-imposed wait on top when the request is resent
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self.running,
+                "max_concurrency": self.max_concurrency,
+                "requests": self.requests,
+                "requests_per_window": self.capacity,
+                "window_seconds": self.window_seconds,
+                "available": max(int(self._tokens), 0),
+                "waited_seconds": round(self.waited_seconds, 3),
+                "retries": self.retries,
+                "github_remaining": self._remaining,
+                "github_limit": self._limit,
+                "github_reset_at": self._reset_at or None,
+                "blocked_seconds": round(max(self._blocked_until - time.time(), 0.0), 3)
+            }
+
+
+class BatchBudget(RequestBudget):
+    """Tighter limits for one batch job on top of the process-wide budget of its token.
+
+    A batch can only narrow what the token allows: a sync needs a free slot in both, and a
+    request waits for both buckets. GitHub's rate-limit state is kept on the shared budget,
+    so every other sync using the token sees it. The limits end with the batch.
+    """
+
+    def __init__(self, shared: RequestBudget, max_concurrency: Optional[int] = None,
+                 requests_per_window: Optional[int] = None):
+        super().__init__(shared.max_concurrency if max_concurrency is None else max_concurrency,
+                         shared.capacity if requests_per_window is None else requests_per_window,
+                         shared.window_seconds)
+        self.shared = shared
+
+    def has_slot(self) -> bool:
+        return super().has_slot() and self.shared.has_slot()
+
+    def try_start(self) -> bool:
+        if not super().try_start():
+            return False
+        if self.shared.try_start():
+            return True
+        super().finish()
+        return False
+
+    def finish(self) -> None:
+        super().finish()
+        self.shared.finish()
+
+    def reserve(self) -> float:
+        return max(super().reserve(), self.shared.reserve())
+
+    def observe(self, status: int, headers) -> None:
+        self.shared.observe(status, headers)
+
+    def retry_delay(self, attempt: int, status: Optional[int] = None, headers=None,
+                    text: str = "") -> Optional[float]:
+        return self.shared.retry_delay(attempt, status, headers, text)
+
+
+_budgets: Dict[str, RequestBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def token_key(token: Optional[str]) -> str:
+    """Stable, non-reversible name for an access token, safe to log and return from the API"""
+    return hashlib.sha256((token or "").encode("utf-8")).hexdigest()[:12]
+
+
+def get_budget(token: Optional[str]) -> RequestBudget:
+    """The process-wide budget of an access token, created with the env defaults on first use"""
+    key = token_key(token)
+    with _budgets_lock:
+        budget = _budgets.get(key)
+        if budget is None:
+            budget = _budgets[key] = RequestBudget()
+        return budget
+
+
+def budget_stats() -> Dict[str, Dict[str, Any]]:
+    with _budgets_lock:
+        budgets = dict(_budgets)
+    return {key: budget.stats() for key, budget in budgets.items()}
@@ -0,0 +1,282 @@
+import os
+import time
+import heapq
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Iterable, Callable, Tuple
+
+FOLDER = 0
+FILE = 1
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def extension(name: str) -> Optional[str]:
+    return name.rsplit(".", 1)[1] if "." in name else None
+
+
+def _contains(postings: array, slot: int) -> bool:
+    position = bisect_left(postings, slot)
+    return position < len(postings) and postings[position] == slot
+
+
+class PathSearchIndex:
+    """In-memory name/path index of one container's folders and files.
+
+    Lowercased names are indexed by trigram and by their first one and two characters,
+    files by extension and every entry by its parent folder path; posting lists are arrays
+    of entry slots in insertion order, so they stay sorted and intersect with bisect.
+    Substring and prefix queries only verify the intersection of their postings, except
+    substrings shorter than three characters, which scan until the limit is met (the API
+    doesn't accept those). Deleted rows are tombstoned by ID rather than removed from the
+    postings.
+    """
+
+    def __init__(self):
+        self.ids = array("q")
+        self.kinds = bytearray()
+        self.paths: List[str] = []
+        self.names: List[str] = []
+        self._trigrams: Dict[str, array] = {}
+        self._extensions: Dict[str, array] = {}
+        # Slots by the first one and two characters of the name, for short prefixes
+        self._prefixes: Dict[str, array] = {}
+        # Slots by parent folder path, for searches scoped to a folder
+        self._parents: Dict[str, array] = {}
+        self._parent_keys: Optional[List[str]] = None
+        self._folders = array("l")
+        self._removed = {FOLDER: set(), FILE: set()}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, kind: int, entry_id: int, path: str) -> None:
+        self.add_many(kind, ((entry_id, path),))
+
+    def add_many(self, kind: int, rows: Iterable[Tuple[int, str]]) -> None:
+        """(id, path) rows"""
+        with self._lock:
+            ids, paths, names, grams, parents = self.ids, self.paths, self.names, self._trigrams, self._parents
+            for entry_id, path in rows:
+                slot = len(ids)
+                parent, _, name = path.rpartition("/")
+                name = name.lower()
+                ids.append(entry_id)
+                paths.append(path)
+                names.append(name)
+                for i in range(len(name) - 2):
+                    postings = grams.get(name[i:i + 3])
+                    if postings is None:
+                        postings = grams[name[i:i + 3]] = array("l")
+                    # A name repeating a trigram appends its slot only once
+                    if not postings or postings[-1] != slot:
+                        postings.append(slot)
+                for short in {name[:1], name[:2]}:
+                    if short:
+                        self._prefixes.setdefault(short, array("l")).append(slot)
+                postings = parents.get(parent)
+                if postings is None:
+                    postings = parents[parent] = array("l")
+                    self._parent_keys = None
+                postings.append(slot)
+                if kind == FOLDER:
+                    self._folders.append(slot)
+                if kind == FILE and "." in name:
+                    self._extensions.setdefault(name.rsplit(".", 1)[1], array("l")).append(slot)
+            self.kinds.extend(bytes([kind]) * (len(ids) - len(self.kinds)))
+
+    def remove_many(self, kind: int, entry_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._removed[kind].update(entry_ids)
+
+    def _under(self, folder: str) -> List[array]:
+        """Posting lists of everything below folder"""
+        if self._parent_keys is None:
+            self._parent_keys = sorted(self._parents)
+        keys = self._parent_keys
+        # Paths below folder/ sort between "folder/" and "folder0" ("0" follows "/")
+        below = keys[bisect_left(keys, f"{folder}/"):bisect_left(keys, f"{folder}0")]
+        lists = [self._parents[key] for key in below]
+        if folder in self._parents:
+            lists.append(self._parents[folder])
+        return lists
+
+    def _candidates(self, query: Optional[str], prefix: Optional[str], ext: Optional[str],
+                    folder: Optional[str], kind: Optional[int]) -> Iterable[int]:
+        lists = []
+        grams = set()
+        for text in (query, prefix):
+            if text and len(text) >= 3:
+                grams |= trigrams(text)
+        for gram in grams:
+            postings = self._trigrams.get(gram)
+            if postings is None:
+                return ()
+            lists.append(postings)
+        if prefix and len(prefix) < 3:
+            postings = self._prefixes.get(prefix)
+            if postings is None:
+                return ()
+            lists.append(postings)
+        if ext:
+            postings = self._extensions.get(ext)
+            if postings is None:
+                return ()
+            lists.append(postings)
+        if kind == FOLDER:
+            lists.append(self._folders)
+        lists.sort(key=len)
+
+        if folder:
+            # The folder's entries drive the scan when they are fewer than any other list;
+            # otherwise search() checks the path of each candidate
+            under = self._under(folder)
+            if not lists or sum(map(len, under)) < len(lists[0]):
+                return (slot for slot in heapq.merge(*under)
+                        if all(_contains(postings, slot) for postings in lists))
+        if not lists:
+            return range(len(self.ids))
+        # Walk the shortest list, probing the others
+        shortest, others = lists[0], lists[1:]
+        return (slot for slot in shortest if all(_contains(postings, slot) for postings in others))
+
+    def search(self, query: Optional[str] = None, prefix: Optional[str] = None, ext: Optional[str] = None,
+               path: Optional[str] = None, kind: Optional[int] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Entries whose name contains query, starts with prefix and has extension ext,
+        under folder path; all conditions optional and combined with AND"""
+        query = query.lower() if query else None
+        prefix = prefix.lower() if prefix else None
+        ext = ext.lower().lstrip(".") if ext else None
+        folder = path.strip("/") if path else None
+        below = f"{folder}/" if folder else None
+
+        results = []
+        with self._lock:
+            for slot in self._candidates(query, prefix, ext, folder, kind):
+                kind_at = self.kinds[slot]
+                name = self.names[slot]
+                if kind is not None and kind_at != kind:
+                    continue
+                if query and query not in name:
+                    continue
+                if prefix and not name.startswith(prefix):
+                    continue
+                if ext and extension(name) != ext:
+                    continue
+                if below and not self.paths[slot].startswith(below):
+                    continue
+                if self.ids[slot] in self._removed[kind_at]:
+                    continue
+                results.append({
+                    "type": "folder" if kind_at == FOLDER else "file",
+                    "id": self.ids[slot],
+                    "name": self.paths[slot].rpartition("/")[2],
+                    "path": self.paths[slot]
+                })
+                if len(results) >= limit:
+                    break
+        return results
+
+
+class SearchIndexRegistry:
+    """Indexes of the most recently searched containers.
+
+    An index is built from the DMS tables on the first search of a container. After
+    that, writers publish the rows they added and deleted once their transaction has
+    committed, so it stays current without rebuilding and never sees rolled-back rows.
+    A build that overlaps a publish read the tables before that commit, so its result
+    is used for the search that asked for it but not kept.
+    """
+
+    def __init__(self, max_containers: int = 8):
+        self.max_containers = max_containers
+        self._indexes: "OrderedDict[int, PathSearchIndex]" = OrderedDict()
+        self._building: Dict[int, threading.Lock] = {}
+        # Containers being loaded, and those whose load a commit has made stale
+        self._loading: set = set()
+        self._stale: set = set()
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.build_seconds = 0.0
+
+    def loaded(self, container_id: int) -> Optional[PathSearchIndex]:
+        """The container's index if one is in memory; writers only maintain existing indexes"""
+        with self._lock:
+            return self._indexes.get(container_id)
+
+    def get(self, container_id: int,
+            load: Optional[Callable[[PathSearchIndex], None]] = None) -> Optional[PathSearchIndex]:
+        """The container's index, marked most recently used; built with load(index) if it
+        isn't in memory yet, or None when no load is given"""
+        with self._lock:
+            index = self._indexes.get(container_id)
+            if index is not None:
+                self._indexes.move_to_end(container_id)
+                return index
+            if load is None:
+                return None
+            build_lock = self._building.setdefault(container_id, threading.Lock())
+        # One build per container; concurrent searches wait for it
+        with build_lock:
+            index = self.loaded(container_id)
+            if index is not None:
+                return index
+            started = time.monotonic()
+            index = PathSearchIndex()
+            with self._lock:
+                self._loading.add(container_id)
+                self._stale.discard(container_id)
+            try:
+                load(index)
+            finally:
+                with self._lock:
+                    self._loading.discard(container_id)
+            with self._lock:
+                if container_id in self._stale:
+                    self._stale.discard(container_id)
+                    self._building.pop(container_id, None)
+                    return index
+                self._indexes[container_id] = index
+                while len(self._indexes) > self.max_containers:
+                    self._indexes.popitem(last=False)
+                self._building.pop(container_id, None)
+                self.builds += 1
+                self.build_seconds += time.monotonic() - started
+            return index
+
+    def invalidate(self, container_id: int) -> None:
+        with self._lock:
+            self._indexes.pop(container_id, None)
+            if container_id in self._loading:
+                self._stale.add(container_id)
+
+    def publish(self, container_id: int, changes: List[Tuple[bool, int, list]]) -> None:
+        """Apply committed (added, kind, rows) changes: (id, path) rows when added, IDs when removed"""
+        with self._lock:
+            if container_id in self._loading:
+                self._stale.add(container_id)
+            index = self._indexes.get(container_id)
+        if index is None:
+            return
+        for added, kind, rows in changes:
+            if added:
+                index.add_many(kind, rows)
+            else:
+                index.remove_many(kind, rows)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "containers": {container_id: len(index) for container_id, index in self._indexes.items()},
+                "max_containers": self.max_containers,
+                "builds": self.builds,
+                "build_seconds": round(self.build_seconds, 3)
+            }
+
+
+search_indexes = SearchIndexRegistry(max_containers=int(os.getenv("DMS_SEARCH_INDEX_MAX_CONTAINERS", "8")))
@@ -1,12 +1,16 @@
+import asyncio
+
 from ..appconfig import get_config_instance
+from .token_cache import ExpiringTokenCache
+from .http_pools import sync_session, SYNC_TIMEOUT
 from requests.auth import HTTPBasicAuth
 
 config = get_config_instance()
 
-def get_access_token():    
+def _fetch_access_token():
     token_url = config.TOKEN_URL
     client_id = config.CLIENT_ID
-    client_secret = config.CLIENT_SECRET    
+    client_secret = config.CLIENT_SECRET
     auth = HTTPBasicAuth(client_id, client_secret)
     payload = {
         'grant_type': 'client_credentials'
@@ -14,6 +18,21 @@ def get_access_token():
     headers = {
         'Content-Type': 'application/x-www-form-urlencoded'
     }
-    response = requests.post(token_url, auth=auth, data=payload, headers=headers)
-    response_data = response.json()   
-    return response_data['access_token']
\ No newline at end of file
+    response = sync_session.post(token_url, auth=auth, data=payload, headers=headers, timeout=SYNC_TIMEOUT)
+    if response.status_code != 200:
+        raise ValueError(f"Failed to retrieve access token: Status {response.status_code} - {response.text}")
+    response_data = response.json()
+    return response_data['access_token'], response_data.get('expires_in')
+
+_token_cache = ExpiringTokenCache(_fetch_access_token)
+
+def get_access_token():
+    """Cached client-credentials token, refreshed shortly before it expires"""
+    return _token_cache.get()
+
+async def get_access_token_async():
+    """get_access_token for async handlers; a refresh runs in a worker thread instead of on the event loop"""
+    token = _token_cache.peek()
+    if token:
+        return token
+    return await asyncio.get_running_loop().run_in_executor(None, _token_cache.get)
@@ -0,0 +1,45 @@
+import time
+import threading
+from typing import Callable, Optional, Tuple
+
+
+class ExpiringTokenCache:
+    """Caches one access token until shortly before it expires.
+
+    fetch returns (token, expires_in seconds). Concurrent callers that find the token
+    missing or stale wait on the same lock, so only one of them performs the refresh.
+    """
+
+    def __init__(self, fetch: Callable[[], Tuple[str, Optional[int]]],
+                 refresh_margin: float = 60.0, default_ttl: float = 3600.0):
+        self._fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_valid(self) -> bool:
+        return self._token is not None and time.monotonic() < self._expires_at
+
+    def peek(self) -> Optional[str]:
+        """The cached token if it is still valid, without ever refreshing"""
+        return self._token if self._is_valid() else None
+
+    def get(self) -> str:
+        if self._is_valid():
+            return self._token
+        with self._lock:
+            # Another caller may have refreshed while we waited for the lock
+            if not self._is_valid():
+                token, expires_in = self._fetch()
+                ttl = float(expires_in) if expires_in else self.default_ttl
+                # Never cache for less than half the lifetime, even for very short-lived tokens
+                self._expires_at = time.monotonic() + max(ttl - self.refresh_margin, ttl / 2)
+                self._token = token
+            return self._token
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
@@ -0,0 +1,90 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Bounded in-process cache; entries expire after ttl seconds and the least recently used go first.
+
+    Keys are tuples whose first element is a namespace, so writers can invalidate
+    everything derived from one table at once. Every invalidation moves the namespace's
+    generation on; a reader takes generation() before querying and passes it to set(),
+    which drops the value if a write was invalidated in between.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generations: Dict[Hashable, int] = {}
+        # Bumped by invalidate() without namespaces, which covers every namespace
+        self._cleared = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Tuple[Hashable, ...]) -> Tuple[bool, Any]:
+        """(True, value) on a fresh hit, (False, None) otherwise"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def generation(self, namespace: Hashable) -> int:
+        with self._lock:
+            return self._cleared + self._generations.get(namespace, 0)
+
+    def set(self, key: Tuple[Hashable, ...], value: Any, generation: Optional[int] = None) -> None:
+        """Store value; with generation, only if key's namespace hasn't been invalidated since"""
+        with self._lock:
+            if generation is not None and generation != self._cleared + self._generations.get(key[0], 0):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *namespaces: str) -> None:
+        """Drop every entry in the given namespaces, or everything when none are given"""
+        with self._lock:
+            if not namespaces:
+                self._entries.clear()
+                self._cleared += 1
+            else:
+                for key in [key for key in self._entries if key[0] in namespaces]:
+                    del self._entries[key]
+                for namespace in namespaces:
+                    self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+
+# Shared by the integration/container list endpoints and invalidated by every writer of those tables
+listing_cache = TTLCache(
+    max_size=int(os.getenv("DMS_LIST_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("DMS_LIST_CACHE_TTL", "30"))
+)
@@ -1,10 +1,160 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, Callable, AsyncIterator
+import os
+
+from ..helper.search_index import search_indexes, FOLDER, FILE
+from ..helper.folder_tree import ROOT_KEY, backfill_path_keys, child_key, folder_key
+from ..helper.http_pools import run_async
+from .ingest_pipeline import IngestPipeline, SourceEntry, INGEST_QUEUE_SIZE
+
+
+class DMSBatchWriter:
+    """Buffers DMS_Folders/DMS_Files rows and writes them with executemany.
+
+    Folder and file IDs are reserved from the sequences in blocks, so a folder ID is
+    known as soon as the folder is added and its children can reference it without
+    a round trip to the database. The same goes for the materialized PathKey/Depth of
+    each row, derived from the parent's key kept in memory.
+    """
+
+    FOLDER_SEQUENCE = "DMS_Folders_Seq"
+    FILE_SEQUENCE = "DMS_Files_Seq"
+    # Pending search index rows kept per transaction before falling back to invalidation
+    INDEX_CHANGE_LIMIT = 200000
+
+    def __init__(self, cursor, container_id: int, created_by: str,
+                 batch_size: int = 1000, id_block_size: int = 1000,
+                 on_flush: Optional[Callable[[int], None]] = None):
+        self.cursor = cursor
+        # Called with the number of rows after every executemany, e.g. for job progress
+        self.on_flush = on_flush
+        self.container_id = container_id
+        self.created_by = created_by
+        self.batch_size = batch_size
+        self.id_block_size = id_block_size
+        self._reserved_ids: Dict[str, List[int]] = {self.FOLDER_SEQUENCE: [], self.FILE_SEQUENCE: []}
+        self._folder_rows: List[Tuple] = []
+        self._file_rows: List[Tuple] = []
+        # (PathKey, Depth) of folders added here or looked up as parents
+        self._folder_keys: Dict[int, Tuple[str, int]] = {}
+        # Search index changes, published only once the transaction commits
+        self._index_changes: List[Tuple[bool, int, list]] = []
+        self._index_rows = 0
+        self.folders_written = 0
+        self.files_written = 0
+
+    def _reserve_ids(self, sequence: str, count: int) -> List[int]:
+        self.cursor.execute(
+            f"SELECT {sequence}.NEXTVAL FROM SERIES_GENERATE_INTEGER(1, 0, {int(count)})"
+        )
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def _next_id(self, sequence: str) -> int:
+        ids = self._reserved_ids[sequence]
+        if not ids:
+            # Reversed so pop() hands IDs out in ascending order
+            ids.extend(reversed(self._reserve_ids(sequence, self.id_block_size)))
+        return ids.pop()
+
+    def _parent_key(self, parent_folder_id: Optional[int]) -> Tuple[str, int]:
+        if parent_folder_id is None:
+            return ROOT_KEY, 0
+        key = self._folder_keys.get(parent_folder_id)
+        if key is None:
+            # An existing folder, e.g. the parent of new rows in an incremental sync
+            found = folder_key(self.cursor, self.container_id, parent_folder_id)
+            if found is not None and found[0] is None:
+                # A container written before PathKey existed; keyed as part of this write
+                backfill_path_keys(self.cursor, self.container_id)
+                found = folder_key(self.cursor, self.container_id, parent_folder_id)
+            if found is None:
+                raise ValueError(f"Parent folder {parent_folder_id} not found in container {self.container_id}")
+            key = self._folder_keys[parent_folder_id] = found[:2]
+        return key
+
+    def add_folder(self, folder_name: str, parent_folder_id: Optional[int], folder_path: str) -> int:
+        folder_id = self._next_id(self.FOLDER_SEQUENCE)
+        parent_key, parent_depth = self._parent_key(parent_folder_id)
+        path_key = child_key(parent_key, folder_id)
+        self._folder_keys[folder_id] = (path_key, parent_depth + 1)
+        self._folder_rows.append(
+            (folder_id, folder_name, self.container_id, parent_folder_id, folder_path,
+             path_key, parent_depth + 1, self.created_by)
+        )
+        if len(self._folder_rows) >= self.batch_size:
+            self.flush_folders()
+        return folder_id
+
+    def add_file(self, folder_id: Optional[int], file_name: str, file_path: str,
+                 file_size: int, file_type: str, file_sha: Optional[str] = None) -> int:
+        file_id = self._next_id(self.FILE_SEQUENCE)
+        path_key, depth = self._parent_key(folder_id)
+        self._file_rows.append(
+            (file_id, file_name, folder_id, self.container_id, file_path, file_size, file_type, file_sha,
+             path_key, depth + 1, self.created_by)
+        )
+        if len(self._file_rows) >= self.batch_size:
+            self.flush()
+        return file_id
+
+    def flush_folders(self) -> None:
+        if not self._folder_rows:
+            return
+        self.cursor.executemany("""
+            INSERT INTO DMS_Folders (FolderId, FolderName, ContainerId, ParentFolderId, FolderPath, PathKey, Depth, CreatedBy, CreatedAt)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, self._folder_rows)
+        self.folders_written += len(self._folder_rows)
+        if self.on_flush:
+            self.on_flush(len(self._folder_rows))
+        self._record_index_change(True, FOLDER, [(row[0], row[4]) for row in self._folder_rows])
+        self._folder_rows = []
+
+    def flush(self) -> None:
+        # Folders go first so every file row's FolderId already exists
+        self.flush_folders()
+        if not self._file_rows:
+            return
+        self.cursor.executemany("""
+            INSERT INTO DMS_Files (FileId, FileName, FolderId, ContainerId, FilePath, FileSize, FileType, FileSha, PathKey, Depth, CreatedBy, CreatedAt)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, self._file_rows)
+        self.files_written += len(self._file_rows)
+        if self.on_flush:
+            self.on_flush(len(self._file_rows))
+        self._record_index_change(True, FILE, [(row[0], row[4]) for row in self._file_rows])
+        self._file_rows = []
+
+    def _record_index_change(self, added: bool, kind: int, rows: list) -> None:
+        if self._index_changes is None:
+            return
+        self._index_rows += len(rows)
+        if self._index_rows > self.INDEX_CHANGE_LIMIT:
+            # Large loads drop the container's index on commit instead of holding every path
+            self._index_changes = None
+            return
+        self._index_changes.append((added, kind, rows))
+
+    def unindex(self, kind: int, entry_ids: List[int]) -> None:
+        """Remove deleted rows from the container's search index once the transaction commits"""
+        self._record_index_change(False, kind, list(entry_ids))
+
+    def commit(self, connection) -> None:
+        """Commit the transaction, then publish this writer's rows to the search index"""
+        connection.commit()
+        if self._index_changes is None:
+            search_indexes.invalidate(self.container_id)
+        elif self._index_changes:
+            search_indexes.publish(self.container_id, self._index_changes)
+        self._index_changes, self._index_rows = [], 0
+
 
 class BaseIntegration(ABC):
     def __init__(self, connection_config: Dict[str, Any], integration_config: Dict[str, Any]):
         self.connection_config = connection_config
         self.integration_config = integration_config
+        # Optional SyncJob that receives progress and can cancel the sync
+        self.job = None
 
     @abstractmethod
     def get_contents(self, path: str = "") -> Any:
@@ -16,28 +166,59 @@ class BaseIntegration(ABC):
         """Setup container and sync data"""
         pass
 
+    @abstractmethod
+    def iter_entries(self, path: str = "") -> AsyncIterator[List[SourceEntry]]:
+        """Async iterator of directory listings below path, for ingest.
+
+        Each listing holds the entries directly inside one directory, with paths relative
+        to the source root. A folder's own entry must be yielded before any listing of its
+        contents. Sources listing one directory per request can pass a fetch function to
+        ingest_pipeline.walk_listings; those able to list a whole tree at once yield it directly.
+        """
+        pass
+
+    def ingest(self, writer: DMSBatchWriter, path: str = "") -> Dict[str, Any]:
+        """Store everything below path through writer, fetching while earlier listings are written.
+        Flushes the writer; the caller commits or rolls back."""
+        pipeline = IngestPipeline(
+            writer, path, file_type=self.get_file_type, job=self.job,
+            queue_size=int(os.getenv("DMS_INGEST_QUEUE_SIZE", str(INGEST_QUEUE_SIZE)))
+        )
+        return run_async(lambda: pipeline.run(self.iter_entries(path)))
+
+    def attach_job(self, job) -> None:
+        self.job = job
+
+    def report_fetched(self, count: int) -> None:
+        """Record fetched items on the attached job, raising if it has been cancelled"""
+        if self.job:
+            self.job.check_cancelled()
+            self.job.add_fetched(count)
+
+    def create_batch_writer(self, cursor, container_id: int, created_by: str) -> DMSBatchWriter:
+        """Batched folder/file writer sized from integration_config or the DMS_WRITE_* env vars"""
+        batch_size = int(self.integration_config.get("batch_size") or os.getenv("DMS_WRITE_BATCH_SIZE", "1000"))
+        id_block_size = int(self.integration_config.get("id_block_size") or os.getenv("DMS_ID_BLOCK_SIZE", "1000"))
+        return DMSBatchWriter(
+            cursor, container_id, created_by, batch_size=batch_size, id_block_size=id_block_size,
+            on_flush=self.job.add_written if self.job else None
+        )
+
+    @staticmethod
+    def get_file_type(file_name: str) -> str:
+        return file_name.split(".")[-1] if "." in file_name else "unknown"
+
     def insert_container(self, cursor, integration_id: int, container_name: str, root_path: str, created_by: str) -> int:
         cursor.execute("""
             INSERT INTO DMS_Containers (ContainerId, ContainerName, IntegrationId, RootPath, CreatedBy, CreatedAt)
             VALUES (NEXT VALUE FOR DMS_Containers_Seq, ?, ?, ?, ?, CURRENT_TIMESTAMP)
         """, (container_name, integration_id, root_path, created_by))
-        
-        cursor.execute("SELECT CURRENT_IDENTITY_VALUE() FROM DMS_Containers")
-        return cursor.fetchone()[0]
 
-    def insert_folder(self, cursor, container_id: int, folder_name: str, 
-                     parent_folder_id: Optional[int], folder_path: str, created_by: str) -> int:
-        cursor.execute("""
-            INSERT INTO DMS_Folders (FolderId, FolderName, ContainerId, ParentFolderId, FolderPath, CreatedBy, CreatedAt)
-            VALUES (NEXT VALUE FOR DMS_Folders_Seq, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (folder_name, container_id, parent_folder_id, folder_path, created_by))
-        
-        cursor.execute("SELECT CURRENT_IDENTITY_VALUE() FROM DMS_Folders")
+        cursor.execute("SELECT CURRENT_IDENTITY_VALUE() FROM DMS_Containers")
         return cursor.fetchone()[0]
 
-    def insert_file(self, cursor, folder_id: int, container_id: int, file_name: str, 
-                   file_path: str, file_size: int, file_type: str, created_by: str) -> None:
+    def log_sync(self, cursor, integration_id: int, sync_status: str, message: str) -> None:
         cursor.execute("""
-            INSERT INTO DMS_Files (FileId, FileName, FolderId, ContainerId, FilePath, FileSize, FileType, CreatedBy, CreatedAt)
-            VALUES (NEXT VALUE FOR DMS_Files_Seq, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (file_name, folder_id, container_id, file_path, file_size, file_type, created_by)) 
\ No newline at end of file
+            INSERT INTO DMS_Sync_Logs (IntegrationId, Status, Message, CreatedAt)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        """, (integration_id, sync_status, message))
@@ -0,0 +1,170 @@
+import sys
+import json
+import uuid
+import random
+from array import array
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+_NULL_SHA = bytes(20)
+
+
+class CompactTree:
+    """Repository snapshot stored as parallel arrays indexed by integer node ID.
+
+    Names are interned, sizes and links live in typed arrays and blob SHAs are kept
+    as 20 raw bytes each, so a node costs a few dozen bytes instead of a dict with a
+    uuid string. Children are a singly linked list in insertion (listing) order.
+    Paths and ids are only produced when the tree is serialized, to the same shape
+    the nested dicts had: folders {id, name, type, children}, files {id, name, type,
+    path, size, sha}.
+    """
+
+    ROOT = 0
+    FOLDER = 0
+    FILE = 1
+
+    __slots__ = ("names", "kinds", "parents", "sizes", "shas",
+                 "first_child", "last_child", "next_sibling", "_id_base")
+
+    def __init__(self, root_name: str):
+        self.names: List[str] = []
+        self.kinds = bytearray()
+        self.parents = array("q")
+        self.sizes = array("q")
+        self.shas = bytearray()
+        self.first_child = array("q")
+        self.last_child = array("q")
+        self.next_sibling = array("q")
+        # Serialized ids are uuid-formatted offsets from one random base, so they stay unique across trees
+        self._id_base = random.getrandbits(128)
+        self._add(-1, root_name, self.FOLDER, 0, None)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _add(self, parent: int, name: str, kind: int, size: int, sha: Optional[str]) -> int:
+        index = len(self.names)
+        self.names.append(sys.intern(name))
+        self.kinds.append(kind)
+        self.parents.append(parent)
+        self.sizes.append(size or 0)
+        try:
+            self.shas += bytes.fromhex(sha) if sha and len(sha) == 40 else _NULL_SHA
+        except ValueError:
+            self.shas += _NULL_SHA
+        self.first_child.append(-1)
+        self.last_child.append(-1)
+        self.next_sibling.append(-1)
+        if parent >= 0:
+            if self.first_child[parent] < 0:
+                self.first_child[parent] = index
+            else:
+                self.next_sibling[self.last_child[parent]] = index
+            self.last_child[parent] = index
+        return index
+
+    def add_folder(self, parent: int, name: str) -> int:
+        return self._add(parent, name, self.FOLDER, 0, None)
+
+    def add_file(self, parent: int, name: str, size: int = 0, sha: Optional[str] = None) -> int:
+        return self._add(parent, name, self.FILE, size, sha)
+
+    def is_folder(self, index: int) -> bool:
+        return self.kinds[index] == self.FOLDER
+
+    def sha(self, index: int) -> Optional[str]:
+        raw = bytes(self.shas[index * 20:index * 20 + 20])
+        return None if raw == _NULL_SHA else raw.hex()
+
+    def node_id(self, index: int) -> str:
+        return str(uuid.UUID(int=(self._id_base + index) & ((1 << 128) - 1)))
+
+    def children(self, index: int) -> Iterator[int]:
+        child = self.first_child[index]
+        while child >= 0:
+            yield child
+            child = self.next_sibling[child]
+
+    def walk(self) -> Iterator[Tuple[int, str]]:
+        """(index, path) for every node, parents before children and siblings in listing order"""
+        stack = [(self.ROOT, "")]
+        while stack:
+            index, path = stack.pop()
+            yield index, path
+            for child in reversed(list(self.children(index))):
+                name = self.names[child]
+                stack.append((child, f"{path}/{name}" if path else name))
+
+    def iter_flat(self) -> Iterator[Dict[str, Any]]:
+        """Flat nodes (id, parent_id, name, type, path, size), parents first"""
+        for index, path in self.walk():
+            parent = self.parents[index]
+            yield {
+                "id": self.node_id(index),
+                "parent_id": self.node_id(parent) if parent >= 0 else None,
+                "name": self.names[index],
+                "type": "folder" if self.is_folder(index) else "file",
+                "path": path,
+                "size": self.sizes[index]
+            }
+
+    def _node(self, index: int, path: str) -> Dict[str, Any]:
+        if self.is_folder(index):
+            return {"id": self.node_id(index), "name": self.names[index], "type": "folder", "children": []}
+        return {
+            "id": self.node_id(index),
+            "name": self.names[index],
+            "type": "file",
+            "path": path,
+            "size": self.sizes[index],
+            "sha": self.sha(index)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The nested dict structure; builds every node, so prefer iterencode for large trees"""
+        nodes: Dict[int, Dict[str, Any]] = {}
+        for index, path in self.walk():
+            nodes[index] = self._node(index, path)
+            if index != self.ROOT:
+                nodes[self.parents[index]]["children"].append(nodes[index])
+        return nodes[self.ROOT]
+
+    def iterencode(self) -> Iterator[str]:
+        """The to_dict() JSON document in pieces, holding one path of the tree at a time"""
+        dumps = json.dumps
+        # Each frame: [children iterator, folder path, whether a child was already written]
+        yield dumps(self._node(self.ROOT, ""))[:-2]
+        stack = [[self.children(self.ROOT), "", False]]
+        while stack:
+            frame = stack[-1]
+            child = next(frame[0], None)
+            if child is None:
+                stack.pop()
+                yield "]}"
+                continue
+            separator = ", " if frame[2] else ""
+            frame[2] = True
+            name = self.names[child]
+            path = f"{frame[1]}/{name}" if frame[1] else name
+            if self.is_folder(child):
+                # Open the folder, leaving its children list unterminated
+                yield separator + dumps(self._node(child, path))[:-2]
+                stack.append([self.children(child), path, False])
+            else:
+                yield separator + dumps(self._node(child, path))
+
+
+def iterencode_result(result: Dict[str, Any], key: str = "tree") -> Iterator[str]:
+    """result as one JSON document, the CompactTree under key encoded piece by piece"""
+    fields = {name: value for name, value in result.items() if name != key}
+    head = json.dumps(fields)[:-1]
+    yield head + (", " if fields else "") + json.dumps(key) + ": "
+    yield from result[key].iterencode()
+    yield "}"
+
+
+def tree_as_dict(result: Any, key: str = "tree") -> Any:
+    """result with its CompactTree, if any, as nested dicts; for results kept as job state"""
+    if isinstance(result, dict) and isinstance(result.get(key), CompactTree):
+        result = dict(result, **{key: result[key].to_dict()})
+    return result
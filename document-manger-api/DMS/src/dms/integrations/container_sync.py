@@ -0,0 +1,207 @@
+from typing import Dict, Optional, List, Tuple, Iterable, Set
+
+from .base_integration import BaseIntegration, DMSBatchWriter
+from .compact_tree import CompactTree
+from ..helper.search_index import FOLDER, FILE
+
+
+# Paths per IN (...) lookup
+LOOKUP_CHUNK = 500
+
+
+def ancestor_paths(path: str) -> List[str]:
+    """Folder paths above path, nearest first: "a/b/c.txt" -> ["a/b", "a"]"""
+    parts = path.split("/")[:-1]
+    return ["/".join(parts[:depth]) for depth in range(len(parts), 0, -1)]
+
+
+class ContainerSync:
+    """Diffs a freshly fetched tree against a container's DMS_Folders/DMS_Files rows.
+
+    Rows are matched by path; files are updated when their size or blob SHA differ.
+    Only the resulting inserts, updates and deletes are executed, all on the caller's
+    cursor, so the caller commits (with writer.commit) or rolls back the whole sync as
+    one transaction.
+    """
+
+    def __init__(self, cursor, writer: DMSBatchWriter):
+        self.cursor = cursor
+        self.writer = writer
+        self.container_id = writer.container_id
+        self.counts = {
+            "folders_inserted": 0,
+            "folders_deleted": 0,
+            "files_inserted": 0,
+            "files_updated": 0,
+            "files_deleted": 0,
+            "files_unchanged": 0
+        }
+
+    def load_existing(self) -> Tuple[Dict[str, int], Dict[str, Tuple]]:
+        self.cursor.execute(
+            "SELECT FolderId, FolderPath FROM DMS_Folders WHERE ContainerId = ?",
+            (self.container_id,)
+        )
+        folders = {folder_path: folder_id for folder_id, folder_path in self.cursor.fetchall()}
+
+        self.cursor.execute(
+            "SELECT FileId, FilePath, FileSize, FileSha FROM DMS_Files WHERE ContainerId = ?",
+            (self.container_id,)
+        )
+        files = {
+            file_path: (file_id, file_size, file_sha)
+            for file_id, file_path, file_size, file_sha in self.cursor.fetchall()
+        }
+        return folders, files
+
+    @staticmethod
+    def flatten(tree: CompactTree) -> Tuple[List[Tuple[str, str, str]], Dict[str, Tuple[str, int, Optional[str]]]]:
+        """Folders as (path, name, parent_path) in parent-first order, and (name, size, sha) of files by path"""
+        folders = []
+        files = {}
+        for index, path in tree.walk():
+            if index == tree.ROOT:
+                continue
+            name = tree.names[index]
+            if tree.is_folder(index):
+                folders.append((path, name, path.rpartition("/")[0]))
+            else:
+                files[path] = (name, tree.sizes[index], tree.sha(index))
+        return folders, files
+
+    def apply(self, tree: CompactTree) -> Dict[str, int]:
+        existing_folders, existing_files = self.load_existing()
+        fetched_folders, fetched_files = self.flatten(tree)
+
+        folder_ids: Dict[str, Optional[int]] = {"": None}
+        for folder_path, folder_name, parent_path in fetched_folders:
+            folder_id = existing_folders.get(folder_path)
+            if folder_id is None:
+                folder_id = self.writer.add_folder(folder_name, folder_ids[parent_path], folder_path)
+                self.counts["folders_inserted"] += 1
+            folder_ids[folder_path] = folder_id
+
+        updates = []
+        for file_path, (file_name, file_size, file_sha) in fetched_files.items():
+            current = existing_files.get(file_path)
+            if current is None:
+                parent_path = file_path.rpartition("/")[0]
+                self.writer.add_file(
+                    folder_ids.get(parent_path), file_name, file_path, file_size,
+                    BaseIntegration.get_file_type(file_name), file_sha
+                )
+                self.counts["files_inserted"] += 1
+            elif (current[1], current[2]) != (file_size, file_sha):
+                updates.append((file_size, file_sha, current[0]))
+            else:
+                self.counts["files_unchanged"] += 1
+        self.writer.flush()
+
+        if updates:
+            self.cursor.executemany(
+                "UPDATE DMS_Files SET FileSize = ?, FileSha = ? WHERE FileId = ?", updates
+            )
+            self.counts["files_updated"] = len(updates)
+
+        removed_files = [(file_id,) for path, (file_id, _, _) in existing_files.items() if path not in fetched_files]
+        if removed_files:
+            self.cursor.executemany("DELETE FROM DMS_Files WHERE FileId = ?", removed_files)
+            self.counts["files_deleted"] = len(removed_files)
+            self.writer.unindex(FILE, [row[0] for row in removed_files])
+
+        # Deepest folders first so no remaining row still points at a deleted parent
+        removed_folders = sorted(
+            (path for path in existing_folders if path not in folder_ids),
+            key=lambda path: path.count("/"), reverse=True
+        )
+        if removed_folders:
+            self.cursor.executemany(
+                "DELETE FROM DMS_Folders WHERE FolderId = ?",
+                [(existing_folders[path],) for path in removed_folders]
+            )
+            self.counts["folders_deleted"] = len(removed_folders)
+            self.writer.unindex(FOLDER, [existing_folders[path] for path in removed_folders])
+
+        return self.counts
+
+    def _lookup(self, query: str, paths: Iterable[str]) -> List[Tuple]:
+        """Rows of this container whose path is in paths; query has one {} for the IN list"""
+        paths = list(paths)
+        rows = []
+        for start in range(0, len(paths), LOOKUP_CHUNK):
+            chunk = paths[start:start + LOOKUP_CHUNK]
+            self.cursor.execute(query.format(", ".join("?" * len(chunk))), (self.container_id, *chunk))
+            rows.extend(self.cursor.fetchall())
+        return rows
+
+    def apply_paths(self, upserts: Dict[str, Tuple[int, Optional[str]]], removed: Iterable[str]) -> Dict[str, int]:
+        """Apply file-level changes without reading the rest of the container.
+
+        upserts maps file paths to (size, sha). Missing parent folders are created, and
+        folders left empty by removals are deleted.
+        """
+        removed: Set[str] = set(removed) - set(upserts)
+        needed_folders = {folder for path in upserts for folder in ancestor_paths(path)}
+        vacated_folders = {folder for path in removed for folder in ancestor_paths(path)} - needed_folders
+
+        folder_ids: Dict[str, Optional[int]] = {"": None}
+        folder_ids.update((folder_path, folder_id) for folder_id, folder_path in self._lookup(
+            "SELECT FolderId, FolderPath FROM DMS_Folders WHERE ContainerId = ? AND FolderPath IN ({})",
+            needed_folders | vacated_folders
+        ))
+        existing_files = {
+            file_path: (file_id, file_size, file_sha)
+            for file_id, file_path, file_size, file_sha in self._lookup(
+                "SELECT FileId, FilePath, FileSize, FileSha FROM DMS_Files WHERE ContainerId = ? AND FilePath IN ({})",
+                set(upserts) | removed
+            )
+        }
+
+        # Shallowest first, so every parent exists before its children
+        for folder_path in sorted(needed_folders - set(folder_ids), key=lambda path: path.count("/")):
+            parent_path, _, folder_name = folder_path.rpartition("/")
+            folder_ids[folder_path] = self.writer.add_folder(folder_name, folder_ids[parent_path], folder_path)
+            self.counts["folders_inserted"] += 1
+
+        updates = []
+        for file_path, (file_size, file_sha) in upserts.items():
+            current = existing_files.get(file_path)
+            if current is None:
+                file_name = file_path.rpartition("/")[2]
+                self.writer.add_file(
+                    folder_ids[file_path.rpartition("/")[0]], file_name, file_path, file_size,
+                    BaseIntegration.get_file_type(file_name), file_sha
+                )
+                self.counts["files_inserted"] += 1
+            elif (current[1], current[2]) != (file_size, file_sha):
+                updates.append((file_size, file_sha, current[0]))
+            else:
+                self.counts["files_unchanged"] += 1
+        self.writer.flush()
+
+        if updates:
+            self.cursor.executemany(
+                "UPDATE DMS_Files SET FileSize = ?, FileSha = ? WHERE FileId = ?", updates
+            )
+            self.counts["files_updated"] = len(updates)
+
+        removed_files = [(existing_files[path][0],) for path in removed if path in existing_files]
+        if removed_files:
+            self.cursor.executemany("DELETE FROM DMS_Files WHERE FileId = ?", removed_files)
+            self.counts["files_deleted"] = len(removed_files)
+            self.writer.unindex(FILE, [row[0] for row in removed_files])
+
+        # Deepest first, so a parent emptied by deleting its last subfolder goes too
+        for folder_path in sorted(vacated_folders, key=lambda path: path.count("/"), reverse=True):
+            folder_id = folder_ids.get(folder_path)
+            if folder_id is None:
+                continue
+            self.cursor.execute("SELECT COUNT(*) FROM DMS_Files WHERE FolderId = ?", (folder_id,))
+            files_left = self.cursor.fetchone()[0]
+            self.cursor.execute("SELECT COUNT(*) FROM DMS_Folders WHERE ParentFolderId = ?", (folder_id,))
+            if files_left == 0 and self.cursor.fetchone()[0] == 0:
+                self.cursor.execute("DELETE FROM DMS_Folders WHERE FolderId = ?", (folder_id,))
+                self.counts["folders_deleted"] += 1
+                self.writer.unindex(FOLDER, [folder_id])
+
+        return self.counts
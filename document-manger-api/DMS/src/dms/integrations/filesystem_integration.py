@@ -0,0 +1,193 @@
+import os
+import asyncio
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, AsyncIterator
+
+from .base_integration import BaseIntegration
+from .ingest_pipeline import SourceEntry, walk_listings
+from ..helper.db_pool import hana_connection, get_pool
+from ..helper.ttl_cache import listing_cache
+
+logger = logging.getLogger(__name__)
+
+
+class FilesystemIntegration(BaseIntegration):
+    """Local or mounted (NFS, SMB) directory trees.
+
+    Only trees under DMS_FILESYSTEM_ROOT, set by the operator, can be ingested. An
+    integration's api_url may narrow that to a subdirectory; paths are stored relative
+    to the resulting base_dir. Directories are read with os.scandir on a thread pool,
+    so many NFS round trips are in flight at once; symlinks are skipped so a link cycle
+    can't loop the walk.
+    """
+
+    def __init__(self, connection_config: Optional[Dict[str, Any]] = None,
+                 integration_config: Optional[Dict[str, Any]] = None):
+        super().__init__(
+            connection_config or hana_connection(),
+            integration_config or {}
+        )
+        allowed_root = os.getenv("DMS_FILESYSTEM_ROOT")
+        if not allowed_root:
+            raise ValueError("DMS_FILESYSTEM_ROOT is not configured; filesystem integrations are disabled")
+        self.allowed_root = os.path.realpath(allowed_root)
+        # api_url is user supplied, so it only selects a directory inside the allowed root
+        self.base_dir = self._within_root(
+            os.path.join(self.allowed_root, self.integration_config.get("api_url") or "")
+        )
+        self.root_path = self.integration_config.get("root_path") or ""
+        # Directories scanned at once; mounted shares gain the most from a wide pool
+        self.workers = int(self.integration_config.get("fetchers") or os.getenv("DMS_FILESYSTEM_WORKERS", "16"))
+
+    def _within_root(self, path: str) -> str:
+        """path with symlinks resolved; ValueError if that lands outside the allowed root"""
+        resolved = os.path.realpath(path)
+        if os.path.commonpath([resolved, self.allowed_root]) != self.allowed_root:
+            raise ValueError(f"{path} is outside DMS_FILESYSTEM_ROOT")
+        return resolved
+
+    def relative_path(self, path: str) -> str:
+        """path as stored in DMS: relative to base_dir, "/" separated, never escaping base_dir.
+
+        Absolute paths are accepted when they lie under base_dir; every other path is
+        taken as relative to it, whatever it starts with.
+        """
+        if os.path.isabs(path):
+            absolute = os.path.normpath(path)
+            if os.path.commonpath([absolute, self.base_dir]) != self.base_dir:
+                raise ValueError(f"{path} is outside the integration's directory")
+            path = os.path.relpath(absolute, self.base_dir)
+        return posixpath.normpath("/" + path.replace(os.sep, "/")).lstrip("/")
+
+    def scan_directory(self, path: str) -> List[SourceEntry]:
+        """Entries directly inside path. Runs on a worker thread.
+
+        is_dir() and is_symlink() come from the directory listing itself where the
+        filesystem reports entry types; file sizes take the one lstat per file, which
+        DirEntry caches, so no entry is stat'ed twice.
+        """
+        prefix = f"{path}/" if path else ""
+        listing = []
+        try:
+            with os.scandir(self._within_root(os.path.join(self.base_dir, path))) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_symlink():
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            listing.append(SourceEntry(prefix + entry.name, entry.name, True))
+                        else:
+                            size = entry.stat(follow_symlinks=False).st_size
+                            listing.append(SourceEntry(prefix + entry.name, entry.name, False, size))
+                    except OSError as e:
+                        # Removed between the listing and the stat, or a stale NFS handle
+                        logger.warning("Skipping unreadable entry %s%s: %s", prefix, entry.name, e)
+        except OSError as e:
+            # Permissions, a directory replaced by a file, ESTALE/EIO on a mount
+            logger.warning("Skipping unreadable directory %s: %s", path or "/", e)
+        except ValueError as e:
+            # A symlink out of the root, given as the path or swapped in since the parent was listed
+            logger.warning("Skipping directory %s: %s", path or "/", e)
+        return listing
+
+    def get_contents(self, path: str = "") -> List[Dict[str, Any]]:
+        return [
+            {
+                "name": entry.name,
+                "path": entry.path,
+                "type": "dir" if entry.is_folder else "file",
+                "size": entry.size
+            }
+            for entry in self.scan_directory(self.relative_path(path))
+        ]
+
+    async def iter_entries(self, path: str = "") -> AsyncIterator[List[SourceEntry]]:
+        """Listings from a pool of scandir threads, one directory per task; path as returned by relative_path"""
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dms-scandir")
+
+        async def list_directory(directory: str) -> List[SourceEntry]:
+            listing = await loop.run_in_executor(pool, self.scan_directory, directory)
+            self.report_fetched(len(listing))
+            return listing
+
+        try:
+            async for listing in walk_listings(list_directory, path, self.workers):
+                yield listing
+        finally:
+            # Scans still running on a slow mount finish in the background
+            pool.shutdown(wait=False)
+
+    def ingest(self, writer, path: str = "") -> Dict[str, Any]:
+        """Store the tree below path, given as a container's root_path"""
+        return super().ingest(writer, self.relative_path(path))
+
+    def setup_container(self, dry_run: bool = False) -> Dict[str, Any]:
+        root_path = self.relative_path(self.root_path)
+        if dry_run:
+            # Counted only, the tree of a large share isn't worth holding in memory
+            counts = {"folders": 0, "files": 0}
+            for listing in self._walk_sync(root_path):
+                for entry in listing:
+                    counts["folders" if entry.is_folder else "files"] += 1
+            return {
+                "status": "success",
+                "message": "Directory tree scanned",
+                "root_path": root_path,
+                "dry_run": True,
+                "counts": counts
+            }
+
+        connection = None
+        cursor = None
+        pool = get_pool(self.connection_config)
+        try:
+            connection = pool.acquire()
+            cursor = connection.cursor()
+
+            cursor.execute("SELECT IntegrationId FROM DMS_Integrations WHERE IntegrationName = 'Filesystem'")
+            integration_row = cursor.fetchone()
+            if not integration_row:
+                raise Exception("Filesystem integration not found in DMS_Integrations")
+
+            integration_id = integration_row[0]
+            container_name = posixpath.basename(root_path) or self.base_dir
+            container_id = self.insert_container(cursor, integration_id, container_name, root_path, "system")
+
+            writer = self.create_batch_writer(cursor, container_id, "system")
+            # root_path is already normalised
+            stats = super().ingest(writer, root_path)
+            self.log_sync(cursor, integration_id, "SUCCESS", f"Directory tree stored in DMS database: {stats}")
+            writer.commit(connection)
+            listing_cache.invalidate("containers")
+
+            return {
+                "status": "success",
+                "message": "Directory tree stored",
+                "container_id": container_id,
+                "stats": stats
+            }
+
+        except Exception as e:
+            if connection:
+                connection.rollback()
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                pool.release(connection)
+
+    def _walk_sync(self, root_path: str):
+        """Listings below root_path from the calling thread, depth first"""
+        pending = [root_path]
+        while pending:
+            listing = self.scan_directory(pending.pop())
+            self.report_fetched(len(listing))
+            pending.extend(entry.path for entry in listing if entry.is_folder)
+            yield listing
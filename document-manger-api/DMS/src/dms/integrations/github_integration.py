@@ -14,96 +14,519 @@ from hdbcli import dbapi
 import aiohttp
 import asyncio
 import os
+import re
+import json
+import logging
+from typing import AsyncIterator, Tuple
+
+from .base_integration import BaseIntegration
+from .ingest_pipeline import SourceEntry, walk_listings
+from .response_cache import get_response_cache
+from .container_sync import ContainerSync
+from .compact_tree import CompactTree
+from .maas_upload import MaasUploader
+from ..helper.db_pool import hana_connection, get_pool
+from ..helper.ttl_cache import listing_cache
+from ..helper.request_budget import get_budget
+from ..helper.http_pools import github_session, maas_session, run_async
+
+logger = logging.getLogger(__name__)
+
+# Pushes changing more files than this are applied with a full diff instead of per-directory lookups
+WEBHOOK_MAX_PATHS = int(os.getenv("GITHUB_WEBHOOK_MAX_PATHS", "200"))
 
 ## hardcoded credentials as of now 
 
-class GitHubIntegration:
-    def __init__(self):
-        self.token = os.getenv("GITHUB_TOKEN")            # from deloitte sap 
-        self.repo_owner = os.getenv("GITHUB_REPO_OWNER")     
-        self.repo_name = os.getenv("GITHUB_REPO_NAME")
+class GitHubIntegration(BaseIntegration):
+    def __init__(self, connection_config: Optional[Dict[str, Any]] = None,
+                 integration_config: Optional[Dict[str, Any]] = None):
+        super().__init__(
+            connection_config or hana_connection(),
+            integration_config or {}
+        )
+        self.token = self.integration_config.get("access_token") or os.getenv("GITHUB_TOKEN")            # from deloitte sap 
+        self.repo_owner = self.integration_config.get("repo_owner") or os.getenv("GITHUB_REPO_OWNER")     
+        self.repo_name = self.integration_config.get("repo_name") or os.getenv("GITHUB_REPO_NAME")
         self.maas_url = os.getenv("MAAS_IMPORT_URL")  # Example ki tarah : http://localhost:8080/maas/api/container/import
+        self.repo_ref = os.getenv("GITHUB_REPO_REF", "HEAD")
+        # "json" posts the tree in one body, "gzip" streams it compressed, "batched" sends flat node batches
+        self.maas_upload_mode = os.getenv("MAAS_UPLOAD_MODE", "json").lower()
+        # "trees" loads the whole repo with one recursive git/trees call, "contents" walks /contents/{path} per directory
+        self.fetch_mode = os.getenv("GITHUB_FETCH_MODE", "trees").lower()
+        # Upper bound on GitHub requests in flight while walking a repository
+        self.max_concurrency = int(os.getenv("GITHUB_MAX_CONCURRENCY", "8"))
+        # Concurrency and request budget shared with every other sync using this token
+        self.request_budget = get_budget(self.token)
         self.headers = {
             "Authorization": f"token {self.token}",
             "Accept": "application/vnd.github.v3+json"
         }
+        # Earlier responses on disk, served while fresh and revalidated with If-None-Match after
+        self.response_cache = get_response_cache()
+        # Off for webhook-driven fetches, which must see the pushed state rather than a copy from the last minute
+        self.use_fresh_cache = True
+
+    def _contents_url(self, path: str) -> str:
+        return f"https://api.github.com/repos/{self.repo_owner}/{self.repo_name}/contents/{path}"
+
+    def _tree_url(self, tree_sha: str, recursive: bool) -> str:
+        url = f"https://api.github.com/repos/{self.repo_owner}/{self.repo_name}/git/trees/{tree_sha}"
+        return f"{url}?recursive=1" if recursive else url
+
+    def _stored_body(self, url: str) -> Optional[Any]:
+        cached = self.response_cache.get(url) if self.response_cache else None
+        return cached["body"] if cached else None
+
+    def _cached_response(self, url: str):
+        """One cache read per request: (fresh body or None, request headers, stored response or None)"""
+        cached = self.response_cache.get(url) if self.response_cache else None
+        if cached is None:
+            return None, self.headers, None
+        if self.use_fresh_cache and self.response_cache.is_fresh(cached):
+            return cached["body"], self.headers, cached
+        if cached.get("etag"):
+            return None, dict(self.headers, **{"If-None-Match": cached["etag"]}), cached
+        return None, self.headers, None
+
+    async def _fetch_json(self, session, url: str, error_message: str):
+        """GET url with If-None-Match; returns (body, not_modified).
+
+        Rate-limited, 5xx and dropped requests are retried with backoff, so a failure
+        costs only this one request rather than the whole traversal. Response cache reads
+        and writes (SQLite, zlib, JSON) run on worker threads to keep the event loop free.
+        """
+        fresh, headers, cached = await asyncio.to_thread(self._cached_response, url)
+        if fresh is not None:
+            return fresh, False
+        attempt = 0
+        while True:
+            await self.request_budget.acquire_async()
+            try:
+                async with session.get(url, headers=headers) as response:
+                    self.request_budget.observe(response.status, response.headers)
+                    if response.status == 304 and cached:
+                        await asyncio.to_thread(self.response_cache.revalidated, url)
+                        return cached["body"], True
+                    if response.status == 200:
+                        body = await response.json()
+                        if self.response_cache:
+                            await asyncio.to_thread(self.response_cache.put, url, response.headers.get("ETag"), body)
+                        return body, False
+                    text = await response.text()
+                    delay = self.request_budget.retry_delay(attempt, response.status, response.headers, text)
+                    if delay is None:
+                        raise Exception(f"{error_message}: {text}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                delay = self.request_budget.retry_delay(attempt)
+                if delay is None:
+                    raise Exception(f"{error_message}: {e}")
+            logger.warning("GitHub request %s failed (attempt %s), retrying in %.2fs", url, attempt + 1, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def save_response_cache(self) -> None:
+        if self.response_cache:
+            self.response_cache.save()
 
     async def fetch_repo_structure(self, session, path="") -> List[Dict[str, Any]]:
-        url = f"https://api.github.com/repos/{self.repo_owner}/{self.repo_name}/contents/{path}"
-        async with session.get(url, headers=self.headers) as response:
-            if response.status != 200:
-                text = await response.text()
-                raise Exception(f"Failed to fetch contents for {path}: {text}")
-            return await response.json()
-
-    async def build_tree(self, session, path="") -> Dict[str, Any]:
-        contents = await self.fetch_repo_structure(session, path)
-        tree = {
-            "id": str(uuid.uuid4()),
-            "name": path.split("/")[-1] if path else self.repo_name,
-            "type": "folder",
-            "children": []
-        }
+        contents, _ = await self._fetch_json(session, self._contents_url(path), f"Failed to fetch contents for {path}")
+        return contents
+
+    def get_contents(self, path: str = "") -> List[Dict[str, Any]]:
+        """One directory listing, fetched like every other request; call from a worker thread"""
+        async def fetch():
+            async with github_session() as session:
+                return await self.fetch_repo_structure(session, path)
+        return run_async(fetch)
+
+    async def fetch_git_tree(self, session, tree_sha: str, recursive: bool = True) -> Dict[str, Any]:
+        url = self._tree_url(tree_sha, recursive)
+        if re.fullmatch(r"[0-9a-f]{40}", tree_sha):
+            # Trees addressed by SHA never change, a stored copy is always current
+            stored = await asyncio.to_thread(self._stored_body, url)
+            if stored is not None:
+                return stored
+        data, _ = await self._fetch_json(session, url, f"Failed to fetch git tree {tree_sha}")
+        return data
+
+    async def fetch_tree_entries(self, session, tree_sha: str, prefix: str = "",
+                                 semaphore: Optional[asyncio.Semaphore] = None) -> List[Dict[str, Any]]:
+        """Flat list of blob/tree entries under tree_sha, with paths relative to the repo root"""
+        semaphore = semaphore or asyncio.Semaphore(self.max_concurrency)
+        async with semaphore:
+            data = await self.fetch_git_tree(session, tree_sha, recursive=True)
+        if not data.get("truncated"):
+            return [dict(entry, path=prefix + entry["path"]) for entry in data.get("tree", [])]
+
+        # GitHub caps recursive listings; list this level only and recurse into each subtree,
+        # so only subtrees that are themselves too large get split up further
+        async with semaphore:
+            data = await self.fetch_git_tree(session, tree_sha, recursive=False)
+        level = [dict(entry, path=prefix + entry["path"]) for entry in data.get("tree", [])]
+        subtrees = await asyncio.gather(*(
+            self.fetch_tree_entries(session, entry["sha"], entry["path"] + "/", semaphore)
+            for entry in level if entry["type"] == "tree"
+        ))
+
+        entries = []
+        subtree_entries = iter(subtrees)
+        for entry in level:
+            entries.append(entry)
+            if entry["type"] == "tree":
+                entries.extend(next(subtree_entries))
+        return entries
+
+    def nest_tree_entries(self, entries: List[Dict[str, Any]]) -> CompactTree:
+        """Build the folder/file tree from a flat git tree listing"""
+        tree = CompactTree(self.repo_name)
+        folders = {"": tree.ROOT}
+
+        def get_folder(folder_path: str) -> int:
+            folder = folders.get(folder_path)
+            if folder is None:
+                parent_path, _, name = folder_path.rpartition("/")
+                folder = tree.add_folder(get_folder(parent_path), name)
+                folders[folder_path] = folder
+            return folder
+
+        for entry in entries:
+            if entry["type"] == "tree":
+                get_folder(entry["path"])
+            elif entry["type"] == "blob":
+                parent_path, _, name = entry["path"].rpartition("/")
+                tree.add_file(get_folder(parent_path), name, entry.get("size", 0), entry.get("sha"))
+
+        return tree
+
+    async def _fetch_listing(self, session, path: str, semaphore: asyncio.Semaphore, reuse_stored: bool):
+        # A 304 on a listing means nothing below it changed either, since each entry carries its
+        # subtree SHA; rebuild the subtree from stored listings instead of descending over the network
+        contents = await asyncio.to_thread(self._stored_body, self._contents_url(path)) if reuse_stored else None
+        if contents is not None:
+            return contents, True
+        async with semaphore:
+            return await self._fetch_json(
+                session, self._contents_url(path), f"Failed to fetch contents for {path}"
+            )
+
+    async def build_tree(self, session, path="", reuse_stored: bool = False) -> CompactTree:
+        # One semaphore for the whole traversal, cached responses committed once at the end
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self.fetch_mode == "trees" and not path:
+            entries = await self.fetch_tree_entries(session, self.repo_ref, semaphore=semaphore)
+            self.report_fetched(len(entries))
+            tree = self.nest_tree_entries(entries)
+        else:
+            tree = CompactTree(path.split("/")[-1] if path else self.repo_name)
+            await self._fill_tree(session, tree, tree.ROOT, path, semaphore, reuse_stored)
+        await asyncio.to_thread(self.save_response_cache)
+        return tree
+
+    async def _fill_tree(self, session, tree: CompactTree, folder: int, path: str,
+                         semaphore: asyncio.Semaphore, reuse_stored: bool) -> None:
+        contents, reuse_stored = await self._fetch_listing(session, path, semaphore, reuse_stored)
+        self.report_fetched(len(contents))
 
+        # Every child is added before any subdirectory is awaited, so siblings keep listing order
+        subfolders = []
         for item in contents:
             if item["type"] == "dir":
-                folder = await self.build_tree(session, item["path"])
-                tree["children"].append(folder)
+                subfolders.append((tree.add_folder(folder, item["name"]), item["path"]))
             elif item["type"] == "file":
-                tree["children"].append({
-                    "id": str(uuid.uuid4()),
+                tree.add_file(folder, item["name"], item.get("size", 0), item.get("sha"))
+
+        # Sibling directories are fetched concurrently
+        await asyncio.gather(*(
+            self._fill_tree(session, tree, subfolder, subfolder_path, semaphore, reuse_stored)
+            for subfolder, subfolder_path in subfolders
+        ))
+
+    async def iter_nodes(self, session) -> AsyncIterator[Dict[str, Any]]:
+        """Yield flat nodes (id, parent_id, name, type, path, size) as soon as each one is discovered"""
+        root_id = str(uuid.uuid4())
+        yield {"id": root_id, "parent_id": None, "name": self.repo_name, "type": "folder", "path": "", "size": 0}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        if self.fetch_mode == "trees":
+            folder_ids = {"": root_id}
+            for entry in await self.fetch_tree_entries(session, self.repo_ref, semaphore=semaphore):
+                if entry["type"] not in ("tree", "blob"):
+                    continue
+                parent_path, _, name = entry["path"].rpartition("/")
+                node_id = str(uuid.uuid4())
+                if entry["type"] == "tree":
+                    folder_ids[entry["path"]] = node_id
+                yield {
+                    "id": node_id,
+                    "parent_id": folder_ids.get(parent_path, root_id),
+                    "name": name,
+                    "type": "folder" if entry["type"] == "tree" else "file",
+                    "path": entry["path"],
+                    "size": entry.get("size", 0)
+                }
+            await asyncio.to_thread(self.save_response_cache)
+            return
+
+        # Directory walkers feed a bounded queue, so memory stays flat when the client reads slowly
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+        done = object()
+
+        async def walk(path: str, parent_id: str, reuse_stored: bool):
+            contents, reuse_stored = await self._fetch_listing(session, path, semaphore, reuse_stored)
+            subfolders = []
+            for item in contents:
+                if item["type"] not in ("dir", "file"):
+                    continue
+                node_id = str(uuid.uuid4())
+                await queue.put({
+                    "id": node_id,
+                    "parent_id": parent_id,
                     "name": item["name"],
-                    "type": "file",
+                    "type": "folder" if item["type"] == "dir" else "file",
                     "path": item["path"],
                     "size": item.get("size", 0)
                 })
+                if item["type"] == "dir":
+                    subfolders.append(asyncio.ensure_future(walk(item["path"], node_id, reuse_stored)))
+            try:
+                await asyncio.gather(*subfolders)
+            except BaseException:
+                # Stop sibling walkers too, nothing will read their nodes any more
+                for task in subfolders:
+                    task.cancel()
+                raise
 
-        return tree
+        async def produce():
+            try:
+                await walk("", root_id, False)
+            finally:
+                await queue.put(done)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                node = await queue.get()
+                if node is done:
+                    break
+                yield node
+            # Surfaces any fetch error raised by the walkers
+            await producer
+            await asyncio.to_thread(self.save_response_cache)
+        finally:
+            if not producer.done():
+                producer.cancel()
+
+    async def iter_entries(self, path: str = "") -> AsyncIterator[List[SourceEntry]]:
+        """Listings for the ingest pipeline: the whole repo in one git tree listing in "trees"
+        mode, otherwise one /contents listing per directory from max_concurrency fetchers"""
+        async with github_session() as session:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            if self.fetch_mode == "trees" and not path:
+                entries = await self.fetch_tree_entries(session, self.repo_ref, semaphore=semaphore)
+                self.report_fetched(len(entries))
+                # Git lists a tree before the entries inside it
+                yield [
+                    SourceEntry(entry["path"], entry["path"].rpartition("/")[2], entry["type"] == "tree",
+                                entry.get("size", 0), entry.get("sha"))
+                    for entry in entries if entry["type"] in ("tree", "blob")
+                ]
+            else:
+                # Directories whose listing came back unchanged; their subdirectories are read from the cache
+                unchanged = set()
+
+                async def list_directory(directory: str) -> List[SourceEntry]:
+                    reuse_stored = bool(directory) and directory.rpartition("/")[0] in unchanged
+                    contents, reused = await self._fetch_listing(session, directory, semaphore, reuse_stored)
+                    if reused:
+                        unchanged.add(directory)
+                    self.report_fetched(len(contents))
+                    return [
+                        SourceEntry(item["path"], item["name"], item["type"] == "dir", item.get("size", 0), item.get("sha"))
+                        for item in contents if item["type"] in ("dir", "file")
+                    ]
+
+                async for listing in walk_listings(list_directory, path, self.max_concurrency):
+                    yield listing
+            await asyncio.to_thread(self.save_response_cache)
+
+    async def stream_ndjson(self) -> AsyncIterator[str]:
+        """One JSON node per line, for streaming dry runs"""
+        async with github_session() as session:
+            async for node in self.iter_nodes(session):
+                yield json.dumps(node) + "\n"
+
+    def maas_uploader(self) -> MaasUploader:
+        return MaasUploader(
+            self.maas_url,
+            mode=self.maas_upload_mode,
+            batch_size=int(os.getenv("MAAS_UPLOAD_BATCH_SIZE", "5000")),
+            retries=int(os.getenv("MAAS_UPLOAD_RETRIES", "3"))
+        )
 
     async def sync_repo_to_maas(self, dry_run=False) -> Dict[str, Any]:
         try:
-            async with aiohttp.ClientSession() as session:
-                tree = await self.build_tree(session)
-
-                if dry_run:
-                    return {
-                        "status": "success",
-                        "message": "Dry run completed.",
-                        "tree": tree
-                    }
-
-                async with session.post(self.maas_url, json=tree) as maas_response:
-                    if maas_response.status != 200:
-                        error = await maas_response.text()
-                        raise Exception(f"Failed to post to MAAS: {error}")
-
-                    return {
-                        "status": "success",
-                        "message": "GitHub repo structure uploaded to MAAS container."
-                    }
+            tree = await self.fetch_tree()
+
+            if dry_run:
+                # The CompactTree itself; serve it with compact_tree.iterencode_result
+                return {
+                    "status": "success",
+                    "message": "Dry run completed.",
+                    "tree": tree
+                }
+
+            async with maas_session() as session:
+                upload = await self.maas_uploader().upload(session, tree)
+
+            return {
+                "status": "success",
+                "message": "GitHub repo structure uploaded to MAAS container.",
+                "upload": upload
+            }
         except Exception as e:
             return {"status": "error", "message": str(e)}
         
-    def process_contents(self, cursor, container_id, parent_folder_id, path: str, integration_id: int, dry_run=False):
-        contents = self.get_contents(path)
-        for item in contents:
-            item_path = item["path"]
-            item_name = item["name"]
-            item_type = item["type"]
+    async def fetch_tree(self) -> CompactTree:
+        async with github_session() as session:
+            return await self.build_tree(session)
+
+    def sync_container(self, container_id: int, ref: Optional[str] = None) -> Dict[str, Any]:
+        """Bring an existing container up to date, applying only the rows that changed.
+        With ref, the tree of that commit is applied instead of the moving HEAD."""
+        if ref:
+            # A commit's recursive tree is exact; /contents listings would follow the branch
+            self.repo_ref, self.fetch_mode = ref, "trees"
+        connection = None
+        cursor = None
+        pool = get_pool(self.connection_config)
+        try:
+            # Runs on the app loop when served by the API, so the shared GitHub session is reused
+            tree = run_async(self.fetch_tree)
 
-            if item_type == "dir":
-                folder_id = str(uuid.uuid4()) if dry_run else self.insert_folder(cursor, container_id, item_name, parent_folder_id, item_path, integration_id, "system")
-                self.process_contents(cursor, container_id, folder_id if not dry_run else parent_folder_id, item_path, integration_id, dry_run)
+            connection = pool.acquire()
+            cursor = connection.cursor()
+            cursor.execute("SELECT IntegrationId FROM DMS_Containers WHERE ContainerId = ?", (container_id,))
+            container_row = cursor.fetchone()
+            if not container_row:
+                raise Exception(f"Container {container_id} not found in DMS_Containers")
 
-            elif item_type == "file":
-                if not dry_run:
-                    file_size = item.get("size", 0)
-                    file_type = item_name.split(".")[-1] if "." in item_name else "unknown"
-                    self.insert_file(cursor, parent_folder_id, container_id, item_name, item_path, file_size, file_type, integration_id, "system")
+            writer = self.create_batch_writer(cursor, container_id, "system")
+            counts = ContainerSync(cursor, writer).apply(tree)
+            if self.job:
+                self.job.add_written(counts["files_updated"] + counts["files_deleted"] + counts["folders_deleted"])
+            self.log_sync(cursor, container_row[0], "SUCCESS", f"GitHub repository changes synced: {counts}")
+            writer.commit(connection)
+            listing_cache.invalidate("containers")
 
-    def setup_container(self, dry_run: bool = False):
+            return {
+                "status": "success",
+                "message": "GitHub repository changes synced",
+                "container_id": container_id,
+                "changes": counts
+            }
+
+        except Exception as e:
+            if connection:
+                connection.rollback()
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                pool.release(connection)
+
+    async def fetch_file_metadata(self, paths: List[str], ref: str) -> Dict[str, Tuple[int, Optional[str]]]:
+        """(size, sha) at ref of each path; one listing per parent directory rather than one call per file"""
+        directories = sorted({path.rpartition("/")[0] for path in paths})
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        wanted = set(paths)
+
+        async def list_directory(directory: str):
+            async with semaphore:
+                contents, _ = await self._fetch_json(
+                    session, f"{self._contents_url(directory)}?ref={ref}",
+                    f"Failed to fetch contents for {directory} at {ref}"
+                )
+            return contents
+
+        async with github_session() as session:
+            listings = await asyncio.gather(*(list_directory(directory) for directory in directories))
+        self.report_fetched(sum(len(listing) for listing in listings))
+        return {
+            item["path"]: (item.get("size", 0), item.get("sha"))
+            for listing in listings for item in listing
+            if item["type"] == "file" and item["path"] in wanted
+        }
+
+    def apply_path_changes(self, container_id: int, changes: Dict[str, str], ref: str) -> Dict[str, Any]:
+        """Apply a push's "upsert"/"remove" file changes to a container, touching only those paths.
+
+        Falls back to a full diff (sync_container) when there are too many paths to look
+        up one directory at a time, or when the listings at ref don't match the event.
+        """
+        upsert_paths = [path for path, action in changes.items() if action == "upsert"]
+        if len(upsert_paths) > WEBHOOK_MAX_PATHS:
+            return self.sync_container(container_id, ref)
+        try:
+            metadata = run_async(lambda: self.fetch_file_metadata(upsert_paths, ref)) if upsert_paths else {}
+        except Exception as e:
+            logger.warning("Path lookup for container %s failed, running a full diff: %s", container_id, str(e))
+            return self.sync_container(container_id, ref)
+        if len(metadata) != len(upsert_paths):
+            return self.sync_container(container_id, ref)
+        removed = [path for path, action in changes.items() if action == "remove"]
+
+        connection = None
+        cursor = None
+        pool = get_pool(self.connection_config)
         try:
-            connection = pyhdb.connect(**self.connection_config)
+            connection = pool.acquire()
+            cursor = connection.cursor()
+            cursor.execute("SELECT IntegrationId FROM DMS_Containers WHERE ContainerId = ?", (container_id,))
+            container_row = cursor.fetchone()
+            if not container_row:
+                raise Exception(f"Container {container_id} not found in DMS_Containers")
+
+            writer = self.create_batch_writer(cursor, container_id, "system")
+            counts = ContainerSync(cursor, writer).apply_paths(metadata, removed)
+            if self.job:
+                self.job.add_written(counts["files_updated"] + counts["files_deleted"] + counts["folders_deleted"])
+            self.log_sync(cursor, container_row[0], "SUCCESS", f"GitHub push applied at {ref}: {counts}")
+            writer.commit(connection)
+            listing_cache.invalidate("containers")
+
+            return {
+                "status": "success",
+                "message": "GitHub push changes applied",
+                "container_id": container_id,
+                "changes": counts
+            }
+
+        except Exception as e:
+            if connection:
+                connection.rollback()
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                pool.release(connection)
+
+    def setup_container(self, dry_run: bool = False, container_id: Optional[int] = None):
+        if container_id is not None and not dry_run:
+            return self.sync_container(container_id)
+
+        connection = None
+        cursor = None
+        pool = get_pool(self.connection_config)
+        try:
+            connection = pool.acquire()
             cursor = connection.cursor()
 
             cursor.execute("SELECT IntegrationId FROM DMS_Integrations WHERE IntegrationName = 'GitHub'")
@@ -114,21 +537,32 @@ class GitHubIntegration:
             integration_id = integration_row[0]
             container_id = str(uuid.uuid4()) if dry_run else self.insert_container(cursor, integration_id, self.repo_name, f"{self.repo_owner}/{self.repo_name}", "system")
 
-            self.process_contents(cursor, container_id, None, "", integration_id, dry_run)
-
-            if not dry_run:
+            tree = None
+            if dry_run:
+                # Same trees call or concurrent walk as a real load, without the writes
+                tree = run_async(self.fetch_tree)
+                self.save_response_cache()
+            else:
+                # Fetches and row writes overlap; ingest flushes the writer when the repo is stored
+                writer = self.create_batch_writer(cursor, container_id, "system")
+                self.ingest(writer)
                 self.log_sync(cursor, integration_id, "SUCCESS", "GitHub repository data successfully stored in DMS database")
-                connection.commit()
+                writer.commit(connection)
+                listing_cache.invalidate("containers")
 
-            return {
+            result = {
                 "status": "success",
                 "message": "GitHub repository structure fetched",
                 "container_id": container_id,
                 "dry_run": dry_run
             }
+            if tree is not None:
+                # Kept compact; the endpoint streams it with iterencode_result
+                result["tree"] = tree
+            return result
 
         except Exception as e:
-            if not dry_run:
+            if connection and not dry_run:
                 connection.rollback()
             return {
                 "status": "error",
@@ -138,5 +572,4 @@ class GitHubIntegration:
             if cursor:
                 cursor.close()
             if connection:
-                connection.close()
-
+                pool.release(connection)
@@ -0,0 +1,133 @@
+import os
+import hmac
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from .github_integration import GitHubIntegration
+from ..helper.jobs import job_manager, SyncJob
+
+logger = logging.getLogger(__name__)
+
+# GitHub lists at most this many commits in a push payload; a longer push is cut short
+PUSH_COMMITS_LIMIT = 2048
+# Pushes to one container arriving within this many seconds are applied together
+WEBHOOK_COALESCE_SECONDS = float(os.getenv("GITHUB_WEBHOOK_COALESCE_SECONDS", "5"))
+
+
+def webhook_secret() -> Optional[str]:
+    """GITHUB_WEBHOOK_SECRET, read per delivery so a value loaded from .env after import counts"""
+    return os.getenv("GITHUB_WEBHOOK_SECRET") or None
+
+
+def verify_signature(body: bytes, signature: Optional[str], secret: Optional[str]) -> bool:
+    """Check X-Hub-Signature-256; without a secret or a signature nothing is accepted"""
+    if not secret or not signature:
+        return False
+    expected = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def needs_full_diff(payload: Dict[str, Any]) -> bool:
+    """Whether the push's commit list can't be trusted to describe the change: a force push
+    rewrites history it doesn't list, and a truncated list misses commits"""
+    commits = payload.get("commits") or []
+    return bool(payload.get("forced")) or len(commits) >= PUSH_COMMITS_LIMIT or (
+        not commits and payload.get("before") != payload.get("after")
+    )
+
+
+def push_changes(payload: Dict[str, Any]) -> Dict[str, str]:
+    """Net "upsert"/"remove" per file path over the commits of a push, oldest commit first"""
+    changes: Dict[str, str] = {}
+    for commit in payload.get("commits", []):
+        for path in commit.get("added", []) + commit.get("modified", []):
+            changes[path] = "upsert"
+        for path in commit.get("removed", []):
+            changes[path] = "remove"
+    return changes
+
+
+class PushCoalescer:
+    """Merges push events per container and applies each burst as one background job.
+
+    The first push for a container starts a timer; pushes arriving before it fires are
+    folded into the same change set (later actions on a path win), so a stream of small
+    pushes costs one path-level update per window rather than one per push or a resync.
+    A push whose commit list can't be trusted marks the whole window for a full diff.
+    """
+
+    def __init__(self, window: float = WEBHOOK_COALESCE_SECONDS):
+        self.window = window
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._timers: Dict[int, threading.Timer] = {}
+        self._apply_locks: Dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def add(self, container_id: int, repo_owner: str, repo_name: str, ref: str,
+            changes: Dict[str, str], pushes: int = 1, full_diff: bool = False) -> int:
+        """Queue changes for a container; returns how many paths are now pending for it"""
+        with self._lock:
+            pending = self._pending.setdefault(container_id, {"changes": {}, "pushes": 0, "full_diff": False})
+            pending["changes"].update(changes)
+            pending["pushes"] += pushes
+            pending["full_diff"] = pending["full_diff"] or full_diff
+            # The newest head commit describes every path of the merged set
+            pending.update(repo_owner=repo_owner, repo_name=repo_name, ref=ref)
+            if container_id not in self._timers:
+                timer = threading.Timer(self.window, self._flush, (container_id,))
+                timer.daemon = True
+                self._timers[container_id] = timer
+                timer.start()
+            return len(pending["changes"])
+
+    def _flush(self, container_id: int) -> None:
+        with self._lock:
+            self._timers.pop(container_id, None)
+            pending = self._pending.pop(container_id, None)
+            apply_lock = self._apply_locks.setdefault(container_id, threading.Lock())
+        if not pending:
+            return
+        job = job_manager.submit(
+            "github_push", self._apply, container_id, pending, apply_lock,
+            description=f"{pending['repo_owner']}/{pending['repo_name']}: {pending['pushes']} push(es), "
+                        f"{len(pending['changes'])} path(s)"
+        )
+        if job is None:
+            logger.warning("Job queue full, retrying push changes for container %s later", container_id)
+            with self._lock:
+                newer = self._pending.pop(container_id, None)
+            if newer:
+                # Pushes that arrived meanwhile are newer, so their actions win
+                pending["changes"].update(newer["changes"])
+                pending["pushes"] += newer["pushes"]
+                pending["ref"] = newer["ref"]
+                pending["full_diff"] = pending["full_diff"] or newer["full_diff"]
+            self.add(container_id, pending["repo_owner"], pending["repo_name"], pending["ref"],
+                     pending["changes"], pending["pushes"], pending["full_diff"])
+
+    @staticmethod
+    def _apply(job: SyncJob, container_id: int, pending: Dict[str, Any], apply_lock: threading.Lock):
+        # One update per container at a time; their row changes would otherwise interleave
+        with apply_lock:
+            github = GitHubIntegration(integration_config={
+                "repo_owner": pending["repo_owner"],
+                "repo_name": pending["repo_name"]
+            })
+            github.use_fresh_cache = False
+            github.attach_job(job)
+            if pending["full_diff"]:
+                return github.sync_container(container_id, pending["ref"])
+            return github.apply_path_changes(container_id, pending["changes"], pending["ref"])
+
+    def pending(self) -> Dict[int, Tuple[int, int]]:
+        """(pushes, paths) waiting per container"""
+        with self._lock:
+            return {
+                container_id: (pending["pushes"], len(pending["changes"]))
+                for container_id, pending in self._pending.items()
+            }
+
+
+push_coalescer = PushCoalescer()
@@ -0,0 +1,144 @@
+import time
+import asyncio
+from typing import Dict, Any, Optional, List, AsyncIterator, Awaitable, Callable, NamedTuple
+
+# Listings the writer may lag behind the fetchers before they wait
+INGEST_QUEUE_SIZE = 64
+
+
+class SourceEntry(NamedTuple):
+    """One folder or file of a source, with its path relative to the source root"""
+    path: str
+    name: str
+    is_folder: bool
+    size: int = 0
+    sha: Optional[str] = None
+
+
+async def walk_listings(list_directory: Callable[[str], Awaitable[List[SourceEntry]]], root: str = "",
+                        fetchers: int = 8, queue_size: int = INGEST_QUEUE_SIZE) -> AsyncIterator[List[SourceEntry]]:
+    """Every directory listing below root, fetched by a fixed pool of fetcher tasks.
+
+    A listing is queued before its subdirectories are handed to the pool, so a folder's
+    entry always arrives ahead of its contents. The output queue is bounded: when the
+    reader falls behind, the fetchers wait instead of buffering the source in memory.
+    """
+    directories: asyncio.Queue = asyncio.Queue()
+    listings: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    done = object()
+    directories.put_nowait(root)
+
+    async def fetch():
+        while True:
+            path = await directories.get()
+            try:
+                listing = await list_directory(path)
+                await listings.put(listing)
+                for entry in listing:
+                    if entry.is_folder:
+                        directories.put_nowait(entry.path)
+            except Exception as error:
+                # Handed to the reader, which re-raises it and stops the other fetchers
+                await listings.put(error)
+            finally:
+                directories.task_done()
+
+    async def finish():
+        await directories.join()
+        await listings.put(done)
+
+    tasks = [asyncio.create_task(fetch()) for _ in range(max(1, fetchers))]
+    tasks.append(asyncio.create_task(finish()))
+    try:
+        while True:
+            listing = await listings.get()
+            if listing is done:
+                break
+            if isinstance(listing, Exception):
+                raise listing
+            yield listing
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class IngestPipeline:
+    """Overlaps fetching a source with writing its rows.
+
+    A producer task drains the integration's listing iterator into a bounded queue while
+    the writer stage stores what is queued through a DMSBatchWriter on a worker thread,
+    so network and database latency overlap instead of adding up. A full queue holds the
+    fetchers back. A fetch error, a write error or a job cancel stops both sides and is
+    raised to the caller, who then rolls back the transaction.
+    """
+
+    def __init__(self, writer, root_path: str = "", file_type: Optional[Callable[[str], str]] = None,
+                 queue_size: int = INGEST_QUEUE_SIZE, job=None):
+        self.writer = writer
+        self.file_type = file_type
+        self.queue_size = queue_size
+        self.job = job
+        # Entries of the root itself belong at the top of the container
+        self.folder_ids: Dict[str, Optional[int]] = {root_path.strip("/"): None}
+        self.stats = {"listings": 0, "folders": 0, "files": 0, "write_seconds": 0.0, "writer_idle_seconds": 0.0}
+
+    def _write(self, batch: List[List[SourceEntry]]) -> None:
+        started = time.monotonic()
+        writer, folder_ids = self.writer, self.folder_ids
+        file_type = self.file_type or (lambda name: "unknown")
+        for listing in batch:
+            if self.job:
+                self.job.check_cancelled()
+            for entry in listing:
+                parent_id = folder_ids[entry.path.rpartition("/")[0]]
+                if entry.is_folder:
+                    folder_ids[entry.path] = writer.add_folder(entry.name, parent_id, entry.path)
+                    self.stats["folders"] += 1
+                else:
+                    writer.add_file(parent_id, entry.name, entry.path, entry.size, file_type(entry.name), entry.sha)
+                    self.stats["files"] += 1
+        self.stats["listings"] += len(batch)
+        self.stats["write_seconds"] += time.monotonic() - started
+
+    async def run(self, listings: AsyncIterator[List[SourceEntry]]) -> Dict[str, Any]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        done = object()
+
+        async def produce():
+            try:
+                async for listing in listings:
+                    await queue.put(listing)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Wake the writer so it stops and surfaces this error
+                await queue.put(done)
+                raise
+            await queue.put(done)
+
+        loop = asyncio.get_running_loop()
+        producer = asyncio.create_task(produce())
+        try:
+            finished = False
+            while not finished:
+                waited = time.monotonic()
+                batch = [await queue.get()]
+                # Everything already queued goes to the writer thread in one hand-off
+                while not queue.empty() and len(batch) < self.queue_size:
+                    batch.append(queue.get_nowait())
+                self.stats["writer_idle_seconds"] += time.monotonic() - waited
+                if batch[-1] is done:
+                    batch.pop()
+                    finished = True
+                if batch:
+                    await loop.run_in_executor(None, self._write, batch)
+            # Surfaces any fetch error
+            await producer
+            await loop.run_in_executor(None, self.writer.flush)
+        finally:
+            if not producer.done():
+                producer.cancel()
+
+        self.stats["write_seconds"] = round(self.stats["write_seconds"], 3)
+        self.stats["writer_idle_seconds"] = round(self.stats["writer_idle_seconds"], 3)
+        return self.stats
@@ -0,0 +1,125 @@
+import json
+import zlib
+import uuid
+import random
+import asyncio
+import logging
+from typing import Dict, Any, Iterable, Iterator, List, AsyncIterator
+
+import aiohttp
+
+from .compact_tree import CompactTree
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying; anything else fails the upload straight away
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def gzip_chunks(pieces: Iterable[str], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Gzip-compress JSON text pieces as they come, without joining the full document"""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    pending: List[str] = []
+    pending_size = 0
+    for piece in pieces:
+        pending.append(piece)
+        pending_size += len(piece)
+        if pending_size >= chunk_size:
+            data = compressor.compress("".join(pending).encode("utf-8"))
+            pending, pending_size = [], 0
+            if data:
+                yield data
+    data = compressor.compress("".join(pending).encode("utf-8")) + compressor.flush()
+    if data:
+        yield data
+
+
+def iter_gzip_json(obj: Any) -> Iterator[bytes]:
+    return gzip_chunks(json.JSONEncoder().iterencode(obj))
+
+
+async def gzip_tree_stream(tree: CompactTree) -> AsyncIterator[bytes]:
+    for chunk in gzip_chunks(tree.iterencode()):
+        yield chunk
+        # Let other requests run between chunks of a large tree
+        await asyncio.sleep(0)
+
+
+def batched(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class MaasUploader:
+    """Uploads a repository tree to the MAAS import endpoint.
+
+    Modes:
+    - "json": the whole tree as one JSON body (original behaviour)
+    - "gzip": the whole tree as one streamed, gzip-compressed JSON body
+    - "batched": bounded batches of flat nodes with parent references, each gzip-compressed
+      and retried on its own
+    """
+
+    def __init__(self, url: str, mode: str = "json", batch_size: int = 5000,
+                 retries: int = 3, backoff: float = 0.5):
+        self.url = url
+        self.mode = mode
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+
+    async def upload(self, session: aiohttp.ClientSession, tree: CompactTree) -> Dict[str, Any]:
+        if self.mode == "gzip":
+            await self._post(session, gzip_tree_stream(tree), {"Content-Encoding": "gzip"}, retry=False)
+            return {"mode": "gzip"}
+        if self.mode == "batched":
+            return await self._upload_batches(session, tree)
+        # A bytes body can be replayed, so this post is retried like a batch
+        await self._post(session, "".join(tree.iterencode()).encode("utf-8"), {})
+        return {"mode": "json"}
+
+    async def _upload_batches(self, session: aiohttp.ClientSession, tree: CompactTree) -> Dict[str, Any]:
+        upload_id = str(uuid.uuid4())
+        batches = 0
+        nodes = 0
+        for index, batch in enumerate(batched(tree.iter_flat(), self.batch_size)):
+            body = b"".join(iter_gzip_json({
+                "upload_id": upload_id,
+                "batch_index": index,
+                "root_id": tree.node_id(tree.ROOT),
+                "nodes": batch
+            }))
+            await self._post(session, body, {"Content-Encoding": "gzip"})
+            batches += 1
+            nodes += len(batch)
+        # Tells MAAS that every batch of this upload has arrived
+        await self._post(session, json.dumps({
+            "upload_id": upload_id, "complete": True, "batches": batches, "nodes": nodes
+        }).encode("utf-8"), {})
+        return {"mode": "batched", "upload_id": upload_id, "batches": batches, "nodes": nodes}
+
+    async def _post(self, session: aiohttp.ClientSession, data, headers: Dict[str, str],
+                    retry: bool = True) -> None:
+        """POST one body; streamed bodies can't be replayed, so those are sent once"""
+        attempts = self.retries + 1 if retry else 1
+        headers = dict(headers, **{"Content-Type": "application/json"})
+        for attempt in range(attempts):
+            try:
+                async with session.post(self.url, data=data, headers=headers) as response:
+                    if response.status in (200, 201, 202):
+                        return
+                    error = await response.text()
+                    if response.status not in RETRYABLE_STATUSES or attempt == attempts - 1:
+                        raise Exception(f"Failed to post to MAAS: {error}")
+            except aiohttp.ClientError as e:
+                if attempt == attempts - 1:
+                    raise Exception(f"Failed to post to MAAS: {e}")
+            delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+            logger.warning("MAAS upload attempt %s failed, retrying in %.2fs", attempt + 1, delay)
+            await asyncio.sleep(delay)
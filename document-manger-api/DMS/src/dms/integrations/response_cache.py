@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import tempfile
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# "" disables the cache
+RESPONSE_CACHE_PATH = os.getenv(
+    "GITHUB_RESPONSE_CACHE", os.path.join(tempfile.gettempdir(), "dms_github_cache.sqlite3")
+)
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("GITHUB_RESPONSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+RESPONSE_CACHE_MAX_AGE = float(os.getenv("GITHUB_RESPONSE_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+# Responses younger than this are served without asking GitHub at all
+RESPONSE_CACHE_FRESH_SECONDS = float(os.getenv("GITHUB_RESPONSE_CACHE_FRESH_SECONDS", "60"))
+
+
+class ResponseCache:
+    """GitHub API responses (body, ETag, fetch time) persisted in SQLite by URL.
+
+    Responses fetched within fresh_seconds are served straight from disk; older ones are
+    revalidated with If-None-Match, and a 304 (which GitHub does not count against the rate
+    limit) reuses the stored body. Entries older than max_age are dropped, and the least
+    recently used go first once the bodies exceed max_bytes. Survives restarts, so cold
+    starts and repeated dry runs mostly read from disk.
+
+    Every write commits on its own, so the database is never locked for longer than one
+    statement and other processes sharing the file only wait briefly. The cache is an
+    optimisation: a failing read counts as a miss and a failing write is dropped.
+    """
+
+    _caches: Dict[str, "ResponseCache"] = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self, path: str, max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+                 max_age: float = RESPONSE_CACHE_MAX_AGE, fresh_seconds: float = RESPONSE_CACHE_FRESH_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.fresh_seconds = fresh_seconds
+        self._lock = threading.Lock()
+        # Autocommit; save() opens its own short transaction
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY, etag TEXT, body BLOB NOT NULL, size INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)")
+        self.fresh_hits = 0
+        self.not_modified = 0
+        self.fetched = 0
+
+    @classmethod
+    def for_path(cls, path: str) -> "ResponseCache":
+        """One shared cache per file, so concurrent integrations use one connection"""
+        with cls._caches_lock:
+            cache = cls._caches.get(path)
+            if cache is None:
+                cache = cls._caches[path] = cls(path)
+            return cache
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """{etag, body, fetched_at} of the stored response, unless missing or past max_age"""
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT etag, body, fetched_at FROM responses WHERE url = ?", (url,)
+                ).fetchone()
+                if row is None or time.time() - row[2] > self.max_age:
+                    return None
+                self._db.execute("UPDATE responses SET used_at = ? WHERE url = ?", (time.time(), url))
+            return {"etag": row[0], "body": json.loads(zlib.decompress(row[1])), "fetched_at": row[2]}
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            logger.warning("Response cache read of %s failed, fetching instead: %s", url, e)
+            return None
+
+    def is_fresh(self, cached: Dict[str, Any]) -> bool:
+        """Whether a get() result is recent enough to skip the request entirely"""
+        if self.fresh_seconds <= 0 or time.time() - cached["fetched_at"] > self.fresh_seconds:
+            return False
+        with self._lock:
+            self.fresh_hits += 1
+        return True
+
+    def put(self, url: str, etag: Optional[str], body: Any) -> None:
+        data = zlib.compress(json.dumps(body).encode("utf-8"))
+        now = time.time()
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (url, etag, body, size, fetched_at, used_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, etag, data, len(data), now, now)
+                )
+                self.fetched += 1
+        except sqlite3.Error as e:
+            logger.warning("Response cache write of %s failed: %s", url, e)
+
+    def revalidated(self, url: str) -> None:
+        """A 304 confirmed the stored body; it counts as freshly fetched again"""
+        try:
+            with self._lock:
+                self._db.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+                self.not_modified += 1
+        except sqlite3.Error as e:
+            logger.warning("Response cache write of %s failed: %s", url, e)
+
+    def save(self) -> None:
+        """Enforce the age and size limits in one short transaction"""
+        try:
+            with self._lock:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    self._evict()
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+                self._db.execute("COMMIT")
+        except sqlite3.Error as e:
+            logger.warning("Response cache cleanup failed: %s", e)
+
+    def _evict(self) -> None:
+        self._db.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - self.max_age,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            excess = total - self.max_bytes
+            evict = []
+            for url, size in self._db.execute("SELECT url, size FROM responses ORDER BY used_at"):
+                if excess <= 0:
+                    break
+                evict.append((url,))
+                excess -= size
+            self._db.executemany("DELETE FROM responses WHERE url = ?", evict)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            requests = self.fresh_hits + self.not_modified + self.fetched
+            from_disk = self.fresh_hits + self.not_modified
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "max_age_seconds": self.max_age,
+                "fresh_seconds": self.fresh_seconds,
+                "fresh_hits": self.fresh_hits,
+                "not_modified": self.not_modified,
+                "fetched": self.fetched,
+                "hit_ratio": round(from_disk / requests, 4) if requests else None
+            }
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    return ResponseCache.for_path(RESPONSE_CACHE_PATH) if RESPONSE_CACHE_PATH else None
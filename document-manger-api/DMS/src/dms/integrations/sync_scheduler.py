@@ -0,0 +1,215 @@
+import os
+import time
+import heapq
+import itertools
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, List, Callable
+
+from .github_integration import GitHubIntegration
+from .compact_tree import tree_as_dict
+from ..helper.jobs import SyncJob
+from ..helper.request_budget import BatchBudget, RequestBudget, get_budget, token_key
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_WORKERS = int(os.getenv("DMS_SCHEDULER_WORKERS", "8"))
+
+
+class RepoTarget:
+    """One repository to sync; access_token falls back to GITHUB_TOKEN"""
+
+    def __init__(self, repo_owner: str, repo_name: str, access_token: Optional[str] = None,
+                 priority: int = 0, container_id: Optional[int] = None, dry_run: bool = False):
+        self.repo_owner = repo_owner
+        self.repo_name = repo_name
+        self.access_token = access_token or os.getenv("GITHUB_TOKEN")
+        self.priority = priority
+        self.container_id = container_id
+        self.dry_run = dry_run
+
+    @property
+    def name(self) -> str:
+        return f"{self.repo_owner}/{self.repo_name}"
+
+
+class RepoRun:
+    """Progress of one target; its SyncJob collects the fetch/write counters of the integration"""
+
+    def __init__(self, target: RepoTarget, budget: Optional[RequestBudget]):
+        self.target = target
+        self.budget = budget
+        self.job = SyncJob("github_repo_sync", target.name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        job = self.job.to_dict()
+        elapsed = job["elapsed_seconds"]
+        return {
+            "repo": self.target.name,
+            "token": token_key(self.target.access_token),
+            "priority": self.target.priority,
+            "state": job["state"],
+            "items_fetched": job["items_fetched"],
+            "rows_written": job["rows_written"],
+            "elapsed_seconds": elapsed,
+            "items_per_second": round(job["items_fetched"] / elapsed, 2) if elapsed else None,
+            "errors": job["errors"],
+            "result": job["result"]
+        }
+
+
+class SyncScheduler:
+    """Syncs many repositories concurrently within the limits of each access token.
+
+    Every token has one RequestBudget (see helper.request_budget) holding its concurrency
+    slots and request bucket, shared with any other sync using the token. Among tokens with
+    a free slot the highest-priority waiting repo goes next; tokens whose best repos tie are
+    served round-robin, so one token with many repos can't starve the others.
+
+    max_concurrency_per_token and request_budget_per_token tighten the limits of each token
+    for this batch only (see BatchBudget); other syncs keep the process-wide limits.
+    """
+
+    def __init__(self, max_workers: int = SCHEDULER_WORKERS,
+                 integration_factory: Callable[[RepoTarget], GitHubIntegration] = None,
+                 max_concurrency_per_token: Optional[int] = None,
+                 request_budget_per_token: Optional[int] = None):
+        self.max_workers = max_workers
+        self.integration_factory = integration_factory or self.github_integration
+        self.max_concurrency_per_token = max_concurrency_per_token
+        self.request_budget_per_token = request_budget_per_token
+
+    @staticmethod
+    def github_integration(target: RepoTarget) -> GitHubIntegration:
+        return GitHubIntegration(integration_config={
+            "access_token": target.access_token,
+            "repo_owner": target.repo_owner,
+            "repo_name": target.repo_name
+        })
+
+    def budget(self, token: Optional[str]) -> RequestBudget:
+        shared = get_budget(token)
+        if self.max_concurrency_per_token is None and self.request_budget_per_token is None:
+            return shared
+        return BatchBudget(shared, self.max_concurrency_per_token, self.request_budget_per_token)
+
+    def run(self, job: SyncJob, targets: List[RepoTarget]) -> Dict[str, Any]:
+        budgets: Dict[str, RequestBudget] = {}
+        unusable: Dict[str, str] = {}
+        runs = []
+        for target in targets:
+            key = token_key(target.access_token)
+            if key not in budgets and key not in unusable:
+                try:
+                    budgets[key] = self.budget(target.access_token)
+                except ValueError as e:
+                    # A token without slots or requests would wait forever; its repos fail instead
+                    unusable[key] = str(e)
+            run = RepoRun(target, budgets.get(key))
+            if key in unusable:
+                run.job.errors.append(unusable[key])
+                run.job.state = "failed"
+            runs.append(run)
+        # Per token: heap of (-priority, submission order, run)
+        queues: Dict[str, list] = {}
+        order = itertools.count()
+        for run in runs:
+            if run.budget is None:
+                continue
+            heapq.heappush(queues.setdefault(token_key(run.target.access_token), []),
+                           (-run.target.priority, next(order), run))
+        rotation = deque(queues)
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dms-repo-sync") as pool:
+            active = {}
+            while rotation or active:
+                if job.cancel_requested:
+                    for run in active.values():
+                        run.job.cancel()
+                    for key in rotation:
+                        for _, _, run in queues[key]:
+                            run.job.state = "cancelled"
+                    rotation.clear()
+
+                while len(active) < self.max_workers:
+                    run = self._next_run(queues, rotation)
+                    if run is None:
+                        break
+                    active[pool.submit(self._sync, run)] = run
+
+                if not active:
+                    # Every waiting token is at its concurrency limit through other syncs
+                    time.sleep(0.5)
+                    continue
+                done, _ = wait(active, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    run = active.pop(future)
+                    run.budget.finish()
+                    job.add_fetched(run.job.items_fetched)
+                    job.add_written(run.job.rows_written)
+                if done:
+                    # Per-repo progress is visible through the job status endpoint while the batch runs
+                    job.result = self.summary(runs, time.monotonic() - started, job.cancel_requested)
+
+        return self.summary(runs, time.monotonic() - started, job.cancel_requested)
+
+    @staticmethod
+    def _next_run(queues: Dict[str, list], rotation: deque) -> Optional[RepoRun]:
+        best = None
+        for position, key in enumerate(rotation):
+            head = queues[key][0]
+            if (best is None or head[0] < best[0][0]) and head[2].budget.has_slot():
+                best = (head, position, key)
+        if best is None or not best[0][2].budget.try_start():
+            return None
+        _, position, key = best
+        run = heapq.heappop(queues[key])[2]
+        # Served tokens go to the back, so equal priorities alternate between tokens
+        del rotation[position]
+        if queues[key]:
+            rotation.append(key)
+        return run
+
+    def _sync(self, run: RepoRun) -> None:
+        job = run.job
+        job.state = "running"
+        job._started = time.monotonic()
+        try:
+            integration = self.integration_factory(run.target)
+            integration.attach_job(job)
+            # The batch's limits, when it set any, apply to this sync's requests
+            integration.request_budget = run.budget
+            result = tree_as_dict(integration.setup_container(run.target.dry_run, run.target.container_id))
+            job.result = result
+            if isinstance(result, dict) and result.get("status") == "error":
+                job.errors.append(result.get("message", "unknown error"))
+                job.state = "cancelled" if job.cancel_requested else "failed"
+            else:
+                job.state = "succeeded"
+        except Exception as e:
+            logger.error("Sync of %s failed: %s", run.target.name, str(e), exc_info=True)
+            job.errors.append(str(e))
+            job.state = "cancelled" if job.cancel_requested else "failed"
+        finally:
+            job._finished = time.monotonic()
+
+    @staticmethod
+    def summary(runs: List[RepoRun], elapsed: float, cancelled: bool) -> Dict[str, Any]:
+        repos = [run.to_dict() for run in runs]
+        failed = [repo["repo"] for repo in repos if repo["state"] == "failed"]
+        items = sum(repo["items_fetched"] for repo in repos)
+        if cancelled:
+            message = "Cancelled"
+        elif failed:
+            message = f"{len(failed)} of {len(repos)} repositories failed: {', '.join(failed)}"
+        else:
+            message = f"{len(repos)} repositories synced"
+        return {
+            "status": "error" if failed or cancelled else "success",
+            "message": message,
+            "elapsed_seconds": round(elapsed, 3),
+            "items_per_second": round(items / elapsed, 2) if elapsed else None,
+            "repos": repos
+        }
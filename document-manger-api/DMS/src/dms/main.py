@@ -1,29 +1,60 @@
-from fastapi import FastAPI, HTTPException, status , Query 
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, status , Query , Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import pyhdb
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import os
 from dotenv import load_dotenv
-import requests
 from pydantic import BaseModel
-from concurrent.futures import ThreadPoolExecutor
+from fastapi.concurrency import run_in_threadpool
 import logging
+import gzip
+import json
+import time
+from contextlib import asynccontextmanager
+
+# Load environment variables before the package modules below read their settings
+load_dotenv()
 
-from src.dms.helper.token import get_access_token
+from src.dms.helper.token import get_access_token_async
 
-from .models.integration_models import IntegrationCreate, ContainerCreate
+from .models.integration_models import IntegrationCreate, ContainerCreate, RepoSyncBatch, FolderMove
 from .integrations.base_integration import BaseIntegration
 from .integrations.github_integration import GitHubIntegration
+from .integrations.filesystem_integration import FilesystemIntegration
+from .integrations.sync_scheduler import SyncScheduler, RepoTarget
+from .integrations.response_cache import get_response_cache
+from .integrations.compact_tree import iterencode_result, tree_as_dict
+from .integrations.github_webhook import push_coalescer, push_changes, needs_full_diff, verify_signature, webhook_secret
+from .helper.db_pool import hana_connection, init_pool, get_pool, close_pool, run_db
+from .helper.maas_client import post_model
+from .helper.http_pools import open_http_pools, close_http_pools
+from .helper.jobs import job_manager, SyncJob
+from .helper.pagination import parse_fields, fetch_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from .helper.ttl_cache import listing_cache
+from .helper.request_budget import budget_stats
+from .helper.search_index import search_indexes, PathSearchIndex, FOLDER, FILE
+from .helper.folder_tree import (
+    list_subtree, subtree_size, move_folder, browse_tree, ensure_path_keys, path_keys_checked, MAX_TREE_DEPTH
+)
 
-# Load environment variables
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared HANA and HTTP connection pools on startup and drain them on shutdown"""
+    await run_in_threadpool(init_pool, hana_connection())
+    await open_http_pools()
+    yield
+    job_manager.shutdown()
+    await close_http_pools()
+    await run_in_threadpool(close_pool)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="DMS API",
     description="Document Management System API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -35,20 +66,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Database configuration
-HANA_CONNECTION = {
-    "host": os.getenv("HANA_HOST"),
-    "port": int(os.getenv("HANA_PORT", "30015")),
-    "user": os.getenv("HANA_USER"),
-    "password": os.getenv("HANA_PASSWORD")
-}
-
 # Integration type mapping
 INTEGRATION_CLASSES = {
     "github": GitHubIntegration,
+    "filesystem": FilesystemIntegration,
     # Add other integration classes here
 }
 
+# Columns the list endpoints can project with fields=
+INTEGRATION_FIELDS = {
+    "IntegrationId": "IntegrationId",
+    "IntegrationName": "IntegrationName",
+    "IntegrationType": "IntegrationType",
+    "ApiUrl": "ApiUrl",
+    "CreatedAt": "CreatedAt",
+    "CreatedBy": "CreatedBy"
+}
+CONTAINER_FIELDS = {
+    "ContainerId": "c.ContainerId",
+    "ContainerName": "c.ContainerName",
+    "RootPath": "c.RootPath",
+    "CreatedAt": "c.CreatedAt",
+    "CreatedBy": "c.CreatedBy",
+    "IntegrationName": "i.IntegrationName"
+}
+
 
 #Fetching the structure from Github \ integrations
 
@@ -56,28 +98,110 @@ class GitHubRequest(BaseModel):
     connection_config: Dict[str, Any]     #can be added 
     integration_config: Dict[str, Any]  #  repo_owner, repo_name  example 
 
-from fastapi.concurrency import run_in_threadpool
+def job_accepted(job: Optional[SyncJob]) -> JSONResponse:
+    """202 response pointing at the job status endpoint, or 429 when the job queue is full"""
+    if job is None:
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"detail": "Too many sync jobs queued, retry later"}
+        )
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"job_id": job.job_id, "status_url": f"/api/v1/jobs/{job.job_id}"}
+    )
+
+def run_github_load(job: SyncJob, github: GitHubIntegration, dry_run: bool, container_id: Optional[int]):
+    github.attach_job(job)
+    return tree_as_dict(github.setup_container(dry_run, container_id))
+
+def scan_container(job: SyncJob, integration: BaseIntegration, container_id: int, root_path: str, created_by: str):
+    """Scan an integration's contents into an already committed container"""
+    integration.attach_job(job)
+    pool = get_pool()
+    connection = pool.acquire()
+    cursor = connection.cursor()
+    try:
+        writer = integration.create_batch_writer(cursor, container_id, created_by)
+        integration.ingest(writer, root_path)
+        writer.commit(connection)
+        listing_cache.invalidate("containers")
+        return {
+            "status": "success",
+            "message": "Container contents scanned successfully",
+            "container_id": container_id
+        }
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        pool.release(connection)
 
 @app.get("/github/load", tags=["GitHub"])
-async def read_github_repo(dry_run: bool = Query(False, description="Set to true to skip DB insert")):
+async def read_github_repo(
+    dry_run: bool = Query(False, description="Set to true to skip DB insert"),
+    container_id: Optional[int] = Query(None, description="Existing container to sync incrementally"),
+    stream: bool = Query(False, description="With dry_run, stream nodes as NDJSON while they are discovered"),
+    background: bool = Query(False, description="Run as a background job and return 202 with its job ID")
+):
     """
     Compatible endpoint to load GitHub repository structure into HANA tables.
     Params:
     - dry_run: If True, fetches structure without writing to DB.
+    - container_id: If set, diffs the repo against this container and applies only the changes.
+    - stream: If True with dry_run, returns one node per line (id, parent_id, name, type, path, size).
+    - background: If True, returns 202 right away; poll GET /api/v1/jobs/{job_id} for progress.
     """
     github = GitHubIntegration()
 
+    if dry_run and stream:
+        return StreamingResponse(github.stream_ndjson(), media_type="application/x-ndjson")
+
+    if background:
+        return job_accepted(job_manager.submit(
+            "github_load", run_github_load, github, dry_run, container_id,
+            description=f"{github.repo_owner}/{github.repo_name}"
+        ))
+
     try:
-        result = await run_in_threadpool(github.setup_container, dry_run)  # Runs in a separate thread to avoid blocking
+        result = await run_in_threadpool(github.setup_container, dry_run, container_id)  # Runs in a separate thread to avoid blocking
 
         if result["status"] == "error":
             raise HTTPException(status_code=500, detail=result["message"])
 
+        if "tree" in result:
+            # Encoded while it is sent, so the nested dicts of a large repo are never all in memory
+            return StreamingResponse(iterencode_result(result), media_type="application/json")
         return JSONResponse(status_code=status.HTTP_200_OK, content=result)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+@app.post("/api/v1/github/sync", tags=["GitHub"])
+async def sync_github_repos(batch: RepoSyncBatch):
+    """
+    Sync many repositories as one background job.
+    Each access token gets its own concurrency limit and request budget; higher-priority
+    repos start first and tokens take turns. GET /api/v1/jobs/{job_id} reports per-repo
+    state and throughput.
+    """
+    if not batch.targets:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No repositories given")
+
+    targets = [
+        RepoTarget(t.repo_owner, t.repo_name, t.access_token, t.priority, t.container_id, t.dry_run)
+        for t in batch.targets
+    ]
+    scheduler = SyncScheduler(
+        max_concurrency_per_token=batch.max_concurrency_per_token,
+        request_budget_per_token=batch.request_budget_per_token
+    )
+
+    return job_accepted(job_manager.submit(
+        "github_multi_sync", scheduler.run, targets,
+        description=f"{len(targets)} repositories"
+    ))
+
 #app = FastAPI()
 
 #@app.get("/github/load", tags=["GitHub"])
@@ -91,56 +215,164 @@ async def root():
     """Root endpoint to check if API is running"""
     return {"message": "DMS API is running"}
 
+@app.get("/api/v1/db/pool")
+async def db_pool_stats():
+    """HANA connection pool usage"""
+    return get_pool().stats()
+
+@app.get("/api/v1/cache/stats")
+async def listing_cache_stats():
+    """Hit/miss counters of the integration/container listing cache"""
+    return listing_cache.stats()
+
+def find_repo_containers(connection, root_path: str):
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT ContainerId FROM DMS_Containers WHERE RootPath = ?", (root_path,))
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+@app.post("/api/v1/github/webhook", tags=["GitHub"])
+async def github_webhook(request: Request):
+    """
+    Receives GitHub push events and applies the added/modified/removed paths to every
+    container synced from the repository. Pushes to the same container within
+    GITHUB_WEBHOOK_COALESCE_SECONDS are merged and applied as one background job.
+    """
+    secret = webhook_secret()
+    if not secret:
+        # Unsigned deliveries would let anyone trigger DB writes
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="GITHUB_WEBHOOK_SECRET is not configured"
+        )
+    body = await request.body()
+    if not verify_signature(body, request.headers.get("X-Hub-Signature-256"), secret):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook signature")
+
+    event = request.headers.get("X-GitHub-Event")
+    if event == "ping":
+        return {"message": "pong"}
+    if event != "push":
+        return {"message": f"Ignored {event} event"}
+
+    payload = json.loads(body)
+    repository = payload["repository"]
+    # Containers follow the default branch, like a full load of HEAD
+    if payload.get("ref") != f"refs/heads/{repository.get('default_branch')}" or payload.get("deleted"):
+        return {"message": f"Ignored push to {payload.get('ref')}"}
+
+    # Force pushes and truncated commit lists are diffed in full at the pushed commit
+    full_diff = needs_full_diff(payload)
+    changes = {} if full_diff else push_changes(payload)
+    container_ids = await run_db(find_repo_containers, repository["full_name"])
+    if not (changes or full_diff) or not container_ids:
+        return {"message": "Nothing to apply", "containers": container_ids}
+
+    owner, name = repository["owner"].get("login") or repository["owner"]["name"], repository["name"]
+    pending = {
+        container_id: push_coalescer.add(container_id, owner, name, payload["after"], changes, full_diff=full_diff)
+        for container_id in container_ids
+    }
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"message": "Push queued", "paths": len(changes), "full_diff": full_diff, "pending_paths": pending}
+    )
+
+@app.get("/api/v1/github/budgets")
+async def github_budgets():
+    """Concurrency and request budget usage per GitHub access token (keyed by token hash)"""
+    return budget_stats()
+
+@app.get("/api/v1/github/cache/stats")
+async def github_response_cache_stats():
+    """Size and hit ratio of the on-disk GitHub response cache"""
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return dict(cache.stats(), enabled=True)
+
+@app.get("/api/v1/jobs")
+async def list_jobs():
+    """List recent sync jobs"""
+    return {"jobs": [job.to_dict() for job in job_manager.list()]}
+
+@app.get("/api/v1/jobs/{job_id}")
+async def get_job(job_id: str):
+    """State, items fetched, rows written, elapsed time and errors of a sync job"""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+@app.post("/api/v1/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Request cancellation; the job stops at its next progress checkpoint"""
+    job = job_manager.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+if os.getenv("ENV", "PROD").upper() == "LOCAL":
+    # Stand-in for the MAAS import endpoint, so uploads can be exercised without MAAS.
+    # Point MAAS_IMPORT_URL at http://localhost:<port>/local/maas/import to use it.
+    # upload_id -> {batch_index: node count}; a retried batch replaces its first copy
+    local_maas_uploads: Dict[str, Dict[int, int]] = {}
+
+    def count_tree_nodes(node: Dict[str, Any]) -> int:
+        return 1 + sum(count_tree_nodes(child) for child in node.get("children", []))
+
+    @app.post("/local/maas/import", tags=["Local"])
+    async def local_maas_import(request: Request):
+        """Accepts the plain, gzip and batched upload formats and reports what arrived"""
+        raw = await request.body()
+        body = gzip.decompress(raw) if request.headers.get("Content-Encoding") == "gzip" else raw
+        payload = json.loads(body)
+        upload_id = payload.get("upload_id")
+        if upload_id is None:
+            return {"received_nodes": count_tree_nodes(payload), "received_bytes": len(raw)}
+        batches = local_maas_uploads.setdefault(upload_id, {})
+        if not payload.get("complete"):
+            batches[payload["batch_index"]] = len(payload["nodes"])
+        upload = {"batches": len(batches), "nodes": sum(batches.values())}
+        if payload.get("complete"):
+            local_maas_uploads.pop(upload_id, None)
+            if upload != {"batches": payload["batches"], "nodes": payload["nodes"]}:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail=f"Upload {upload_id} incomplete: received {upload}")
+            return {"upload_id": upload_id, "complete": True, **upload}
+        return {"upload_id": upload_id, "batch_index": payload["batch_index"], **upload}
+
 @app.post("/api/v1/integrations")
 async def create_integration(integration: IntegrationCreate):
     """
-    Create a new integration entry in the Integrations table
+    Create a new integration entry in the MAAS dms_integrations model
     """
     try:
-        connection = pyhdb.connect(**HANA_CONNECTION)
-        cursor = connection.cursor()
+        payload = {
+            "INTEGRATIONNAME":integration.integration_name,
+            "INTEGRATIONTYPE":integration.integration_type,
+            "APIURL":integration.api_url,
+            "ACCESSTOKEN":integration.access_token,
+            "CREATED_BY":integration.created_by
+        }
+
+        # Token refresh and the MAAS call both run without blocking the event loop
+        access_token = await get_access_token_async()
+        status_code, content_type, response_data = await post_model("dms_integrations", payload, access_token)
+
+        if status_code == 200:
+            # Container listings join integration names, so both are stale now
+            listing_cache.invalidate("integrations", "containers")
+            if content_type == "application/json":
+                # Get the generated integration ID
+                integration_id = response_data.get("result", {}).get("id")
+            else:
+                logger.error("Unexpected MAAS response creating integration: %s", response_data)
+                return None
 
-        try:
-            # Insert into Integrations table
-            query = """
-                INSERT INTO Integrations (
-                    IntegrationName, IntegrationType, ApiUrl, AccessToken, CreatedBy
-                ) VALUES (?, ?, ?, ?, ?)
-            """
-            payload = {
-                "INTEGRATIONNAME":integration.integration_name,
-                "INTEGRATIONTYPE":integration.integration_type,
-                "APIURL":integration.api_url,
-                "ACCESSTOKEN":integration.access_token,
-                "CREATED_BY":integration.created_by
-            }
-            
-            url = "https://maas.cfapps.eu10-004.hana.ondemand.com/models/dms_integrations"
-            
-            # Get the generated integration ID
-            access_token = get_access_token() 
-            headers = {
-                "Content-Type": "application/json",
-                "accept": "application/json",
-                "Authorization": f"Bearer {access_token}"
-            }
-            response = requests.post(
-                url=url,
-                headers=headers,
-                json=payload,
-                verify=False  
-            )          
-
-            if response.status_code == 200:            
-                if response.headers.get("Content-Type") == "application/json":
-                    response_data = response.json()                
-                    integration_id = response_data.get("result", {}).get("id")                
-                else:
-                    response_data = response.text
-                    print("Response Text:", response_data)
-                    return None                         
-            
-                return JSONResponse(
+            return JSONResponse(
                 status_code=status.HTTP_201_CREATED,
                 content={
                     "message": "Integration created successfully",
@@ -148,196 +380,422 @@ async def create_integration(integration: IntegrationCreate):
                 }
             )
 
-        except Exception as e:
-            connection.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to create integration: {str(e)}"
-            )
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                connection.close()
-
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Database connection error: {str(e)}"
+            detail=f"Failed to create integration: {str(e)}"
         )
 
-@app.post("/api/v1/containers")
-async def create_container(container: ContainerCreate):
-    """
-    Create a new container and scan its contents
-    """
+def insert_container_row(connection, container: ContainerCreate):
+    """Verify the integration and insert the container; returns (container_id, integration instance)"""
+    cursor = connection.cursor()
     try:
-        connection = pyhdb.connect(**HANA_CONNECTION)
-        cursor = connection.cursor()
+        # First, verify the integration exists
+        cursor.execute(
+            "SELECT IntegrationType, ApiUrl, AccessToken FROM Integrations WHERE IntegrationId = ?",
+            (container.integration_id,)
+        )
+        integration_row = cursor.fetchone()
 
-        try:
-            # First, verify the integration exists
-            cursor.execute(
-                "SELECT IntegrationType, ApiUrl, AccessToken FROM Integrations WHERE IntegrationId = ?",
-                (container.integration_id,)
+        if not integration_row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Integration with ID {container.integration_id} not found"
             )
-            integration_row = cursor.fetchone()
-            
-            if not integration_row:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Integration with ID {container.integration_id} not found"
-                )
 
-            integration_type, api_url, access_token = integration_row
-
-            # Insert container
-            query = """
-                INSERT INTO Containers (
-                    ContainerName, IntegrationId, RootPath, CreatedBy
-                ) VALUES (?, ?, ?, ?)
-            """
-            params = (
-                container.container_name,
-                container.integration_id,
-                container.root_path,
-                container.created_by
+        integration_type, api_url, access_token = integration_row
+
+        integration_class = INTEGRATION_CLASSES.get(integration_type.lower())
+        if not integration_class:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported integration type: {integration_type}"
             )
-            
-            cursor.execute(query, params)
-            
-            # Get the generated container ID
-            cursor.execute("SELECT CURRENT_IDENTITY_VALUE() FROM Containers")
-            container_id = cursor.fetchone()[0]
-
-            # Initialize the appropriate integration class based on integration type
-            integration_config = {
-                "api_url": api_url,
-                "access_token": access_token,
-                "root_path": container.root_path
-            }
 
-            integration_class = INTEGRATION_CLASSES.get(integration_type.lower())
-            if not integration_class:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Unsupported integration type: {integration_type}"
-                )
+        # Insert container
+        query = """
+            INSERT INTO Containers (
+                ContainerName, IntegrationId, RootPath, CreatedBy
+            ) VALUES (?, ?, ?, ?)
+        """
+        params = (
+            container.container_name,
+            container.integration_id,
+            container.root_path,
+            container.created_by
+        )
 
+        cursor.execute(query, params)
+
+        # Get the generated container ID
+        cursor.execute("SELECT CURRENT_IDENTITY_VALUE() FROM Containers")
+        container_id = cursor.fetchone()[0]
+
+        # Initialize the appropriate integration class based on integration type
+        integration_config = {
+            "api_url": api_url,
+            "access_token": access_token,
+            "root_path": container.root_path
+        }
+        try:
             integration = integration_class(
-                connection_config=HANA_CONNECTION,
+                connection_config=hana_connection(),
                 integration_config=integration_config
             )
-
+        except ValueError as e:
+            # e.g. a filesystem root outside DMS_FILESYSTEM_ROOT; nothing is committed yet
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return container_id, integration
+    finally:
+        cursor.close()
+
+def create_and_scan_container(container: ContainerCreate) -> int:
+    """Insert the container and store its folder/file structure in one transaction.
+
+    Runs on the default thread pool, not through run_db: the scan mostly waits on the
+    source, and would otherwise hold a DB executor worker for its whole duration.
+    """
+    with get_pool().connection() as connection:
+        container_id, integration = insert_container_row(connection, container)
+        cursor = connection.cursor()
+        try:
             # Scan and store folder/file structure
-            integration.process_contents(cursor, container_id, None, container.root_path)
-            
-            connection.commit()
-            
-            return JSONResponse(
-                status_code=status.HTTP_201_CREATED,
-                content={
-                    "message": "Container created and contents scanned successfully",
-                    "container_id": container_id
-                }
-            )
-
-        except Exception as e:
-            if connection:
-                connection.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to create container: {str(e)}"
-            )
+            writer = integration.create_batch_writer(cursor, container_id, container.created_by)
+            integration.ingest(writer, container.root_path)
         finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                connection.close()
+            cursor.close()
+        writer.commit(connection)
+        return container_id
+
+def create_container_for_job(connection, container: ContainerCreate):
+    # The container row is committed now, the scan commits separately when the job finishes
+    container_id, integration = insert_container_row(connection, container)
+    connection.commit()
+    return container_id, integration
+
+@app.post("/api/v1/containers")
+async def create_container(
+    container: ContainerCreate,
+    background: bool = Query(False, description="Scan contents as a background job and return 202 with its job ID")
+):
+    """
+    Create a new container and scan its contents
+    """
+    try:
+        if background:
+            container_id, integration = await run_db(create_container_for_job, container)
+            listing_cache.invalidate("containers")
+            return job_accepted(job_manager.submit(
+                "container_scan", scan_container, integration, container_id,
+                container.root_path, container.created_by,
+                description=container.container_name
+            ))
+
+        container_id = await run_in_threadpool(create_and_scan_container, container)
+        listing_cache.invalidate("containers")
+
+        return JSONResponse(
+            status_code=status.HTTP_201_CREATED,
+            content={
+                "message": "Container created and contents scanned successfully",
+                "container_id": container_id
+            }
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Database connection error: {str(e)}"
+            detail=f"Failed to create container: {str(e)}"
         )
 
+def read_page(connection, select_from: str, columns, key_column: str, after: Optional[int], limit: int):
+    cursor = connection.cursor()
+    try:
+        return fetch_page(cursor, select_from, columns, key_column, after, limit)
+    finally:
+        cursor.close()
+
 @app.get("/api/v1/integrations")
-async def list_integrations():
+async def list_integrations(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[int] = Query(None, alias="cursor", description="next_cursor of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma separated columns to return")
+):
     """
-    List all integrations
+    List integrations, one keyset page at a time ordered by IntegrationId
     """
     try:
-        connection = pyhdb.connect(**HANA_CONNECTION)
-        cursor = connection.cursor()
-
-        try:
-            cursor.execute("""
-                SELECT IntegrationId, IntegrationName, IntegrationType, ApiUrl, CreatedAt, CreatedBy 
-                FROM Integrations
-            """)
-            
-            columns = [desc[0] for desc in cursor.description]
-            integrations = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            
-            return JSONResponse(
-                status_code=status.HTTP_200_OK,
-                content={"integrations": integrations}
-            )
-
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to fetch integrations: {str(e)}"
-            )
-        finally:
-            cursor.close()
-            connection.close()
+        columns = parse_fields(fields, INTEGRATION_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # Dashboards poll this endpoint; serve repeats from the TTL cache
+    cache_key = ("integrations", limit, after, tuple(columns))
+    hit, content = listing_cache.get(cache_key)
+    if hit:
+        return JSONResponse(status_code=status.HTTP_200_OK, content=content)
+    # A write invalidating the cache while the query runs makes this page stale; it isn't stored then
+    generation = listing_cache.generation("integrations")
 
+    try:
+        integrations, next_cursor = await run_db(
+            read_page, "FROM Integrations", columns, "IntegrationId", after, limit
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Database connection error: {str(e)}"
+            detail=f"Failed to fetch integrations: {str(e)}"
         )
 
+    content = {"integrations": integrations, "next_cursor": next_cursor}
+    listing_cache.set(cache_key, content, generation)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=content
+    )
+
 @app.get("/api/v1/containers")
-async def list_containers():
+async def list_containers(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[int] = Query(None, alias="cursor", description="next_cursor of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma separated columns to return")
+):
     """
-    List all containers
+    List containers, one keyset page at a time ordered by ContainerId
     """
     try:
-        connection = pyhdb.connect(**HANA_CONNECTION)
-        cursor = connection.cursor()
+        columns = parse_fields(fields, CONTAINER_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # Dashboards poll this endpoint; serve repeats from the TTL cache
+    cache_key = ("containers", limit, after, tuple(columns))
+    hit, content = listing_cache.get(cache_key)
+    if hit:
+        return JSONResponse(status_code=status.HTTP_200_OK, content=content)
+    # A write invalidating the cache while the query runs makes this page stale; it isn't stored then
+    generation = listing_cache.generation("containers")
 
+    try:
+        containers, next_cursor = await run_db(
+            read_page,
+            "FROM Containers c JOIN Integrations i ON c.IntegrationId = i.IntegrationId",
+            columns, "c.ContainerId", after, limit
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch containers: {str(e)}"
+        )
+
+    content = {"containers": containers, "next_cursor": next_cursor}
+    listing_cache.set(cache_key, content, generation)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=content
+    )
+
+def load_search_index(connection, container_id: int, index: PathSearchIndex):
+    """Fill a container's search index from DMS_Folders/DMS_Files in one scan of each"""
+    cursor = connection.cursor()
+    try:
+        for kind, query in (
+            (FOLDER, "SELECT FolderId, FolderPath FROM DMS_Folders WHERE ContainerId = ? ORDER BY FolderId"),
+            (FILE, "SELECT FileId, FilePath FROM DMS_Files WHERE ContainerId = ? ORDER BY FileId")
+        ):
+            cursor.execute(query, (container_id,))
+            while True:
+                rows = cursor.fetchmany(10000)
+                if not rows:
+                    break
+                index.add_many(kind, rows)
+    finally:
+        cursor.close()
+
+@app.get("/api/v1/containers/{container_id}/search")
+async def search_container(
+    container_id: int,
+    q: Optional[str] = Query(None, min_length=3, description="Substring of the file or folder name, at least 3 characters"),
+    prefix: Optional[str] = Query(None, description="Start of the name"),
+    ext: Optional[str] = Query(None, description="File extension, e.g. py"),
+    path: Optional[str] = Query(None, description="Only entries under this folder path"),
+    type: Optional[str] = Query(None, pattern="^(file|folder)$", description="file or folder"),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE, description="Maximum results")
+):
+    """
+    Search a container's folders and files by name, name prefix, extension and folder.
+    Matching is case-insensitive. The first search of a container builds its index from
+    the DMS tables; later ones are answered from memory.
+    """
+    if not (q or prefix or ext or path):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Give at least one of q, prefix, ext or path")
+
+    # A hit moves the container to the recently used end, so eviction is LRU
+    index = search_indexes.get(container_id)
+    if index is None:
         try:
-            cursor.execute("""
-                SELECT c.ContainerId, c.ContainerName, c.RootPath, 
-                       c.CreatedAt, c.CreatedBy, i.IntegrationName
-                FROM Containers c
-                JOIN Integrations i ON c.IntegrationId = i.IntegrationId
-            """)
-            
-            columns = [desc[0] for desc in cursor.description]
-            containers = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            
-            return JSONResponse(
-                status_code=status.HTTP_200_OK,
-                content={"containers": containers}
+            index = await run_db(
+                lambda connection: search_indexes.get(
+                    container_id, lambda new_index: load_search_index(connection, container_id, new_index)
+                )
             )
-
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to fetch containers: {str(e)}"
+                detail=f"Failed to load search index: {str(e)}"
             )
-        finally:
-            cursor.close()
-            connection.close()
 
+    def search():
+        started = time.perf_counter()
+        results = index.search(q, prefix, ext, path, {"file": FILE, "folder": FOLDER}.get(type), limit)
+        return results, time.perf_counter() - started
+
+    # Broad queries over a large container take a while; keep them off the event loop
+    results, took = await run_in_threadpool(search)
+    return {
+        "container_id": container_id,
+        "results": results,
+        "took_ms": round(took * 1000, 3)
+    }
+
+@app.get("/api/v1/search/stats")
+async def search_index_stats():
+    """Containers with a loaded search index and their entry counts"""
+    return search_indexes.stats()
+
+async def backfill_path_keys_once(container_id: int) -> None:
+    """Key a container's legacy rows in a write of its own before the first read of its tree"""
+    if not path_keys_checked(container_id):
+        await run_db(ensure_path_keys, container_id)
+
+def read_subtree(connection, container_id: int, folder_id: Optional[int], depth: Optional[int],
+                 kind: str, after: Optional[int], limit: int):
+    cursor = connection.cursor()
+    try:
+        return list_subtree(cursor, container_id, folder_id, depth, kind, after, limit)
+    finally:
+        cursor.close()
+
+@app.get("/api/v1/containers/{container_id}/subtree")
+async def get_subtree(
+    container_id: int,
+    folder_id: Optional[int] = Query(None, description="Folder to list below; the container root when omitted"),
+    depth: Optional[int] = Query(None, ge=1, description="Levels below the folder to include; all when omitted"),
+    type: str = Query("folders", pattern="^(folders|files)$", description="folders or files"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[int] = Query(None, alias="cursor", description="next_cursor of the previous page")
+):
+    """
+    List the folders or files anywhere below a folder, up to depth levels down.
+    Each page is one range scan on the materialized PathKey, ordered by ID.
+    """
+    try:
+        await backfill_path_keys_once(container_id)
+        page = await run_db(read_subtree, container_id, folder_id, depth, type, after, limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch subtree: {str(e)}"
+        )
+    if page is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Folder not found")
+
+    rows, next_cursor = page
+    return {"container_id": container_id, "folder_id": folder_id, type: rows, "next_cursor": next_cursor}
+
+def read_subtree_size(connection, container_id: int, folder_id: Optional[int]):
+    cursor = connection.cursor()
+    try:
+        return subtree_size(cursor, container_id, folder_id)
+    finally:
+        cursor.close()
+
+@app.get("/api/v1/containers/{container_id}/folders/{folder_id}/size")
+async def get_folder_size(container_id: int, folder_id: int):
+    """
+    File count, total bytes and folder count of everything below a folder
+    """
+    try:
+        await backfill_path_keys_once(container_id)
+        size = await run_db(read_subtree_size, container_id, folder_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to compute folder size: {str(e)}"
+        )
+    if size is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Folder not found")
+    return size
+
+def move_folder_row(connection, container_id: int, folder_id: int, new_parent_id: Optional[int]):
+    cursor = connection.cursor()
+    try:
+        result = move_folder(cursor, container_id, folder_id, new_parent_id)
+        connection.commit()
+        return result
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+@app.post("/api/v1/containers/{container_id}/folders/{folder_id}/move")
+async def move_container_folder(container_id: int, folder_id: int, move: FolderMove):
+    """
+    Move a folder, with everything below it, under another folder (or the container root
+    when new_parent_id is null). Paths below it are rewritten by two range updates.
+    """
+    try:
+        await backfill_path_keys_once(container_id)
+        result = await run_db(move_folder_row, container_id, folder_id, move.new_parent_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to move folder: {str(e)}"
+        )
+    # Indexed paths of the moved rows are stale
+    search_indexes.invalidate(container_id)
+    return result
+
+def read_tree(connection, container_id: int, folder: str, depth: int, after: Optional[str], limit: int):
+    cursor = connection.cursor()
+    try:
+        return browse_tree(cursor, container_id, folder, depth, after, limit)
+    finally:
+        cursor.close()
+
+@app.get("/api/v1/containers/{container_id}/tree")
+async def get_container_tree(
+    container_id: int,
+    folder: str = Query("", description="Folder path to start from; the container root when empty"),
+    depth: int = Query(1, ge=1, le=MAX_TREE_DEPTH, description="Levels to expand"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Children per folder"),
+    after: Optional[str] = Query(None, alias="cursor", description="next_cursor of the previous page of this folder")
+):
+    """
+    Browse a stored container's tree from the DMS tables, without calling the source.
+    Folders carry folder_count/file_count; those below the requested depth come without
+    children and can be expanded with another request.
+    """
+    if after and not after.startswith(("folder:", "file:")):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    try:
+        await backfill_path_keys_once(container_id)
+        tree = await run_db(read_tree, container_id, folder, depth, after, limit)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Database connection error: {str(e)}"
+            detail=f"Failed to fetch tree: {str(e)}"
         )
+    if tree is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Folder {folder} not found")
+    return {"container_id": container_id, "tree": tree}
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, List
 from datetime import datetime
 
 class IntegrationCreate(BaseModel):
@@ -13,4 +13,21 @@ class ContainerCreate(BaseModel):
     integration_id: int
     container_name: str
     root_path: str
-    created_by: str 
\ No newline at end of file
+    created_by: str 
+
+
+class RepoSyncTarget(BaseModel):
+    repo_owner: str
+    repo_name: str
+    access_token: Optional[str] = None
+    priority: int = 0
+    container_id: Optional[int] = None
+    dry_run: bool = False
+
+class RepoSyncBatch(BaseModel):
+    targets: List[RepoSyncTarget]
+    max_concurrency_per_token: Optional[int] = Field(None, ge=1)
+    request_budget_per_token: Optional[int] = Field(None, ge=1)
+
+class FolderMove(BaseModel):
+    new_parent_id: Optional[int] = None
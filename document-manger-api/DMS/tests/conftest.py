@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+# Settings AppConfig requires in local mode; main builds the config on import
+LOCAL_SETTINGS = (
+    "SAP_GPT4O_MODEL", "LEEWAY", "STORY_DATA_PERSISTENT_ENDPOINT_URL", "STORY_SOURCE_PERSISTENT_ENDPOINT_URL",
+    "STORY_UPDATE_STATUS", "CLIENT_SECRET", "CLIENT_ID", "TOKEN_URL", "SAP_PROVIDER_URL", "SAP_CLIENT_ID",
+    "SAP_CLIENT_SECRET", "SAP_ENDPOINT_URL_GPT4O", "SAP_EMBEDDING_ENDPOINT_URL", "ODATA_USERNAME",
+    "ODATA_PASSWORD", "ODATA_ENDPOINT", "XSUAA_URL", "XSUAA_CLIENT_ID", "XSUAA_CLIENT_SECRET",
+)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    for module in ("aiohttp", "requests", "pyhdb", "hdbcli"):
+        pytest.importorskip(module)
+    testclient = pytest.importorskip("fastapi.testclient")
+    # Local mode skips the Cloud Foundry XSUAA setup, which needs bound services
+    monkeypatch.setenv("ENV", "LOCAL")
+    for name in LOCAL_SETTINGS:
+        monkeypatch.setenv(name, os.getenv(name) or "test")
+    from src.dms.main import app
+    # Without a with block the lifespan, and so the HANA pool, isn't started
+    return testclient.TestClient(app)
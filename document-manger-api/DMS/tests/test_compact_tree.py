@@ -0,0 +1,104 @@
+import json
+import uuid
+
+from src.dms.integrations.compact_tree import CompactTree, iterencode_result, tree_as_dict
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+def sample_tree():
+    tree = CompactTree("repo")
+    docs = tree.add_folder(tree.ROOT, "docs")
+    tree.add_file(docs, 'notes "draft".md', 12, SHA)
+    tree.add_folder(docs, "empty")
+    src = tree.add_folder(tree.ROOT, "src")
+    tree.add_file(src, "app.py", 200)
+    tree.add_file(tree.ROOT, "README-ü.md", 3, SHA)
+    return tree
+
+
+def strip_ids(node):
+    node = {key: value for key, value in node.items() if key != "id"}
+    if "children" in node:
+        node["children"] = [strip_ids(child) for child in node["children"]]
+    return node
+
+
+def test_to_dict_has_the_nested_tree_shape():
+    assert strip_ids(sample_tree().to_dict()) == {
+        "name": "repo", "type": "folder", "children": [
+            {"name": "docs", "type": "folder", "children": [
+                {"name": 'notes "draft".md', "type": "file", "path": 'docs/notes "draft".md', "size": 12, "sha": SHA},
+                {"name": "empty", "type": "folder", "children": []},
+            ]},
+            {"name": "src", "type": "folder", "children": [
+                {"name": "app.py", "type": "file", "path": "src/app.py", "size": 200, "sha": None},
+            ]},
+            {"name": "README-ü.md", "type": "file", "path": "README-ü.md", "size": 3, "sha": SHA},
+        ]
+    }
+
+
+def test_iterencode_produces_the_to_dict_document():
+    tree = sample_tree()
+    assert json.loads("".join(tree.iterencode())) == tree.to_dict()
+
+
+def test_iterencode_of_a_root_without_children():
+    tree = CompactTree("empty")
+    assert json.loads("".join(tree.iterencode())) == tree.to_dict()
+    assert tree.to_dict()["children"] == []
+
+
+def test_results_with_a_tree_stream_as_one_document():
+    tree = sample_tree()
+    result = {"status": "success", "dry_run": True, "tree": tree}
+    expected = {"status": "success", "dry_run": True, "tree": tree.to_dict()}
+    assert json.loads("".join(iterencode_result(result))) == expected
+    assert json.loads("".join(iterencode_result({"tree": tree}))) == {"tree": tree.to_dict()}
+    assert tree_as_dict(result) == expected
+    # The streamed result itself keeps the compact tree
+    assert result["tree"] is tree
+    assert tree_as_dict({"status": "error"}) == {"status": "error"}
+
+
+def test_iter_flat_lists_parents_before_children():
+    tree = sample_tree()
+    nodes = list(tree.iter_flat())
+    seen = set()
+    for node in nodes:
+        assert node["parent_id"] is None or node["parent_id"] in seen
+        seen.add(node["id"])
+    assert [node["path"] for node in nodes] == [
+        "", "docs", 'docs/notes "draft".md', "docs/empty", "src", "src/app.py", "README-ü.md"
+    ]
+    assert len(nodes) == len(tree)
+
+
+def test_node_ids_are_uuids_unique_across_trees():
+    first = [node["id"] for node in sample_tree().iter_flat()]
+    second = [node["id"] for node in sample_tree().iter_flat()]
+    for node_id in first:
+        uuid.UUID(node_id)
+    assert len(set(first) | set(second)) == len(first) + len(second)
+
+
+def test_ids_match_between_serializations():
+    tree = sample_tree()
+
+    def ids(node):
+        yield node["id"]
+        for child in node.get("children", []):
+            yield from ids(child)
+
+    assert sorted(ids(tree.to_dict())) == sorted(node["id"] for node in tree.iter_flat())
+
+
+def test_malformed_sha_is_stored_as_missing():
+    tree = CompactTree("repo")
+    short = tree.add_file(tree.ROOT, "a", 1, "abc")
+    not_hex = tree.add_file(tree.ROOT, "b", 1, "z" * 40)
+    valid = tree.add_file(tree.ROOT, "c", 1, SHA.upper())
+    assert tree.sha(short) is None
+    assert tree.sha(not_hex) is None
+    assert tree.sha(valid) == SHA
@@ -0,0 +1,198 @@
+import itertools
+import sqlite3
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("requests")
+
+from src.dms.integrations.base_integration import DMSBatchWriter
+from src.dms.integrations.compact_tree import CompactTree
+from src.dms.integrations.container_sync import ContainerSync
+
+CONTAINER_ID = 7
+SHA_A = "a" * 40
+SHA_B = "b" * 40
+
+
+class SequenceWriter(DMSBatchWriter):
+    """DMSBatchWriter with IDs from in-memory counters, as SQLite has no sequences"""
+
+    def __init__(self, cursor, sequences):
+        super().__init__(cursor, CONTAINER_ID, "test", batch_size=2, id_block_size=3)
+        self.sequences = sequences
+
+    def _reserve_ids(self, sequence, count):
+        return [next(self.sequences[sequence]) for _ in range(count)]
+
+
+@pytest.fixture
+def db():
+    connection = sqlite3.connect(":memory:")
+    connection.executescript("""
+        CREATE TABLE DMS_Folders (FolderId INTEGER PRIMARY KEY, FolderName TEXT, ContainerId INTEGER,
+            ParentFolderId INTEGER, FolderPath TEXT, PathKey TEXT, Depth INTEGER, CreatedBy TEXT, CreatedAt TEXT);
+        CREATE TABLE DMS_Files (FileId INTEGER PRIMARY KEY, FileName TEXT, FolderId INTEGER, ContainerId INTEGER,
+            FilePath TEXT, FileSize INTEGER, FileType TEXT, FileSha TEXT, PathKey TEXT, Depth INTEGER,
+            CreatedBy TEXT, CreatedAt TEXT);
+    """)
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def sync(db):
+    sequences = {DMSBatchWriter.FOLDER_SEQUENCE: itertools.count(1), DMSBatchWriter.FILE_SEQUENCE: itertools.count(1)}
+
+    def make():
+        cursor = db.cursor()
+        return ContainerSync(cursor, SequenceWriter(cursor, sequences))
+    return make
+
+
+def build_tree(files):
+    """CompactTree holding {path: (size, sha)} files and their folders"""
+    tree = CompactTree("repo")
+    folders = {"": tree.ROOT}
+    for path, (size, sha) in files.items():
+        parent = ""
+        *folder_names, file_name = path.split("/")
+        for name in folder_names:
+            folder = f"{parent}/{name}" if parent else name
+            if folder not in folders:
+                folders[folder] = tree.add_folder(folders[parent], name)
+            parent = folder
+        tree.add_file(folders[parent], file_name, size, sha)
+    return tree
+
+
+def folders(db):
+    """{path: parent path} of the container's folders"""
+    rows = db.execute("""
+        SELECT f.FolderPath, p.FolderPath FROM DMS_Folders f
+        LEFT JOIN DMS_Folders p ON p.FolderId = f.ParentFolderId
+    """).fetchall()
+    return {path: parent for path, parent in rows}
+
+
+def files(db):
+    """{path: (size, sha, folder path)} of the container's files"""
+    rows = db.execute("""
+        SELECT f.FilePath, f.FileSize, f.FileSha, p.FolderPath FROM DMS_Files f
+        LEFT JOIN DMS_Folders p ON p.FolderId = f.FolderId
+    """).fetchall()
+    return {path: (size, sha, folder) for path, size, sha, folder in rows}
+
+
+def test_apply_inserts_a_new_container(db, sync):
+    tree = build_tree({
+        "README.md": (10, SHA_A),
+        "src/app.py": (20, SHA_A),
+        "src/lib/util.py": (30, SHA_B),
+    })
+    counts = sync().apply(tree)
+
+    assert counts["folders_inserted"] == 2
+    assert counts["files_inserted"] == 3
+    assert folders(db) == {"src": None, "src/lib": "src"}
+    assert files(db) == {
+        "README.md": (10, SHA_A, None),
+        "src/app.py": (20, SHA_A, "src"),
+        "src/lib/util.py": (30, SHA_B, "src/lib"),
+    }
+
+
+def test_apply_writes_only_the_difference(db, sync):
+    sync().apply(build_tree({
+        "README.md": (10, SHA_A),
+        "src/app.py": (20, SHA_A),
+        "old/gone.txt": (5, SHA_A),
+    }))
+    original_app_id = db.execute("SELECT FileId FROM DMS_Files WHERE FilePath = 'src/app.py'").fetchone()
+
+    counts = sync().apply(build_tree({
+        "README.md": (10, SHA_A),
+        "src/app.py": (21, SHA_B),
+        "src/new.py": (1, SHA_A),
+    }))
+
+    assert counts == {
+        "folders_inserted": 0,
+        "folders_deleted": 1,
+        "files_inserted": 1,
+        "files_updated": 1,
+        "files_deleted": 1,
+        "files_unchanged": 1,
+    }
+    assert folders(db) == {"src": None}
+    assert files(db) == {
+        "README.md": (10, SHA_A, None),
+        "src/app.py": (21, SHA_B, "src"),
+        "src/new.py": (1, SHA_A, "src"),
+    }
+    # Changed files are updated in place, not reinserted
+    assert db.execute("SELECT FileId FROM DMS_Files WHERE FilePath = 'src/app.py'").fetchone() == original_app_id
+
+
+def test_apply_keys_new_rows_under_existing_parents(db, sync):
+    sync().apply(build_tree({"src/app.py": (1, SHA_A)}))
+    sync().apply(build_tree({"src/app.py": (1, SHA_A), "src/lib/util.py": (1, SHA_A)}))
+
+    (src_key,) = db.execute("SELECT PathKey FROM DMS_Folders WHERE FolderPath = 'src'").fetchone()
+    lib_key, lib_depth = db.execute("SELECT PathKey, Depth FROM DMS_Folders WHERE FolderPath = 'src/lib'").fetchone()
+    file_key, file_depth = db.execute("SELECT PathKey, Depth FROM DMS_Files WHERE FilePath = 'src/lib/util.py'").fetchone()
+    assert lib_key.startswith(src_key) and lib_depth == 2
+    assert (file_key, file_depth) == (lib_key, 3)
+
+
+def test_apply_paths_creates_missing_folders_under_existing_ones(db, sync):
+    sync().apply(build_tree({"src/app.py": (20, SHA_A), "README.md": (10, SHA_A)}))
+
+    counts = sync().apply_paths({
+        "src/app.py": (21, SHA_B),
+        "README.md": (10, SHA_A),
+        "src/lib/deep/util.py": (5, SHA_A),
+    }, removed=[])
+
+    assert counts["folders_inserted"] == 2
+    assert (counts["files_inserted"], counts["files_updated"], counts["files_unchanged"]) == (1, 1, 1)
+    assert folders(db) == {"src": None, "src/lib": "src", "src/lib/deep": "src/lib"}
+    assert files(db)["src/lib/deep/util.py"] == (5, SHA_A, "src/lib/deep")
+    assert files(db)["src/app.py"] == (21, SHA_B, "src")
+
+
+def test_apply_paths_removes_files_and_the_folders_they_leave_empty(db, sync):
+    sync().apply(build_tree({
+        "src/app.py": (1, SHA_A),
+        "src/lib/deep/util.py": (1, SHA_A),
+        "docs/a.md": (1, SHA_A),
+        "docs/b.md": (1, SHA_A),
+    }))
+
+    counts = sync().apply_paths({}, removed=["src/lib/deep/util.py", "docs/a.md", "missing.txt"])
+
+    assert counts["files_deleted"] == 2
+    # deep and lib are now empty; src still holds app.py and docs still holds b.md
+    assert counts["folders_deleted"] == 2
+    assert folders(db) == {"src": None, "docs": None}
+    assert set(files(db)) == {"src/app.py", "docs/b.md"}
+
+
+def test_apply_paths_upsert_wins_over_remove_of_the_same_path(db, sync):
+    sync().apply(build_tree({"src/app.py": (1, SHA_A)}))
+
+    counts = sync().apply_paths({"src/app.py": (2, SHA_B)}, removed=["src/app.py"])
+
+    assert counts["files_deleted"] == 0
+    assert files(db) == {"src/app.py": (2, SHA_B, "src")}
+
+
+def test_apply_paths_looks_up_paths_in_chunks(db, sync, monkeypatch):
+    monkeypatch.setattr("src.dms.integrations.container_sync.LOOKUP_CHUNK", 2)
+    paths = {f"dir{i}/file{i}.txt": (i, SHA_A) for i in range(5)}
+    sync().apply_paths(paths, removed=[])
+
+    counts = sync().apply_paths(paths, removed=[])
+
+    assert counts["files_unchanged"] == 5
+    assert counts["folders_inserted"] == 0
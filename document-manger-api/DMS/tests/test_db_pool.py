@@ -0,0 +1,151 @@
+import threading
+
+import pytest
+
+pytest.importorskip("pyhdb")
+
+from src.dms.exceptions import ConnectionPoolError
+from src.dms.helper import db_pool
+from src.dms.helper.db_pool import HANAConnectionPool, hana_connection
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None):
+        if not self.connection.alive:
+            raise OSError("connection reset")
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def connect(monkeypatch):
+    """Replaces pyhdb.connect; the returned list holds every connection opened"""
+    opened = []
+
+    def fake_connect(**config):
+        connection = FakeConnection()
+        opened.append(connection)
+        return connection
+
+    monkeypatch.setattr(db_pool.pyhdb, "connect", fake_connect)
+    return opened
+
+
+def test_released_connection_is_reused(connect):
+    pool = HANAConnectionPool({}, max_size=2)
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    assert pool.stats()["created"] == 1
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_open_creates_min_size_connections(connect):
+    pool = HANAConnectionPool({}, min_size=3, max_size=5)
+    pool.open()
+    stats = pool.stats()
+    assert (stats["size"], stats["idle"], stats["in_use"]) == (3, 3, 0)
+    assert len(connect) == 3
+
+
+def test_acquire_times_out_when_pool_is_exhausted(connect):
+    pool = HANAConnectionPool({}, max_size=1)
+    pool.acquire()
+    with pytest.raises(ConnectionPoolError):
+        pool.acquire(timeout=0.05)
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_waiter_receives_connection_released_by_another_thread(connect):
+    pool = HANAConnectionPool({}, max_size=1)
+    held = pool.acquire()
+    releaser = threading.Timer(0.05, pool.release, (held,))
+    releaser.start()
+    assert pool.acquire(timeout=5) is held
+    releaser.join()
+    assert pool.stats()["waits"] == 1
+
+
+def test_dead_idle_connection_is_replaced(connect):
+    pool = HANAConnectionPool({}, max_size=1, validate_after=0)
+    dead = pool.acquire()
+    pool.release(dead)
+    dead.alive = False
+    replacement = pool.acquire()
+    assert replacement is not dead
+    assert dead.closed
+    assert pool.stats()["validation_failures"] == 1
+    assert pool.stats()["size"] == 1
+
+
+def test_failed_connect_frees_its_slot(monkeypatch):
+    attempts = []
+
+    def flaky_connect(**config):
+        attempts.append(config)
+        if len(attempts) == 1:
+            raise OSError("connection refused")
+        return FakeConnection()
+
+    monkeypatch.setattr(db_pool.pyhdb, "connect", flaky_connect)
+    pool = HANAConnectionPool({}, max_size=1)
+    with pytest.raises(OSError):
+        pool.acquire()
+    assert pool.acquire(timeout=0.05) is not None
+    assert pool.stats()["size"] == 1
+
+
+def test_connection_context_rolls_back_and_returns_connection_on_error(connect):
+    pool = HANAConnectionPool({}, max_size=1)
+    with pytest.raises(ValueError):
+        with pool.connection() as connection:
+            raise ValueError("query failed")
+    assert connection.rollbacks == 1
+    assert pool.stats()["in_use"] == 0
+    assert pool.acquire(timeout=0.05) is connection
+
+
+def test_close_rejects_acquire_and_closes_connections(connect):
+    pool = HANAConnectionPool({}, max_size=2)
+    idle = pool.acquire()
+    busy = pool.acquire()
+    pool.release(idle)
+    pool.close()
+    assert idle.closed and not busy.closed
+    with pytest.raises(ConnectionPoolError):
+        pool.acquire()
+    # Checked out connections are closed when they come back
+    pool.release(busy)
+    assert busy.closed
+    assert pool.stats()["size"] == 0
+
+
+def test_hana_connection_reads_environment_when_called(monkeypatch):
+    monkeypatch.setenv("HANA_HOST", "hana.example")
+    monkeypatch.setenv("HANA_PORT", "30041")
+    config = hana_connection()
+    assert config["host"] == "hana.example"
+    assert config["port"] == 30041
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+for module in ("aiohttp", "requests", "pyhdb"):
+    pytest.importorskip(module)
+
+from src.dms.integrations.filesystem_integration import FilesystemIntegration
+
+
+@pytest.fixture
+def share(tmp_path, monkeypatch):
+    root = tmp_path / "share"
+    (root / "team" / "reports").mkdir(parents=True)
+    (root / "team" / "reports" / "q1.pdf").write_bytes(b"x" * 7)
+    (root / "team" / "notes.txt").write_text("hi")
+    (tmp_path / "outside").mkdir()
+    (tmp_path / "outside" / "secret.txt").write_text("no")
+    os.symlink(tmp_path / "outside", root / "team" / "escape")
+    monkeypatch.setenv("DMS_FILESYSTEM_ROOT", str(root))
+    return root
+
+
+def integration(api_url=None):
+    return FilesystemIntegration(connection_config={}, integration_config={"api_url": api_url})
+
+
+def test_root_must_be_configured(monkeypatch):
+    monkeypatch.delenv("DMS_FILESYSTEM_ROOT", raising=False)
+    with pytest.raises(ValueError, match="DMS_FILESYSTEM_ROOT"):
+        integration()
+
+
+@pytest.mark.parametrize("api_url", ["..", "team/../..", "/etc", "team/escape"])
+def test_api_url_cannot_leave_the_root(share, api_url):
+    with pytest.raises(ValueError, match="outside"):
+        integration(api_url)
+
+
+def test_api_url_selects_a_directory_inside_the_root(share):
+    assert integration("team").base_dir == os.path.realpath(share / "team")
+    assert integration().base_dir == os.path.realpath(share)
+
+
+def test_scan_lists_relative_paths_and_skips_symlinks(share):
+    listing = sorted(integration("team").scan_directory(""))
+    assert [(entry.path, entry.is_folder, entry.size) for entry in listing] == [
+        ("notes.txt", False, 2),
+        ("reports", True, 0),
+    ]
+    assert integration("team").scan_directory("reports")[0].path == "reports/q1.pdf"
+
+
+def test_scan_skips_paths_that_resolve_outside_the_root(share, caplog):
+    fs = integration("team")
+    assert fs.scan_directory("escape") == []
+    assert "outside DMS_FILESYSTEM_ROOT" in caplog.text
+
+
+def test_relative_path_strips_the_base_only_from_absolute_paths(share):
+    fs = integration("team")
+    base = fs.base_dir
+    assert fs.relative_path(os.path.join(base, "reports")) == "reports"
+    assert fs.relative_path(base) == ""
+    # Relative paths that happen to spell out the base directory stay as they are
+    relative_base = base.lstrip(os.sep)
+    assert fs.relative_path(f"{relative_base}/reports") == f"{relative_base}/reports"
+    # Traversal can't climb above the base
+    assert fs.relative_path("../../outside") == "outside"
+    with pytest.raises(ValueError, match="outside"):
+        fs.relative_path(str(share.parent / "outside"))
+
+
+def test_walk_survives_a_directory_turning_into_an_escaping_symlink(share):
+    fs = integration()
+    (share / "team" / "moved").mkdir()
+    # Listed as a directory, then swapped for a link out of the root before it is scanned
+    scan = fs.scan_directory
+
+    def swap_then_scan(path):
+        if path == "team/moved":
+            os.rmdir(share / "team" / "moved")
+            os.symlink(share.parent / "outside", share / "team" / "moved")
+        return scan(path)
+
+    fs.scan_directory = swap_then_scan
+    paths = sorted(entry.path for listing in fs._walk_sync("") for entry in listing)
+    assert paths == ["team", "team/moved", "team/notes.txt", "team/reports", "team/reports/q1.pdf"]
+
+
+def test_missing_directory_is_skipped(share):
+    assert integration().scan_directory("no/such/dir") == []
@@ -0,0 +1,80 @@
+import sqlite3
+
+import pytest
+
+from src.dms.helper import folder_tree
+from src.dms.helper.folder_tree import browse_tree, ensure_path_keys, list_subtree, subtree_size
+
+CONTAINER_ID = 3
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(folder_tree, "_keyed_containers", set())
+    # Shared with the app's threads in the endpoint test
+    connection = sqlite3.connect(":memory:", check_same_thread=False)
+    # HANA's TO_VARCHAR, used by the backfill
+    connection.create_function("TO_VARCHAR", 1, str)
+    connection.executescript("""
+        CREATE TABLE DMS_Folders (FolderId INTEGER PRIMARY KEY, FolderName TEXT, ContainerId INTEGER,
+            ParentFolderId INTEGER, FolderPath TEXT, PathKey TEXT, Depth INTEGER);
+        CREATE TABLE DMS_Files (FileId INTEGER PRIMARY KEY, FileName TEXT, FolderId INTEGER, ContainerId INTEGER,
+            FilePath TEXT, FileSize INTEGER, FileType TEXT, PathKey TEXT, Depth INTEGER);
+    """)
+    # A container written before PathKey/Depth existed: every key is NULL
+    connection.executemany("INSERT INTO DMS_Folders VALUES (?, ?, ?, ?, ?, NULL, NULL)", [
+        (1, "docs", CONTAINER_ID, None, "docs"),
+        (2, "api", CONTAINER_ID, 1, "docs/api"),
+    ])
+    connection.executemany("INSERT INTO DMS_Files VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL)", [
+        (10, "README.md", None, CONTAINER_ID, "README.md", 5, "md"),
+        (11, "guide.md", 1, CONTAINER_ID, "docs/guide.md", 7, "md"),
+        (12, "index.md", 2, CONTAINER_ID, "docs/api/index.md", 11, "md"),
+    ])
+    connection.commit()
+    yield connection
+    connection.close()
+
+
+def test_reads_do_not_write(db):
+    # Without the backfill step the legacy rows are invisible, and the read changes nothing
+    assert list_subtree(db.cursor(), CONTAINER_ID, None, None, "folders", None, 10) == ([], None)
+    assert not db.in_transaction
+
+
+def test_backfill_keys_legacy_rows_so_the_root_reads_them(db):
+    assert ensure_path_keys(db, CONTAINER_ID) == 5
+    assert not db.in_transaction
+    cursor = db.cursor()
+
+    folders, _ = list_subtree(cursor, CONTAINER_ID, None, None, "folders", None, 10)
+    assert [(row["FolderPath"], row["Depth"]) for row in folders] == [("docs", 1), ("docs/api", 2)]
+    size = subtree_size(cursor, CONTAINER_ID, None)
+    assert (size["folders"], size["files"], size["total_size"], size["levels"]) == (2, 3, 23, 2)
+
+    tree = browse_tree(cursor, CONTAINER_ID, "", 2, None, 10)
+    assert [child["path"] for child in tree["children"]] == ["docs", "README.md"]
+    assert [child["path"] for child in tree["children"][0]["children"]] == ["docs/api", "docs/guide.md"]
+
+
+def test_each_container_is_checked_once(db):
+    ensure_path_keys(db, CONTAINER_ID)
+    db.execute("UPDATE DMS_Files SET PathKey = NULL")
+    assert ensure_path_keys(db, CONTAINER_ID) == 0
+    assert folder_tree.path_keys_checked(CONTAINER_ID)
+
+
+def test_tree_endpoint_shows_a_legacy_container_from_the_root(db, client, monkeypatch):
+    from src.dms import main
+
+    async def run_db(fn, *args):
+        return fn(db, *args)
+
+    monkeypatch.setattr(main, "run_db", run_db)
+    response = client.get(f"/api/v1/containers/{CONTAINER_ID}/tree", params={"depth": 2})
+
+    assert response.status_code == 200, response.text
+    tree = response.json()["tree"]
+    assert (tree["folder_count"], tree["file_count"]) == (1, 1)
+    assert [child["path"] for child in tree["children"]] == ["docs", "README.md"]
+    assert [child["path"] for child in tree["children"][0]["children"]] == ["docs/api", "docs/guide.md"]
@@ -0,0 +1,106 @@
+import hashlib
+import hmac
+import json
+
+import pytest
+
+for module in ("aiohttp", "requests", "pyhdb", "hdbcli", "fastapi"):
+    pytest.importorskip(module)
+
+from src.dms.integrations.github_webhook import (
+    PUSH_COMMITS_LIMIT, PushCoalescer, needs_full_diff, push_changes, verify_signature, webhook_secret
+)
+
+SECRET = "It's a Secret to Everybody"
+BODY = b"Hello, World!"
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def test_valid_signature_is_accepted():
+    # Example delivery from GitHub's webhook validation docs
+    signature = "sha256=757107ea0eb2509fc211221cce984b8a37570b6d7586c22c46f4379c8b043e17"
+    assert sign(BODY) == signature
+    assert verify_signature(BODY, signature, SECRET)
+
+
+def test_tampered_body_or_wrong_secret_is_rejected():
+    signature = sign(BODY)
+    assert not verify_signature(BODY + b" ", signature, SECRET)
+    assert not verify_signature(BODY, signature, "another secret")
+    assert not verify_signature(BODY, signature.replace("sha256=", "sha1="), SECRET)
+
+
+@pytest.mark.parametrize("signature, secret", [(None, SECRET), ("", SECRET), (sign(BODY), None), (sign(BODY, ""), "")])
+def test_missing_signature_or_secret_rejects_every_delivery(signature, secret):
+    assert not verify_signature(BODY, signature, secret)
+
+
+def test_secret_is_read_at_delivery_time(monkeypatch):
+    monkeypatch.delenv("GITHUB_WEBHOOK_SECRET", raising=False)
+    assert webhook_secret() is None
+    monkeypatch.setenv("GITHUB_WEBHOOK_SECRET", "")
+    assert webhook_secret() is None
+    monkeypatch.setenv("GITHUB_WEBHOOK_SECRET", SECRET)
+    assert webhook_secret() == SECRET
+
+
+def test_push_changes_keeps_the_last_action_per_path():
+    payload = {"commits": [
+        {"added": ["a.txt", "b.txt"], "modified": [], "removed": []},
+        {"added": [], "modified": ["a.txt"], "removed": ["b.txt"]},
+        {"added": ["b.txt"], "modified": [], "removed": ["c.txt"]},
+    ]}
+    assert push_changes(payload) == {"a.txt": "upsert", "b.txt": "upsert", "c.txt": "remove"}
+
+
+@pytest.mark.parametrize("payload, expected", [
+    ({"before": "1", "after": "2", "commits": [{}]}, False),
+    ({"before": "1", "after": "2", "commits": [{}], "forced": True}, True),
+    ({"before": "1", "after": "2", "commits": [{}] * PUSH_COMMITS_LIMIT}, True),
+    ({"before": "1", "after": "2", "commits": []}, True),
+    ({"before": "2", "after": "2", "commits": []}, False),
+])
+def test_needs_full_diff(payload, expected):
+    assert needs_full_diff(payload) is expected
+
+
+def test_coalescer_merges_pushes_until_the_window_closes():
+    coalescer = PushCoalescer(window=3600)
+    try:
+        coalescer.add(1, "owner", "repo", "sha-1", {"a.txt": "upsert", "b.txt": "upsert"})
+        coalescer.add(1, "owner", "repo", "sha-2", {"b.txt": "remove"}, full_diff=True)
+        coalescer.add(2, "owner", "other", "sha-9", {"c.txt": "upsert"})
+        assert coalescer.pending() == {1: (2, 2), 2: (1, 1)}
+        pending = coalescer._pending[1]
+        assert pending["changes"] == {"a.txt": "upsert", "b.txt": "remove"}
+        assert pending["ref"] == "sha-2"
+        assert pending["full_diff"]
+    finally:
+        for timer in coalescer._timers.values():
+            timer.cancel()
+
+
+def post_ping(client, body: bytes, signature=None):
+    headers = {"X-GitHub-Event": "ping", "Content-Type": "application/json"}
+    if signature is not None:
+        headers["X-Hub-Signature-256"] = signature
+    return client.post("/api/v1/github/webhook", content=body, headers=headers)
+
+
+def test_endpoint_refuses_deliveries_without_a_configured_secret(client, monkeypatch):
+    monkeypatch.delenv("GITHUB_WEBHOOK_SECRET", raising=False)
+    body = json.dumps({"zen": "Keep it logically awesome."}).encode("utf-8")
+    assert post_ping(client, body, sign(body)).status_code == 503
+
+
+def test_endpoint_rejects_bad_signatures(client, monkeypatch):
+    monkeypatch.setenv("GITHUB_WEBHOOK_SECRET", SECRET)
+    body = json.dumps({"zen": "Keep it logically awesome."}).encode("utf-8")
+    assert post_ping(client, body).status_code == 401
+    assert post_ping(client, body, sign(body, "wrong")).status_code == 401
+    response = post_ping(client, body, sign(body))
+    assert response.status_code == 200
+    assert response.json() == {"message": "pong"}
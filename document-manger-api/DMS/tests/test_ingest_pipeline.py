@@ -0,0 +1,185 @@
+import asyncio
+
+import pytest
+
+from src.dms.exceptions import JobCancelledError
+from src.dms.integrations.ingest_pipeline import IngestPipeline, SourceEntry, walk_listings
+
+# Directory path -> names inside it; names ending in "/" are folders
+SOURCE = {
+    "": ["docs/", "src/", "README.md"],
+    "docs": ["guide.md", "api/"],
+    "docs/api": ["index.md"],
+    "src": ["app.py", "lib/"],
+    "src/lib": [],
+}
+
+
+def listing(directory):
+    prefix = f"{directory}/" if directory else ""
+    return [
+        SourceEntry(prefix + name.rstrip("/"), name.rstrip("/"), name.endswith("/"), 0 if name.endswith("/") else 10)
+        for name in SOURCE[directory]
+    ]
+
+
+class Lister:
+    """list_directory for SOURCE that records how many calls overlap"""
+
+    def __init__(self, delay=0.01, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.active = 0
+        self.max_active = 0
+        self.listed = []
+
+    async def __call__(self, directory):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if directory == self.fail_on:
+                raise OSError(f"cannot list {directory}")
+            self.listed.append(directory)
+            return listing(directory)
+        finally:
+            self.active -= 1
+
+
+class RecordingWriter:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.folders = {}
+        self.files = {}
+        self.flushes = 0
+
+    def add_folder(self, name, parent_id, path):
+        folder_id = len(self.folders) + 1
+        self.folders[path] = (folder_id, parent_id)
+        return folder_id
+
+    def add_file(self, folder_id, name, path, size, file_type, sha=None):
+        if path == self.fail_on:
+            raise RuntimeError("insert failed")
+        self.files[path] = (folder_id, size, file_type)
+
+    def flush(self):
+        self.flushes += 1
+
+
+async def collect(listings):
+    return [entries async for entries in listings]
+
+
+def test_walk_lists_every_directory_once_with_bounded_concurrency():
+    lister = Lister()
+    listings = asyncio.run(collect(walk_listings(lister, "", fetchers=2)))
+
+    assert sorted(lister.listed) == sorted(SOURCE)
+    assert len(listings) == len(SOURCE)
+    assert lister.max_active == 2
+
+
+def test_walk_yields_a_folder_before_its_contents():
+    listings = asyncio.run(collect(walk_listings(Lister(), "", fetchers=4)))
+
+    seen = {""}
+    for entries in listings:
+        for entry in entries:
+            assert entry.path.rpartition("/")[0] in seen
+            if entry.is_folder:
+                seen.add(entry.path)
+
+
+def test_walk_raises_fetch_errors():
+    with pytest.raises(OSError, match="docs/api"):
+        asyncio.run(collect(walk_listings(Lister(fail_on="docs/api"), "", fetchers=2)))
+
+
+def test_walk_stops_fetching_while_the_reader_lags():
+    wide = {"": [f"dir{i}/" for i in range(50)], **{f"dir{i}": [] for i in range(50)}}
+    listed = []
+
+    async def list_directory(directory):
+        listed.append(directory)
+        return [SourceEntry(name.rstrip("/"), name.rstrip("/"), True) for name in wide[directory]]
+
+    async def read_one_then_stall():
+        listings = walk_listings(list_directory, "", fetchers=2, queue_size=1)
+        await listings.__anext__()
+        await asyncio.sleep(0.1)
+        await listings.aclose()
+
+    asyncio.run(read_one_then_stall())
+    # The root, one queued listing and one blocked listing per fetcher
+    assert len(listed) <= 4
+
+
+def test_pipeline_links_rows_to_their_parent_folders():
+    writer = RecordingWriter()
+    pipeline = IngestPipeline(writer, "", file_type=lambda name: name.rsplit(".", 1)[-1], queue_size=2)
+    stats = asyncio.run(pipeline.run(walk_listings(Lister(), "", fetchers=3)))
+
+    assert (stats["listings"], stats["folders"], stats["files"]) == (5, 4, 4)
+    folder_ids = {path: folder_id for path, (folder_id, _) in writer.folders.items()}
+    assert writer.folders["src"][1] is None
+    assert writer.folders["docs/api"][1] == folder_ids["docs"]
+    assert writer.folders["src/lib"][1] == folder_ids["src"]
+    assert writer.files == {
+        "README.md": (None, 10, "md"),
+        "docs/guide.md": (folder_ids["docs"], 10, "md"),
+        "docs/api/index.md": (folder_ids["docs/api"], 10, "md"),
+        "src/app.py": (folder_ids["src"], 10, "py"),
+    }
+    assert writer.flushes == 1
+
+
+def test_pipeline_rooted_below_the_source_root():
+    writer = RecordingWriter()
+    pipeline = IngestPipeline(writer, "docs/")
+    asyncio.run(pipeline.run(walk_listings(Lister(), "docs", fetchers=2)))
+
+    assert writer.folders == {"docs/api": (1, None)}
+    assert writer.files == {"docs/guide.md": (None, 10, "unknown"), "docs/api/index.md": (1, 10, "unknown")}
+
+
+def test_pipeline_raises_fetch_errors_without_flushing():
+    writer = RecordingWriter()
+    pipeline = IngestPipeline(writer)
+    with pytest.raises(OSError):
+        asyncio.run(pipeline.run(walk_listings(Lister(fail_on="src/lib"), "", fetchers=2)))
+    assert writer.flushes == 0
+
+
+def test_pipeline_raises_write_errors_and_stops_fetching():
+    lister = Lister(delay=0.02)
+    writer = RecordingWriter(fail_on="README.md")
+    pipeline = IngestPipeline(writer, queue_size=1)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await pipeline.run(walk_listings(lister, "", fetchers=1))
+        listed = len(lister.listed)
+        await asyncio.sleep(0.1)
+        return listed
+
+    listed_at_failure = asyncio.run(run())
+    assert len(lister.listed) == listed_at_failure < len(SOURCE)
+    assert writer.flushes == 0
+
+
+def test_pipeline_stops_when_its_job_is_cancelled():
+    class Job:
+        checks = 0
+
+        def check_cancelled(self):
+            self.checks += 1
+            if self.checks > 1:
+                raise JobCancelledError("Job cancelled")
+
+    writer = RecordingWriter()
+    pipeline = IngestPipeline(writer, queue_size=1, job=Job())
+    with pytest.raises(JobCancelledError):
+        asyncio.run(pipeline.run(walk_listings(Lister(), "", fetchers=1)))
+    assert writer.flushes == 0
+    assert set(writer.folders) == {"docs", "src"}
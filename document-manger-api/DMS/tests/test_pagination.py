@@ -0,0 +1,104 @@
+import sqlite3
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from src.dms.helper.pagination import fetch_page, keyset_query, parse_fields
+
+FIELDS = {
+    "IntegrationId": "IntegrationId",
+    "IntegrationName": "IntegrationName",
+    "ApiUrl": "ApiUrl",
+}
+
+
+@pytest.fixture
+def cursor():
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE Integrations (IntegrationId INTEGER, IntegrationName TEXT, ApiUrl TEXT, Kind TEXT)")
+    connection.executemany(
+        "INSERT INTO Integrations VALUES (?, ?, ?, ?)",
+        # Inserted out of key order, keys with gaps
+        [(key, f"integration-{key}", f"https://example/{key}", "odd" if key % 2 else "even")
+         for key in (9, 3, 1, 7, 5, 2, 10)]
+    )
+    yield connection.cursor()
+    connection.close()
+
+
+def all_pages(cursor, select_from, columns, limit, params=()):
+    pages, after = [], None
+    while True:
+        rows, after = fetch_page(cursor, select_from, columns, "IntegrationId", after, limit, params)
+        pages.append([row["IntegrationId"] for row in rows])
+        if after is None:
+            return pages
+
+
+def test_cursor_walks_every_row_once_in_key_order(cursor):
+    pages = all_pages(cursor, "FROM Integrations", ["IntegrationId", "IntegrationName"], limit=3)
+    assert pages == [[1, 2, 3], [5, 7, 9], [10]]
+
+
+def test_exact_multiple_of_limit_ends_without_an_empty_page(cursor):
+    rows, after = fetch_page(cursor, "FROM Integrations", ["IntegrationId"], "IntegrationId", None, 7)
+    assert len(rows) == 7
+    assert after is None
+
+
+def test_next_cursor_is_the_last_key_of_the_page(cursor):
+    rows, after = fetch_page(cursor, "FROM Integrations", ["IntegrationId"], "IntegrationId", None, 2)
+    assert [row["IntegrationId"] for row in rows] == [1, 2]
+    assert after == 2
+
+
+def test_key_added_only_for_the_cursor_is_left_out_of_rows(cursor):
+    rows, after = fetch_page(cursor, "FROM Integrations", ["IntegrationName"], "IntegrationId", None, 2)
+    assert rows == [{"IntegrationName": "integration-1"}, {"IntegrationName": "integration-2"}]
+    assert after == 2
+    rows, after = fetch_page(cursor, "FROM Integrations", ["IntegrationName"], "IntegrationId", after, 2)
+    assert rows == [{"IntegrationName": "integration-3"}, {"IntegrationName": "integration-5"}]
+
+
+def test_cursor_combines_with_an_existing_where_clause(cursor):
+    select_from = "FROM Integrations WHERE Kind = ?"
+    pages = all_pages(cursor, select_from, ["IntegrationId"], limit=2, params=("odd",))
+    assert pages == [[1, 3], [5, 7], [9]]
+
+
+def test_keyset_query_binds_cursor_after_caller_params():
+    query, params, key_added = keyset_query(
+        "FROM Integrations WHERE Kind = ?", ["IntegrationName"], "IntegrationId", 42, 10, ("odd",)
+    )
+    assert query == (
+        "SELECT IntegrationName, IntegrationId FROM Integrations WHERE Kind = ?"
+        " AND IntegrationId > ? ORDER BY IntegrationId LIMIT 11"
+    )
+    assert params == ("odd", 42)
+    assert key_added
+
+
+def test_rows_are_json_ready():
+    class Cursor:
+        description = [("CreatedAt",), ("Size",), ("IntegrationId",)]
+
+        def execute(self, query, params):
+            pass
+
+        def fetchmany(self, size):
+            return [(datetime(2024, 5, 1, 12, 30), Decimal("1.5"), 1)]
+
+    rows, after = fetch_page(Cursor(), "FROM t", ["CreatedAt", "Size", "IntegrationId"], "IntegrationId", None, 10)
+    assert rows == [{"CreatedAt": "2024-05-01T12:30:00", "Size": 1.5, "IntegrationId": 1}]
+    assert after is None
+
+
+def test_parse_fields_keeps_allowed_order_and_ignores_case():
+    assert parse_fields("apiurl, integrationid", FIELDS) == ["IntegrationId", "ApiUrl"]
+    assert parse_fields(None, FIELDS) == list(FIELDS.values())
+
+
+def test_parse_fields_rejects_unknown_names():
+    with pytest.raises(ValueError, match="password"):
+        parse_fields("IntegrationId,Password", FIELDS)
@@ -0,0 +1,121 @@
+import sqlite3
+import time
+
+import pytest
+
+from src.dms.integrations.response_cache import ResponseCache
+
+URL = "https://api.github.com/repos/owner/repo/contents/"
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+def test_stored_responses_round_trip(path):
+    cache = ResponseCache(path)
+    cache.put(URL, '"etag-1"', [{"name": "README.md"}])
+
+    cached = cache.get(URL)
+    assert (cached["etag"], cached["body"]) == ('"etag-1"', [{"name": "README.md"}])
+    assert cache.is_fresh(cached)
+    assert cache.get(URL + "missing") is None
+
+
+def test_writes_are_visible_to_other_processes_without_save(path):
+    writer = ResponseCache(path)
+    writer.put(URL, '"etag-1"', {"sha": "1"})
+    # A second connection stands in for another worker process on the same file
+    reader = ResponseCache(path)
+    assert reader.get(URL)["body"] == {"sha": "1"}
+    reader.put(URL + "other", None, {"sha": "2"})
+    assert writer.get(URL + "other")["body"] == {"sha": "2"}
+
+
+def test_freshness_follows_fetch_time(path):
+    cache = ResponseCache(path, fresh_seconds=60)
+    cache.put(URL, '"etag-1"', {})
+    cached = cache.get(URL)
+    cached["fetched_at"] = time.time() - 120
+    assert not cache.is_fresh(cached)
+    assert not ResponseCache(path, fresh_seconds=0).is_fresh(cache.get(URL))
+
+
+def test_save_evicts_least_recently_used_beyond_max_bytes(path):
+    cache = ResponseCache(path)
+    for i in range(3):
+        cache.put(f"{URL}{i}", None, {"data": "x" * 1000, "i": i})
+        time.sleep(0.01)
+    cache.get(f"{URL}0")
+    cache.max_bytes = cache.stats()["bytes"] * 2 // 3
+    cache.save()
+
+    assert cache.get(f"{URL}1") is None
+    assert cache.get(f"{URL}0") is not None
+
+
+def test_database_errors_count_as_misses(path):
+    cache = ResponseCache(path)
+    cache.put(URL, None, {})
+    cache._db.close()
+
+    assert cache.get(URL) is None
+    cache.put(URL, None, {})
+    cache.revalidated(URL)
+    cache.save()
+
+
+def test_locked_database_does_not_fail_requests(path):
+    cache = ResponseCache(path)
+    cache.put(URL, None, {})
+    other = sqlite3.connect(path, timeout=0)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        cache._db.execute("PRAGMA busy_timeout = 0")
+        cache.put(URL + "new", None, {})
+        cache.save()
+    finally:
+        other.rollback()
+        other.close()
+    assert cache.get(URL + "new") is None
+
+
+def test_each_request_reads_the_cache_once(path):
+    for module in ("aiohttp", "requests", "pyhdb", "hdbcli"):
+        pytest.importorskip(module)
+    from src.dms.integrations.github_integration import GitHubIntegration
+
+    class CountingCache(ResponseCache):
+        reads = 0
+
+        def get(self, url):
+            self.reads += 1
+            return super().get(url)
+
+    github = GitHubIntegration(connection_config={}, integration_config={"access_token": "token"})
+    github.response_cache = cache = CountingCache(path, fresh_seconds=60)
+    cache.put(URL, '"etag-1"', ["listing"])
+
+    assert github._cached_response(URL) == (["listing"], github.headers, cache.get(URL))
+    github.use_fresh_cache = False
+    cache.reads = 0
+    fresh, headers, cached = github._cached_response(URL)
+    assert (fresh, headers["If-None-Match"], cached["body"]) == (None, '"etag-1"', ["listing"])
+    assert cache.reads == 1
+
+
+def test_get_contents_goes_through_the_async_fetch_path(path):
+    for module in ("aiohttp", "requests", "pyhdb", "hdbcli"):
+        pytest.importorskip(module)
+    from src.dms.integrations.github_integration import GitHubIntegration
+
+    github = GitHubIntegration(connection_config={}, integration_config={
+        "access_token": "token", "repo_owner": "owner", "repo_name": "repo"
+    })
+    github.response_cache = ResponseCache(path, fresh_seconds=60)
+    github.response_cache.put(URL, '"etag-1"', [{"name": "README.md"}])
+
+    # Fresh in the cache, so no request is sent
+    assert github.get_contents("") == [{"name": "README.md"}]
+    assert github.response_cache.stats()["fresh_hits"] == 1
@@ -0,0 +1,175 @@
+import threading
+
+import pytest
+
+from src.dms.helper.search_index import FILE, FOLDER, PathSearchIndex, SearchIndexRegistry
+
+
+@pytest.fixture
+def index():
+    index = PathSearchIndex()
+    index.add_many(FOLDER, [(1, "docs"), (2, "docs/reports"), (3, "src")])
+    index.add_many(FILE, [
+        (10, "docs/Readme.md"),
+        (11, "docs/reports/q1-report.pdf"),
+        (12, "docs/reports/q2-report.PDF"),
+        (13, "src/report_builder.py"),
+        (14, "src/main.py"),
+        (15, "readme.txt"),
+    ])
+    return index
+
+
+def paths(results):
+    return [result["path"] for result in results]
+
+
+def test_substring_search_is_case_insensitive(index):
+    assert paths(index.search("README")) == ["docs/Readme.md", "readme.txt"]
+    assert paths(index.search("report")) == [
+        "docs/reports", "docs/reports/q1-report.pdf", "docs/reports/q2-report.PDF", "src/report_builder.py"
+    ]
+
+
+def test_short_queries_scan(index):
+    assert paths(index.search("q2")) == ["docs/reports/q2-report.PDF"]
+    assert paths(index.search("_b")) == ["src/report_builder.py"]
+
+
+def test_prefix_extension_and_kind_filters(index):
+    assert paths(index.search(prefix="q")) == ["docs/reports/q1-report.pdf", "docs/reports/q2-report.PDF"]
+    assert paths(index.search(ext=".pdf")) == ["docs/reports/q1-report.pdf", "docs/reports/q2-report.PDF"]
+    assert paths(index.search("report", kind=FOLDER)) == ["docs/reports"]
+    assert paths(index.search("report", ext="py", kind=FILE)) == ["src/report_builder.py"]
+
+
+def test_short_prefixes_use_their_own_postings(index):
+    assert paths(index.search(prefix="RE")) == [
+        "docs/reports", "docs/Readme.md", "src/report_builder.py", "readme.txt"
+    ]
+    assert paths(index.search(prefix="re", ext="txt")) == ["readme.txt"]
+    assert index.search(prefix="_") == []
+    # Both the query's trigrams and the prefix narrow the candidates
+    assert paths(index.search("port", prefix="q2")) == ["docs/reports/q2-report.PDF"]
+
+
+def test_path_scope_covers_the_whole_subtree_only(index):
+    assert paths(index.search(path="docs")) == [
+        "docs/reports", "docs/Readme.md", "docs/reports/q1-report.pdf", "docs/reports/q2-report.PDF"
+    ]
+    assert paths(index.search("report", path="/src/")) == ["src/report_builder.py"]
+    # "doc" is a prefix of "docs" but not a folder above it
+    assert index.search(path="doc") == []
+
+
+def test_results_carry_type_id_and_name(index):
+    assert index.search("main") == [{"type": "file", "id": 14, "name": "main.py", "path": "src/main.py"}]
+
+
+def test_removed_rows_are_hidden_per_kind(index):
+    index.remove_many(FILE, [11, 3])
+    assert paths(index.search("report", ext="pdf")) == ["docs/reports/q2-report.PDF"]
+    # FileId 3 doesn't hide FolderId 3
+    assert paths(index.search("src", kind=FOLDER)) == ["src"]
+
+
+def test_limit_and_unknown_trigrams(index):
+    assert len(index.search("r", limit=2)) == 2
+    assert index.search("zzzz") == []
+
+
+def load_rows(rows):
+    def load(index):
+        index.add_many(FILE, rows)
+    return load
+
+
+def test_registry_evicts_least_recently_searched():
+    registry = SearchIndexRegistry(max_containers=2)
+    registry.get(1, load_rows([(1, "a.txt")]))
+    registry.get(2, load_rows([(2, "b.txt")]))
+    # A hit marks container 1 as recently used, so container 2 goes first
+    assert registry.get(1) is not None
+    registry.get(3, load_rows([(3, "c.txt")]))
+    assert registry.loaded(1) is not None
+    assert registry.loaded(2) is None
+    assert registry.loaded(3) is not None
+
+
+def test_registry_get_without_load_reports_a_miss():
+    registry = SearchIndexRegistry()
+    assert registry.get(1) is None
+    assert registry.stats()["builds"] == 0
+
+
+def test_publish_updates_only_loaded_indexes():
+    registry = SearchIndexRegistry()
+    registry.publish(1, [(True, FILE, [(5, "ignored.txt")])])
+    index = registry.get(1, load_rows([(1, "old.txt")]))
+    assert paths(index.search("ignored")) == []
+
+    registry.publish(1, [(True, FILE, [(2, "new.txt")]), (False, FILE, [1])])
+    assert paths(index.search("txt")) == ["new.txt"]
+
+
+def test_build_overlapping_a_publish_is_not_kept():
+    registry = SearchIndexRegistry()
+    loading = threading.Event()
+    release = threading.Event()
+
+    def slow_load(index):
+        index.add_many(FILE, [(1, "before.txt")])
+        loading.set()
+        release.wait(5)
+
+    builder = threading.Thread(target=registry.get, args=(1, slow_load))
+    builder.start()
+    assert loading.wait(5)
+    # A commit lands while the build is reading the tables
+    registry.publish(1, [(True, FILE, [(2, "after.txt")])])
+    release.set()
+    builder.join()
+
+    assert registry.loaded(1) is None
+    rebuilt = registry.get(1, load_rows([(1, "before.txt"), (2, "after.txt")]))
+    assert paths(rebuilt.search("txt")) == ["before.txt", "after.txt"]
+
+
+def test_writer_publishes_rows_only_after_commit(monkeypatch):
+    pytest.importorskip("aiohttp")
+    pytest.importorskip("requests")
+    from src.dms.integrations import base_integration
+
+    class Writer(base_integration.DMSBatchWriter):
+        def _reserve_ids(self, sequence, count):
+            return list(range(100, 100 + count))
+
+    class Cursor:
+        def executemany(self, query, rows):
+            pass
+
+    class Connection:
+        committed = False
+
+        def commit(self):
+            self.committed = True
+
+    registry = SearchIndexRegistry()
+    monkeypatch.setattr(base_integration, "search_indexes", registry)
+    index = registry.get(7, load_rows([]))
+    writer = Writer(Cursor(), 7, "test")
+    writer.add_file(None, "draft.txt", "draft.txt", 1, "txt")
+    writer.flush()
+    # Flushed but not committed: a rollback now must leave nothing in the index
+    assert index.search("draft") == []
+
+    connection = Connection()
+    writer.commit(connection)
+    assert connection.committed
+    assert paths(index.search("draft")) == ["draft.txt"]
+
+
+def test_endpoint_needs_three_characters_of_query(client):
+    # Rejected by validation, before the index is loaded from HANA
+    response = client.get("/api/v1/containers/1/search", params={"q": "ab"})
+    assert response.status_code == 422
@@ -0,0 +1,111 @@
+import threading
+
+import pytest
+
+for module in ("aiohttp", "requests"):
+    pytest.importorskip(module)
+
+from src.dms.helper import request_budget
+from src.dms.helper.jobs import SyncJob
+from src.dms.helper.request_budget import BatchBudget, RequestBudget, get_budget
+from src.dms.integrations.sync_scheduler import RepoTarget, SyncScheduler
+
+
+class FakeIntegration:
+    """Records the budget its sync ran with and how many syncs overlapped"""
+
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+    budgets = []
+
+    def __init__(self, target):
+        self.target = target
+        self.request_budget = None
+
+    def attach_job(self, job):
+        pass
+
+    def setup_container(self, dry_run, container_id):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+            cls.budgets.append(self.request_budget)
+        try:
+            threading.Event().wait(0.02)
+            return {"status": "success"}
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+
+@pytest.fixture(autouse=True)
+def fresh_budgets(monkeypatch):
+    monkeypatch.setattr(request_budget, "_budgets", {})
+    FakeIntegration.active = FakeIntegration.max_active = 0
+    FakeIntegration.budgets = []
+
+
+def targets(count, token="token-a"):
+    return [RepoTarget("owner", f"repo{i}", token) for i in range(count)]
+
+
+def test_batch_limits_do_not_change_the_shared_budget():
+    shared = get_budget("token-a")
+    scheduler = SyncScheduler(integration_factory=FakeIntegration,
+                              max_concurrency_per_token=1, request_budget_per_token=10)
+    result = scheduler.run(SyncJob("test"), targets(3))
+
+    assert result["status"] == "success"
+    assert FakeIntegration.max_active == 1
+    assert all(isinstance(budget, BatchBudget) for budget in FakeIntegration.budgets)
+    assert FakeIntegration.budgets[0].capacity == 10
+    assert (shared.max_concurrency, shared.capacity) == (request_budget.TOKEN_MAX_CONCURRENCY,
+                                                         request_budget.TOKEN_REQUEST_BUDGET)
+    assert shared.running == 0
+
+
+def test_without_batch_limits_syncs_use_the_shared_budget():
+    SyncScheduler(integration_factory=FakeIntegration).run(SyncJob("test"), targets(2))
+    assert FakeIntegration.budgets == [get_budget("token-a")] * 2
+
+
+def test_batch_budget_waits_for_both_buckets():
+    shared = RequestBudget(max_concurrency=1, requests_per_window=1, window_seconds=10)
+    batch = BatchBudget(shared, max_concurrency=2, requests_per_window=5)
+    assert batch.reserve() == 0
+    # The batch still has requests left, but the token's bucket is empty
+    assert batch.reserve() == pytest.approx(10, abs=0.1)
+    assert batch.try_start()
+    # One slot is all the token allows, whatever the batch asks for
+    assert not batch.has_slot() and not batch.try_start()
+    batch.finish()
+    assert shared.running == 0
+
+
+@pytest.mark.parametrize("limits", [{"max_concurrency": 0}, {"requests_per_window": 0}])
+def test_budgets_without_capacity_are_refused(limits):
+    with pytest.raises(ValueError):
+        RequestBudget(**limits)
+    with pytest.raises(ValueError):
+        BatchBudget(RequestBudget(), **limits)
+
+
+def test_token_without_capacity_fails_instead_of_waiting():
+    scheduler = SyncScheduler(integration_factory=FakeIntegration, max_concurrency_per_token=0)
+    result = scheduler.run(SyncJob("test"), targets(2))
+
+    assert result["status"] == "error"
+    assert [repo["state"] for repo in result["repos"]] == ["failed", "failed"]
+    assert FakeIntegration.budgets == []
+
+
+def test_batch_request_rejects_zero_limits():
+    from pydantic import ValidationError
+    from src.dms.models.integration_models import RepoSyncBatch
+
+    with pytest.raises(ValidationError):
+        RepoSyncBatch(targets=[], max_concurrency_per_token=0)
+    with pytest.raises(ValidationError):
+        RepoSyncBatch(targets=[], request_budget_per_token=0)
@@ -0,0 +1,102 @@
+import threading
+import time
+import types
+
+import pytest
+
+from src.dms.helper import token_cache
+from src.dms.helper.token_cache import ExpiringTokenCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Manual monotonic clock for the cache module; advance with clock.now += seconds"""
+    fake = types.SimpleNamespace(now=1000.0)
+    fake.monotonic = lambda: fake.now
+    monkeypatch.setattr(token_cache, "time", fake)
+    return fake
+
+
+class Issuer:
+    def __init__(self, expires_in=300):
+        self.expires_in = expires_in
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f"token-{self.calls}", self.expires_in
+
+
+def test_token_is_reused_until_refresh_margin(clock):
+    issuer = Issuer(expires_in=300)
+    cache = ExpiringTokenCache(issuer, refresh_margin=60)
+    assert cache.get() == "token-1"
+    clock.now += 239
+    assert cache.get() == "token-1"
+    clock.now += 1
+    assert cache.get() == "token-2"
+    assert issuer.calls == 2
+
+
+def test_short_lived_token_is_kept_for_half_its_lifetime(clock):
+    issuer = Issuer(expires_in=100)
+    cache = ExpiringTokenCache(issuer, refresh_margin=60)
+    cache.get()
+    clock.now += 49
+    assert cache.get() == "token-1"
+    clock.now += 1
+    assert cache.get() == "token-2"
+
+
+def test_missing_expires_in_uses_default_ttl(clock):
+    issuer = Issuer(expires_in=None)
+    cache = ExpiringTokenCache(issuer, refresh_margin=10, default_ttl=100)
+    cache.get()
+    clock.now += 89
+    assert cache.get() == "token-1"
+    clock.now += 1
+    assert cache.get() == "token-2"
+
+
+def test_peek_never_fetches(clock):
+    issuer = Issuer()
+    cache = ExpiringTokenCache(issuer)
+    assert cache.peek() is None
+    cache.get()
+    assert cache.peek() == "token-1"
+    clock.now += 10000
+    assert cache.peek() is None
+    assert issuer.calls == 1
+
+
+def test_invalidate_forces_refresh(clock):
+    issuer = Issuer()
+    cache = ExpiringTokenCache(issuer)
+    cache.get()
+    cache.invalidate()
+    assert cache.get() == "token-2"
+
+
+def test_concurrent_callers_share_one_refresh():
+    calls = []
+
+    def slow_fetch():
+        calls.append(None)
+        time.sleep(0.05)
+        return "token", 3600
+
+    cache = ExpiringTokenCache(slow_fetch)
+    start = threading.Barrier(8)
+    results = []
+
+    def caller():
+        start.wait()
+        results.append(cache.get())
+
+    threads = [threading.Thread(target=caller) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["token"] * 8
+    assert len(calls) == 1
@@ -0,0 +1,41 @@
+from src.dms.helper.ttl_cache import TTLCache
+
+
+def test_set_is_dropped_when_its_namespace_was_invalidated_during_the_read():
+    cache = TTLCache()
+    generation = cache.generation("containers")
+    # A writer commits and invalidates while the reader's query is running
+    cache.invalidate("containers")
+    cache.set(("containers", 50, None), ["stale"], generation)
+    assert cache.get(("containers", 50, None)) == (False, None)
+
+    generation = cache.generation("containers")
+    cache.set(("containers", 50, None), ["fresh"], generation)
+    assert cache.get(("containers", 50, None)) == (True, ["fresh"])
+
+
+def test_generations_are_per_namespace_and_cleared_by_a_full_invalidate():
+    cache = TTLCache()
+    generation = cache.generation("integrations")
+    cache.invalidate("containers")
+    cache.set(("integrations", 1), "kept", generation)
+    assert cache.get(("integrations", 1)) == (True, "kept")
+
+    generation = cache.generation("integrations")
+    cache.invalidate()
+    cache.set(("integrations", 1), "stale", generation)
+    assert cache.get(("integrations", 1)) == (False, None)
+
+
+def test_expired_and_least_recently_used_entries_go():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set(("a", 1), 1)
+    cache.set(("a", 2), 2)
+    cache.get(("a", 1))
+    cache.set(("a", 3), 3)
+    assert cache.get(("a", 2)) == (False, None)
+    assert cache.get(("a", 1)) == (True, 1)
+
+    cache.ttl = -1
+    cache.set(("a", 4), 4)
+    assert cache.get(("a", 4)) == (False, None)